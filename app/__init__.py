@@ -28,7 +28,7 @@ def create_app(config_class=Config):
     migrate.init_app(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
-    socketio.init_app(app)
+    socketio.init_app(app, message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE'))
 
     # 设置登录视图
     login_manager.login_view = 'auth.login'
@@ -57,10 +57,114 @@ def create_app(config_class=Config):
     app.register_blueprint(ai_bp)
     app.register_blueprint(watchlist_bp)
 
+    # 注册实时行情推送的SocketIO事件
+    from app.controllers import realtime  # noqa: F401
+
     # 注册错误处理器
     from app.controllers.errors import register_error_handlers
     register_error_handlers(app)
 
+    # 配置行情数据源
+    from app.providers import configure_provider
+    if app.config['STOCK_API_PROVIDER'] == 'http':
+        configure_provider(
+            'http',
+            base_url=app.config['STOCK_API_URL'],
+            api_key=app.config['STOCK_API_KEY'],
+            timeout=(app.config['STOCK_API_CONNECT_TIMEOUT'], app.config['STOCK_API_READ_TIMEOUT']),
+            retries=app.config['STOCK_API_RETRIES'],
+            backoff_factor=app.config['STOCK_API_BACKOFF'],
+            pool_size=app.config['STOCK_API_POOL_SIZE'],
+            batch_size=app.config['STOCK_API_BATCH_SIZE'],
+            deadline=app.config['STOCK_API_DEADLINE']
+        )
+    else:
+        configure_provider(app.config['STOCK_API_PROVIDER'])
+
+    # 配置行情缓存和请求合并
+    from app.services.stock_service import quote_cache, quote_batcher, quote_flight
+    # 等待其他调用者的结果不超过一次数据源调用的总时限加合并窗口
+    wait_timeout = app.config['STOCK_API_DEADLINE'] + app.config['QUOTE_BATCH_WINDOW_MS'] / 1000
+    quote_batcher.configure(window=app.config['QUOTE_BATCH_WINDOW_MS'] / 1000,
+                            max_batch_size=app.config['QUOTE_BATCH_MAX_SIZE'],
+                            timeout=wait_timeout)
+    quote_flight.configure(timeout=wait_timeout)
+    quote_cache.configure(max_size=app.config['QUOTE_CACHE_SIZE'],
+                          ttl=app.config['QUOTE_CACHE_TTL'])
+    from app.services.resample_service import resample_cache
+    resample_cache.configure(max_size=app.config['RESAMPLE_CACHE_SIZE'],
+                             ttl=app.config['RESAMPLE_CACHE_TTL'])
+    from app.services.history_service import history_store
+    if app.config['HISTORY_STORE_ENABLED']:
+        history_store.configure(app.config['HISTORY_STORE_DIR'], app.config['SQLALCHEMY_DATABASE_URI'],
+                                app.config['HISTORY_STORE_MAX_MAPS'])
+    if app.config['QUOTE_BOARD_ENABLED']:
+        from app.services.stock_service import quote_board
+        from app.utils.quote_board import segment_name
+        try:
+            # 名称附加数据库地址的摘要，同一台机器上的不同部署互不干扰
+            quote_board.open(segment_name(app.config['QUOTE_BOARD_NAME'], app.config['SQLALCHEMY_DATABASE_URI']),
+                             app.config['QUOTE_BOARD_CAPACITY'], app.config['QUOTE_BOARD_LOCK_FILE'])
+        except Exception as e:
+            app.logger.warning(f"共享内存行情板未启用: {str(e)}")
+    from app.services.push_service import quote_publisher
+    quote_publisher.configure(flush_interval=app.config['QUOTE_PUSH_FLUSH_MS'] / 1000,
+                              max_in_flight=app.config['QUOTE_PUSH_MAX_IN_FLIGHT'])
+
+    # 加载股票代码注册表并构建搜索索引，数据表尚未创建时推迟到首次使用
+    from app.services.symbol_service import load_symbol_registry
+    from app.services.search_service import build_search_index
+    from app.services.stock_service import ensure_stock_snapshots
+    with app.app_context():
+        try:
+            load_symbol_registry()
+            build_search_index()
+        except Exception as e:
+            app.logger.info(f"推迟加载股票代码注册表和搜索索引: {str(e)}")
+        
+        # 升级后首次启动时从行情表生成最新行情快照
+        try:
+            ensure_stock_snapshots()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.info(f"跳过生成最新行情快照: {str(e)}")
+
+    # 配置跨进程缓存失效总线并启动接收任务
+    from app.bus import configure_bus
+    from app.services.invalidation_service import invalidation_listener
+    bus_name = app.config['INVALIDATION_BUS']
+    try:
+        if bus_name == 'unix':
+            configure_bus('unix', directory=app.config['INVALIDATION_BUS_DIR'])
+        elif bus_name == 'redis':
+            configure_bus('redis', url=app.config['INVALIDATION_BUS_URL'],
+                          channel=app.config['INVALIDATION_BUS_CHANNEL'])
+        else:
+            configure_bus(bus_name)
+    except Exception as e:
+        app.logger.warning(f"缓存失效总线 {bus_name} 不可用，改为单进程模式: {str(e)}")
+        bus_name = 'local'
+        configure_bus(bus_name)
+    if bus_name != 'local':
+        invalidation_listener.start(app)
+
+    # 配置行情延迟写入，根据配置启动后台写入任务
+    from app.services.stock_service import quote_write_buffer
+    from app.services.quote_writer_service import quote_writer
+    quote_write_buffer.configure(interval=app.config['QUOTE_WRITE_BEHIND_MS'] / 1000,
+                                 max_rows=app.config['QUOTE_WRITE_BEHIND_MAX_ROWS'])
+    if app.config['QUOTE_WRITE_BEHIND_ENABLED']:
+        quote_writer.start(app)
+    else:
+        quote_writer.attach(app)
+
+    # 启动行情预热后台任务
+    if app.config['QUOTE_PREWARM_ENABLED']:
+        from app.services.prewarm_service import quote_prewarmer
+        quote_prewarmer.configure(interval=app.config['QUOTE_PREWARM_INTERVAL'],
+                                  lock_file=app.config['QUOTE_PREWARM_LOCK_FILE'])
+        quote_prewarmer.start(app)
+
     return app
 
 
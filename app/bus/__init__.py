@@ -0,0 +1,59 @@
+"""
+缓存失效总线包
+
+通过configure_bus选择总线（create_app中根据配置调用），
+invalidation_service通过get_bus获取当前总线。
+"""
+import logging
+from typing import Any
+
+from app.bus.base import BusBackend, BusError
+from app.bus.local import LocalBus
+from app.bus.unix_socket import UnixSocketBus
+from app.bus.redis_bus import RedisBus
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+# 可用的总线
+BUSES = {
+    LocalBus.name: LocalBus,
+    UnixSocketBus.name: UnixSocketBus,
+    RedisBus.name: RedisBus,
+}
+
+_bus: BusBackend = LocalBus()
+
+
+def configure_bus(name: str, **options: Any) -> BusBackend:
+    """
+    设置当前总线，关闭之前的总线
+
+    Args:
+        name: 总线名称，见BUSES
+        **options: 传给总线构造函数的参数
+
+    Returns:
+        BusBackend: 新的总线
+    """
+    global _bus
+    bus_class = BUSES.get(name)
+    if bus_class is None:
+        raise ValueError(f"未知的缓存失效总线: {name}")
+
+    bus = bus_class(**options)
+    previous, _bus = _bus, bus
+    previous.close()
+    logger.info(f"缓存失效总线: {name}")
+    return bus
+
+
+def get_bus() -> BusBackend:
+    """获取当前总线"""
+    return _bus
+
+
+__all__ = [
+    'BusBackend', 'BusError', 'LocalBus', 'UnixSocketBus', 'RedisBus',
+    'BUSES', 'configure_bus', 'get_bus',
+]
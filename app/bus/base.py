@@ -0,0 +1,63 @@
+"""
+股票系统 - 缓存失效总线接口
+
+总线只负责把消息（字节串）广播给同一部署中的其他进程，消息的编码和分发由
+invalidation_service完成：
+- publish(message): 发送给其他进程，不保证送达，接收方通过消息序号发现丢失
+- listen(callback): 在当前线程阻塞接收消息并回调，直到close()
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict
+
+
+class BusError(Exception):
+    """总线发送或接收失败（连接失败、消息过大或协议错误）"""
+
+
+class BusBackend(ABC):
+    """缓存失效总线基类"""
+
+    # 后端名称，用于配置和日志
+    name = 'base'
+
+    # 单条消息的最大字节数
+    max_message_size = 60000
+
+    def __init__(self):
+        """初始化计数"""
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+
+    @abstractmethod
+    def publish(self, message: bytes) -> None:
+        """
+        把消息广播给其他进程
+
+        Args:
+            message: 消息内容，不超过max_message_size
+
+        Raises:
+            BusError: 发送失败
+        """
+
+    @abstractmethod
+    def listen(self, callback: Callable[[bytes], None]) -> None:
+        """
+        阻塞接收其他进程的消息，直到close()
+
+        Args:
+            callback: 每收到一条消息调用一次
+        """
+
+    def close(self) -> None:
+        """停止接收并释放连接"""
+
+    def stats(self) -> Dict[str, Any]:
+        """获取收发统计信息"""
+        return {
+            'backend': self.name,
+            'sent': self.sent,
+            'received': self.received,
+            'dropped': self.dropped
+        }
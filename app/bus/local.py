@@ -0,0 +1,21 @@
+"""
+股票系统 - 单进程缓存失效总线
+
+单进程部署和测试使用：没有其他进程需要通知，发送的消息直接丢弃，也不接收消息。
+"""
+from typing import Callable
+
+from app.bus.base import BusBackend
+
+
+class LocalBus(BusBackend):
+    """单进程总线"""
+
+    name = 'local'
+
+    def publish(self, message: bytes) -> None:
+        """没有其他进程，直接丢弃"""
+        self.sent += 1
+
+    def listen(self, callback: Callable[[bytes], None]) -> None:
+        """没有其他进程，立即返回"""
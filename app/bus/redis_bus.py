@@ -0,0 +1,181 @@
+"""
+股票系统 - Redis发布订阅缓存失效总线
+
+通过Redis协议(RESP)的PUBLISH/SUBSCRIBE广播消息，可用于多台机器的部署。
+只实现用到的几个命令，不依赖redis客户端库；兼容Redis协议的服务（包括本地替身
+app.bus.stub_redis）都可以使用。
+
+订阅连接断开后按固定间隔自动重连，断开期间丢失的消息由接收方通过消息序号发现。
+"""
+import logging
+import socket
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from app.bus.base import BusBackend, BusError
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+
+def encode_command(*args: Any) -> bytes:
+    """按RESP数组编码命令"""
+    parts = [f'*{len(args)}\r\n'.encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+        parts.append(f'${len(data)}\r\n'.encode() + data + b'\r\n')
+    return b''.join(parts)
+
+
+def read_reply(stream) -> Any:
+    """
+    从文件对象读取一个RESP回复
+
+    Returns:
+        简单字符串和批量字符串为bytes，整数为int，数组为list，空值为None
+
+    Raises:
+        BusError: 服务端返回错误或连接已关闭
+    """
+    line = stream.readline()
+    if not line.endswith(b'\r\n'):
+        raise BusError("连接已关闭")
+    kind, body = line[:1], line[1:-2]
+    if kind == b'+':
+        return body
+    if kind == b'-':
+        raise BusError(body.decode('utf-8', 'replace'))
+    if kind == b':':
+        return int(body)
+    if kind == b'$':
+        length = int(body)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise BusError("连接已关闭")
+        return data[:-2]
+    if kind == b'*':
+        length = int(body)
+        if length < 0:
+            return None
+        return [read_reply(stream) for _ in range(length)]
+    raise BusError(f"无法解析的回复: {line[:32]!r}")
+
+
+class RedisBus(BusBackend):
+    """Redis发布订阅总线"""
+
+    name = 'redis'
+
+    def __init__(self, url: str = 'redis://127.0.0.1:6379/0', channel: str = 'stock:invalidation',
+                 timeout: float = 3.0, reconnect_delay: float = 1.0):
+        """
+        初始化
+
+        Args:
+            url: 服务地址，redis://[:密码@]主机[:端口][/库]
+            channel: 发布订阅的频道
+            timeout: 连接和发送的超时时间(秒)
+            reconnect_delay: 订阅连接断开后的重连间隔(秒)
+        """
+        super().__init__()
+        parts = urlsplit(url)
+        if parts.scheme not in ('redis', ''):
+            raise BusError(f"不支持的地址: {url}")
+        self.address = (parts.hostname or '127.0.0.1', parts.port or 6379)
+        self.password = unquote(parts.password) if parts.password else None
+        self.channel = channel
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self._pub: Optional[Tuple[socket.socket, Any]] = None
+        self._sub: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> Tuple[socket.socket, Any]:
+        """建立连接并认证，返回套接字和读取用的文件对象"""
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        stream = sock.makefile('rb')
+        if self.password:
+            sock.sendall(encode_command('AUTH', self.password))
+            read_reply(stream)
+        return sock, stream
+
+    def _command(self, *args: Any) -> Any:
+        """在发布连接上执行命令（调用方需持有锁）"""
+        if self._pub is None:
+            self._pub = self._connect()
+        sock, stream = self._pub
+        sock.sendall(encode_command(*args))
+        return read_reply(stream)
+
+    def publish(self, message: bytes) -> None:
+        """发布消息，连接失效时重连一次"""
+        if len(message) > self.max_message_size:
+            raise BusError(f"消息过大: {len(message)} 字节")
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self._command('PUBLISH', self.channel, message)
+                    self.sent += 1
+                    return
+                except (OSError, BusError) as e:
+                    self._close_pub()
+                    if attempt:
+                        self.dropped += 1
+                        raise BusError(f"发布失败: {str(e)}") from e
+
+    def listen(self, callback: Callable[[bytes], None]) -> None:
+        """订阅频道并接收消息，断开后自动重连，直到close()"""
+        while not self._closed:
+            try:
+                sock, stream = self._connect()
+                self._sub = sock
+                # 订阅连接长期空闲，不设置读超时
+                sock.settimeout(None)
+                sock.sendall(encode_command('SUBSCRIBE', self.channel))
+                logger.info(f"缓存失效总线已订阅 {self.address[0]}:{self.address[1]} {self.channel}")
+                while not self._closed:
+                    reply = read_reply(stream)
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b'message':
+                        self.received += 1
+                        callback(reply[2])
+            except (OSError, BusError) as e:
+                if self._closed:
+                    break
+                logger.warning(f"缓存失效总线订阅连接断开，{self.reconnect_delay}s后重连: {str(e)}")
+                time.sleep(self.reconnect_delay)
+            finally:
+                self._close_sub()
+
+    def _close_pub(self) -> None:
+        """关闭发布连接"""
+        if self._pub is not None:
+            sock, stream = self._pub
+            self._pub = None
+            for item in (stream, sock):
+                try:
+                    item.close()
+                except OSError:
+                    pass
+
+    def _close_sub(self) -> None:
+        """关闭订阅连接"""
+        sock, self._sub = self._sub, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def close(self) -> None:
+        """停止订阅并关闭连接"""
+        self._closed = True
+        with self._lock:
+            self._close_pub()
+        self._close_sub()
+
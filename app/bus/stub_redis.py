@@ -0,0 +1,193 @@
+"""
+股票系统 - 本地Redis发布订阅替身
+
+只实现缓存失效总线用到的PING、AUTH、PUBLISH、SUBSCRIBE、UNSUBSCRIBE和QUIT命令，
+用于开发、测试和基准测试中代替真实的Redis服务。
+
+运行方式:
+    python -m app.bus.stub_redis --port 6380
+
+代码中使用:
+    with StubRedisServer() as server:
+        bus = RedisBus(server.url)
+"""
+import argparse
+import socketserver
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from app.bus.base import BusError
+from app.bus.redis_bus import read_reply
+
+
+def _bulk(data: bytes) -> bytes:
+    """编码批量字符串"""
+    return f'${len(data)}\r\n'.encode() + data + b'\r\n'
+
+
+def _array(*items: bytes) -> bytes:
+    """编码由已编码元素组成的数组"""
+    return f'*{len(items)}\r\n'.encode() + b''.join(items)
+
+
+class _StubRedisHandler(socketserver.StreamRequestHandler):
+    """替身服务的单个连接"""
+
+    def setup(self) -> None:
+        super().setup()
+        self.write_lock = threading.Lock()
+        self.channels: Set[bytes] = set()
+
+    def send(self, data: bytes) -> None:
+        """向连接写入数据，发布方线程和本连接线程可能同时写入"""
+        with self.write_lock:
+            self.wfile.write(data)
+            self.wfile.flush()
+
+    def handle(self) -> None:
+        """逐条处理命令"""
+        server: 'StubRedisServer' = self.server.stub
+        try:
+            while True:
+                try:
+                    command = read_reply(self.rfile)
+                except BusError:
+                    break
+                if not isinstance(command, list) or not command:
+                    self.send(b'-ERR protocol error\r\n')
+                    break
+                name = command[0].upper()
+                args = command[1:]
+                if name == b'PING':
+                    self.send(b'+PONG\r\n')
+                elif name == b'AUTH':
+                    self.send(b'+OK\r\n')
+                elif name == b'PUBLISH' and len(args) == 2:
+                    count = server.publish(args[0], args[1])
+                    self.send(f':{count}\r\n'.encode())
+                elif name == b'SUBSCRIBE' and args:
+                    for channel in args:
+                        server.subscribe(channel, self)
+                        self.channels.add(channel)
+                        self.send(_array(_bulk(b'subscribe'), _bulk(channel),
+                                         f':{len(self.channels)}\r\n'.encode()))
+                elif name == b'UNSUBSCRIBE':
+                    for channel in args or list(self.channels):
+                        server.unsubscribe(channel, self)
+                        self.channels.discard(channel)
+                        self.send(_array(_bulk(b'unsubscribe'), _bulk(channel),
+                                         f':{len(self.channels)}\r\n'.encode()))
+                elif name == b'QUIT':
+                    self.send(b'+OK\r\n')
+                    break
+                else:
+                    self.send(b'-ERR unknown command\r\n')
+        except OSError:
+            pass
+        finally:
+            for channel in self.channels:
+                server.unsubscribe(channel, self)
+
+
+class StubRedisServer:
+    """在后台线程运行的本地Redis发布订阅替身"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        """
+        初始化替身服务
+
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+        """
+        self._subscribers: Dict[bytes, Set[_StubRedisHandler]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self._server = socketserver.ThreadingTCPServer((host, port), _StubRedisHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """服务地址"""
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def subscribe(self, channel: bytes, handler: _StubRedisHandler) -> None:
+        """登记订阅"""
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(handler)
+
+    def unsubscribe(self, channel: bytes, handler: _StubRedisHandler) -> None:
+        """取消订阅"""
+        with self._lock:
+            handlers = self._subscribers.get(channel)
+            if handlers is not None:
+                handlers.discard(handler)
+
+    def publish(self, channel: bytes, message: bytes) -> int:
+        """
+        把消息发给频道的所有订阅连接
+
+        Returns:
+            int: 收到消息的连接数
+        """
+        with self._lock:
+            handlers: List[_StubRedisHandler] = list(self._subscribers.get(channel, ()))
+            self.published += 1
+        frame = _array(_bulk(b'message'), _bulk(channel), _bulk(message))
+        delivered = 0
+        for handler in handlers:
+            try:
+                handler.send(frame)
+                delivered += 1
+            except (OSError, ValueError):
+                # 订阅连接已断开（已关闭的文件对象抛出ValueError）
+                self.unsubscribe(channel, handler)
+        return delivered
+
+    def start(self) -> 'StubRedisServer':
+        """在后台线程启动服务"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """在当前线程运行服务，直到被中断"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        """停止服务"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'StubRedisServer':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    """以前台方式运行替身服务"""
+    parser = argparse.ArgumentParser(description='本地Redis发布订阅替身')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=6380, help='监听端口')
+    args = parser.parse_args()
+
+    server = StubRedisServer(args.host, args.port)
+    print(f"Redis发布订阅替身运行于 {server.url}，Ctrl+C退出")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+股票系统 - 本地Unix套接字缓存失效总线
+
+同一台机器上的每个进程在共享目录中绑定一个Unix数据报套接字，发送时把消息逐个发给目录中
+其他进程的套接字，不需要中间服务。进程异常退出留下的套接字文件在发送失败时删除。
+
+数据报队列很短（Linux的net.unix.max_dgram_qlen默认为10），发送时接收方队列已满则
+最多等待SEND_TIMEOUT，仍未送达才丢弃；接收方通过消息序号发现丢失（见invalidation_service）。
+"""
+import logging
+import os
+import socket
+import uuid
+from typing import Callable, Optional
+
+from app.bus.base import BusBackend, BusError
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+SOCKET_SUFFIX = '.sock'
+
+# 接收等待的超时时间(秒)
+RECV_TIMEOUT = 1.0
+
+# 接收方队列已满时单条消息的最长等待时间(秒)
+SEND_TIMEOUT = 0.1
+
+
+class UnixSocketBus(BusBackend):
+    """本地Unix套接字总线"""
+
+    name = 'unix'
+
+    def __init__(self, directory: str):
+        """
+        初始化
+
+        Args:
+            directory: 各进程套接字文件所在的目录，同一部署的进程必须使用同一目录
+        """
+        super().__init__()
+        if not hasattr(socket, 'AF_UNIX'):
+            raise BusError("当前平台不支持Unix套接字")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}{SOCKET_SUFFIX}')
+        self._recv_sock: Optional[socket.socket] = None
+        self._send_sock: Optional[socket.socket] = None
+        self._closed = False
+
+    def _sender(self) -> socket.socket:
+        """发送用的套接字（不绑定地址），接收方队列已满时最多等待SEND_TIMEOUT"""
+        if self._send_sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.settimeout(SEND_TIMEOUT)
+            self._send_sock = sock
+        return self._send_sock
+
+    def publish(self, message: bytes) -> None:
+        """把消息发给目录中其他进程的套接字"""
+        if len(message) > self.max_message_size:
+            raise BusError(f"消息过大: {len(message)} 字节")
+        sock = self._sender()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith(SOCKET_SUFFIX) or path == self.path:
+                continue
+            try:
+                sock.sendto(message, path)
+                self.sent += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # 进程已退出，删除遗留的套接字文件
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError:
+                # 等待超时仍未送达（接收方长时间未读取）等，丢弃
+                self.dropped += 1
+
+    def listen(self, callback: Callable[[bytes], None]) -> None:
+        """绑定本进程的套接字并接收消息，直到close()"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        # 定期醒来检查是否已关闭
+        sock.settimeout(RECV_TIMEOUT)
+        self._recv_sock = sock
+        logger.info(f"缓存失效总线监听 {self.path}")
+        try:
+            while not self._closed:
+                try:
+                    message = sock.recv(self.max_message_size + 1)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    if self._closed:
+                        break
+                    raise
+                self.received += 1
+                callback(message)
+        finally:
+            self._unlink()
+
+    def close(self) -> None:
+        """停止接收，删除本进程的套接字文件"""
+        self._closed = True
+        for sock in (self._recv_sock, self._send_sock):
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+        self._recv_sock = self._send_sock = None
+        self._unlink()
+
+    def _unlink(self) -> None:
+        """删除本进程的套接字文件"""
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
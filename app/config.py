@@ -28,6 +28,67 @@ class Config:
     # 股票数据API配置
     STOCK_API_KEY = os.environ.get('STOCK_API_KEY') or ''
     STOCK_API_URL = os.environ.get('STOCK_API_URL') or ''
+    # 行情数据源: mock(模拟数据) / http，未指定时配置了STOCK_API_URL则使用http
+    STOCK_API_PROVIDER = os.environ.get('STOCK_API_PROVIDER') or ('http' if STOCK_API_URL else 'mock')
+    STOCK_API_CONNECT_TIMEOUT = float(os.environ.get('STOCK_API_CONNECT_TIMEOUT') or 3)  # 连接超时(秒)
+    STOCK_API_READ_TIMEOUT = float(os.environ.get('STOCK_API_READ_TIMEOUT') or 10)  # 读取超时(秒)
+    STOCK_API_RETRIES = int(os.environ.get('STOCK_API_RETRIES') or 3)  # 最大重试次数
+    STOCK_API_BACKOFF = float(os.environ.get('STOCK_API_BACKOFF') or 0.2)  # 重试退避系数(秒)
+    # 每次数据源调用的总时限(秒)，包括重试和退避；等待合并请求的调用者最多再多等一个合并窗口
+    STOCK_API_DEADLINE = float(os.environ.get('STOCK_API_DEADLINE') or 10)
+    STOCK_API_POOL_SIZE = int(os.environ.get('STOCK_API_POOL_SIZE') or 10)  # 连接池大小
+    STOCK_API_BATCH_SIZE = int(os.environ.get('STOCK_API_BATCH_SIZE') or 200)  # 批量行情每次请求的最大股票数
+    QUOTE_BATCH_WINDOW_MS = float(os.environ.get('QUOTE_BATCH_WINDOW_MS') or 5)  # 单只行情请求合并窗口(毫秒)，0为不合并
+    QUOTE_BATCH_MAX_SIZE = int(os.environ.get('QUOTE_BATCH_MAX_SIZE') or 100)  # 每次合并的最大股票数
+    
+    # 行情缓存配置
+    QUOTE_CACHE_SIZE = int(os.environ.get('QUOTE_CACHE_SIZE') or 2048)  # 最大缓存股票数
+    QUOTE_CACHE_TTL = float(os.environ.get('QUOTE_CACHE_TTL') or 60)  # 默认过期时间(秒)
+    QUOTE_INTRADAY_MAX_AGE = float(os.environ.get('QUOTE_INTRADAY_MAX_AGE') or 60)  # 盘中行情最大时效(秒)
+    QUOTE_UPSERT_CHUNK_SIZE = int(os.environ.get('QUOTE_UPSERT_CHUNK_SIZE') or 5000)  # 批量写入每批行数
+    RESAMPLE_CACHE_SIZE = int(os.environ.get('RESAMPLE_CACHE_SIZE') or 512)  # 周期K线最大缓存数(股票x周期)
+    RESAMPLE_CACHE_TTL = float(os.environ.get('RESAMPLE_CACHE_TTL') or 3600)  # 周期K线缓存过期时间(秒)
+    INDICATOR_HISTORY_SIZE = int(os.environ.get('INDICATOR_HISTORY_SIZE') or 500)  # 技术指标状态保存的最近K线数
+    
+    # 以下后台任务、共享内存和总线默认关闭，避免脚本和数据库迁移等创建应用时启动，
+    # 由部署通过环境变量开启
+    
+    # 行情预热：后台定时刷新持仓和观察列表中股票的行情
+    QUOTE_PREWARM_ENABLED = (os.environ.get('QUOTE_PREWARM_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    QUOTE_PREWARM_INTERVAL = float(os.environ.get('QUOTE_PREWARM_INTERVAL') or 30)  # 刷新间隔(秒)，应小于盘中行情最大时效
+    QUOTE_PREWARM_LOCK_FILE = os.environ.get('QUOTE_PREWARM_LOCK_FILE',
+                                             os.path.join(basedir, '..', 'data', 'quote_prewarm.lock'))
+
+    # 共享内存最新行情板，同一台机器上的worker进程共享，每次行情写入数据库后同步写入
+    QUOTE_BOARD_ENABLED = (os.environ.get('QUOTE_BOARD_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    QUOTE_BOARD_NAME = os.environ.get('QUOTE_BOARD_NAME') or 'stock_quote_board'  # 名称前缀，实际名称附加数据库地址的摘要
+    QUOTE_BOARD_LOCK_FILE = os.environ.get('QUOTE_BOARD_LOCK_FILE',
+                                           os.path.join(basedir, '..', 'data', 'quote_board.lock'))  # 为空时只读
+    QUOTE_BOARD_CAPACITY = int(os.environ.get('QUOTE_BOARD_CAPACITY') or 65536)  # 槽位数，需大于最大股票ID
+
+    # 查询时获取的实时行情总是先缓冲再批量写入数据库，此开关只控制后台写入任务；
+    # 关闭时由写入间隔到期后的第一个请求批量写入
+    QUOTE_WRITE_BEHIND_ENABLED = (os.environ.get('QUOTE_WRITE_BEHIND_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    QUOTE_WRITE_BEHIND_MS = float(os.environ.get('QUOTE_WRITE_BEHIND_MS') or 500)  # 写入间隔
+    QUOTE_WRITE_BEHIND_MAX_ROWS = int(os.environ.get('QUOTE_WRITE_BEHIND_MAX_ROWS') or 500)  # 缓冲达到该行数时立即写入
+
+    # 跨进程缓存失效总线: local(单进程), unix(同一台机器), redis(Redis发布订阅)
+    INVALIDATION_BUS = os.environ.get('INVALIDATION_BUS') or 'local'
+    INVALIDATION_BUS_DIR = os.environ.get('INVALIDATION_BUS_DIR', os.path.join(basedir, '..', 'data', 'bus'))
+    INVALIDATION_BUS_URL = os.environ.get('INVALIDATION_BUS_URL') or 'redis://127.0.0.1:6379/0'
+    INVALIDATION_BUS_CHANNEL = os.environ.get('INVALIDATION_BUS_CHANNEL') or 'stock:invalidation'
+
+    # 实时行情推送
+    QUOTE_PUSH_MAX_SYMBOLS = int(os.environ.get('QUOTE_PUSH_MAX_SYMBOLS') or 500)  # 单个连接的最大订阅数
+    QUOTE_PUSH_FLUSH_MS = float(os.environ.get('QUOTE_PUSH_FLUSH_MS') or 250)  # 每个连接的刷新间隔
+    QUOTE_PUSH_MAX_IN_FLIGHT = int(os.environ.get('QUOTE_PUSH_MAX_IN_FLIGHT') or 2)  # 单个连接最多未确认的帧数
+    # SocketIO消息队列（如redis://localhost:6379/0），多进程部署时用于跨进程推送
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
+
+    # K线历史的列式内存映射存储，关闭时直接查询数据库；实际目录附加数据库地址的摘要
+    HISTORY_STORE_ENABLED = (os.environ.get('HISTORY_STORE_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    HISTORY_STORE_DIR = os.environ.get('HISTORY_STORE_DIR', os.path.join(basedir, '..', 'data', 'history'))
+    HISTORY_STORE_MAX_MAPS = int(os.environ.get('HISTORY_STORE_MAX_MAPS') or 256)  # 每个进程保留的最大映射数(各占一个文件描述符)
     
     # AI模型配置
     AI_API_KEY = os.environ.get('AI_API_KEY') or ''
@@ -51,6 +112,12 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    HISTORY_STORE_ENABLED = False  # 内存数据库不使用磁盘上的历史存储
+    STOCK_API_PROVIDER = 'mock'
+    QUOTE_PREWARM_ENABLED = False
+    QUOTE_WRITE_BEHIND_ENABLED = False
+    QUOTE_BOARD_ENABLED = False
+    INVALIDATION_BUS = 'local'
 
 
 class ProductionConfig(Config):
@@ -6,6 +6,7 @@ from flask_login import login_required, current_user
 from app.models.portfolio import Portfolio
 from app.models.trade import Trade
 from app.models.user import User
+from app.services.valuation_service import value_portfolios
 from app import db
 from sqlalchemy import func
 import datetime
@@ -27,18 +28,23 @@ def dashboard():
     # 获取用户投资组合
     portfolios = Portfolio.query.filter_by(user_id=current_user.id).all()
     
+    # 一次性计算所有投资组合的估值
+    valuations = value_portfolios(portfolios)
+    
     # 处理投资组合数据
     for portfolio in portfolios:
+        valuation = valuations[portfolio.id]
+        
         # 计算投资组合总资产和收益
-        portfolio.total_assets = format(portfolio.calculate_total_assets(), '.2f')
+        portfolio.total_assets = format(valuation.total_value, '.2f')
         
         # 收益率
-        change_rate = portfolio.calculate_change_rate()
+        change_rate = valuation.profit_percentage
         portfolio.change_rate = f"{change_rate:.2f}%" if change_rate else "0.00%"
         portfolio.status = "up" if change_rate and change_rate > 0 else "down"
         
         # 获取持仓数量
-        portfolio.stock_count = portfolio.get_stock_count()
+        portfolio.stock_count = valuation.holdings_count
     
     # 获取最近的交易记录（最多5条）
     recent_trades = Trade.query.filter_by(user_id=current_user.id).order_by(Trade.trade_date.desc()).limit(5).all()
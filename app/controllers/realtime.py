@@ -0,0 +1,111 @@
+"""
+实时行情推送的SocketIO事件处理
+
+客户端连接/quotes命名空间后发送:
+- subscribe   {'codes': [...]}  订阅股票，确认回调返回订阅结果和当前行情快照
+- unsubscribe {'codes': [...]}  取消订阅
+之后通过'quotes'事件按刷新间隔接收 {代码: {变化的字段...}, ...}，收到后需确认（ack），
+未确认的帧过多时服务端暂停发送并只保留最新行情。
+"""
+from typing import Any, Dict, List
+
+from flask import current_app, request
+from flask_login import current_user
+
+from app import socketio
+from app.services.push_service import (
+    QUOTE_NAMESPACE, QUOTE_FIELDS, quote_subscriptions, quote_publisher
+)
+from app.services.stock_service import get_latest_quotes, quote_cache
+from app.services.symbol_service import get_symbol
+
+
+def _parse_codes(data: Any) -> List[str]:
+    """从事件数据中取出去重后的股票代码"""
+    codes = data.get('codes') if isinstance(data, dict) else data
+    if isinstance(codes, str):
+        codes = [codes]
+    if not isinstance(codes, list):
+        return []
+    return list(dict.fromkeys(code.strip() for code in codes if isinstance(code, str) and code.strip()))
+
+
+def _snapshot(codes: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    获取股票当前行情作为订阅时的快照，优先使用行情缓存，其余一条SQL查询
+
+    快照只发给订阅的连接，不记入共用的推送记录：行情缓存可能已包含尚未刷新的更新，
+    记入后刷新时比较不出变化，已有的订阅者就收不到这次更新。
+    """
+    quotes = {}
+    missing = []
+    for code in codes:
+        cached = quote_cache.get(code)
+        if cached and cached.get('price') is not None:
+            quotes[code] = {'code': code, **{key: cached[key] for key in QUOTE_FIELDS
+                                             if cached.get(key) is not None}}
+        else:
+            missing.append(code)
+
+    for code, quote in get_latest_quotes(missing).items():
+        fields = {
+            'price': quote.close_price,
+            'open': quote.open_price,
+            'high': quote.high_price,
+            'low': quote.low_price,
+            'change': quote.change,
+            'change_percent': quote.change_percent,
+            'volume': quote.volume,
+            'turnover': quote.turnover,
+            'date': quote.date.strftime('%Y-%m-%d')
+        }
+        quotes[code] = {'code': code, **{key: value for key, value in fields.items() if value is not None}}
+    return quotes
+
+
+@socketio.on('connect', namespace=QUOTE_NAMESPACE)
+def handle_connect(auth=None):
+    """只允许已登录用户连接，并确保推送刷新任务已启动"""
+    if not current_user.is_authenticated:
+        return False
+    quote_publisher.start()
+    return True
+
+
+@socketio.on('disconnect', namespace=QUOTE_NAMESPACE)
+def handle_disconnect():
+    """断开连接时清理订阅和发送缓冲"""
+    quote_subscriptions.remove_client(request.sid)
+    quote_publisher.discard(request.sid)
+
+
+@socketio.on('subscribe', namespace=QUOTE_NAMESPACE)
+def handle_subscribe(data):
+    """订阅股票，返回新增的订阅和当前行情快照"""
+    requested = _parse_codes(data)
+    limit = current_app.config['QUOTE_PUSH_MAX_SYMBOLS']
+    added = quote_subscriptions.subscribe(
+        request.sid, [code for code in requested if get_symbol(code) is not None], limit
+    )
+
+    # 未注册的股票和超出订阅上限的股票
+    subscribed = set(quote_subscriptions.client_symbols(request.sid))
+    return {
+        'status': 'success',
+        'data': {
+            'subscribed': added,
+            'rejected': [code for code in requested if code not in subscribed],
+            'quotes': _snapshot(added)
+        }
+    }
+
+
+@socketio.on('unsubscribe', namespace=QUOTE_NAMESPACE)
+def handle_unsubscribe(data):
+    """取消订阅股票"""
+    removed = quote_subscriptions.unsubscribe(request.sid, _parse_codes(data))
+    quote_publisher.discard(request.sid, removed)
+    return {
+        'status': 'success',
+        'data': {'unsubscribed': removed}
+    }
@@ -9,6 +9,7 @@ from app.services.stock_service import (
     get_stock_data, get_stock_k_line, get_stock_price,
     search_stocks
 )
+from app.services.indicator_service import calculate_kline_indicators
 
 
 @stock_bp.route('/')
@@ -84,6 +85,7 @@ def api_get_kline(code):
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     limit = request.args.get('limit', 90, type=int)
+    indicators = [name for name in request.args.get('indicators', '').split(',') if name.strip()]
     
     kline_data = get_stock_k_line(
         stock_code=code,
@@ -93,13 +95,23 @@ def api_get_kline(code):
         limit=limit
     )
     
+    data = {
+        'code': code,
+        'period': period,
+        'kline': kline_data
+    }
+    if indicators:
+        try:
+            data['indicators'] = calculate_kline_indicators(code, period, kline_data, indicators)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+    
     return jsonify({
         'status': 'success',
-        'data': {
-            'code': code,
-            'period': period,
-            'kline': kline_data
-        }
+        'data': data
     })
 
 
@@ -5,5 +5,7 @@
 from app.models.user import User
 from app.models.portfolio import Portfolio, PortfolioHolding
 from app.models.watchlist import WatchList, WatchListStock
-from app.models.transaction import Transaction, TransactionType
-from app.models.stock import Stock, StockQuote, StockFinancial 
\ No newline at end of file
+from app.models.transaction import Transaction, TransactionType, UserTradeStat
+from app.models.stock import (
+    Stock, StockQuote, StockSnapshot, StockQuoteCoverage, StockIndicatorState, StockFinancial
+) 
\ No newline at end of file
@@ -2,10 +2,13 @@
 股票系统 - 投资组合模型
 """
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, TYPE_CHECKING
 
 from app import db
 
+if TYPE_CHECKING:
+    from app.services.valuation_service import PortfolioValuation
+
 
 class Portfolio(db.Model):
     """投资组合模型"""
@@ -32,9 +35,14 @@ class Portfolio(db.Model):
         self.description = description
         self.is_default = is_default
     
+    def get_valuation(self) -> 'PortfolioValuation':
+        """获取投资组合估值（一次加载持仓并批量解析价格）"""
+        from app.services.valuation_service import value_portfolio
+        return value_portfolio(self)
+    
     def get_total_value(self) -> float:
         """计算投资组合总价值"""
-        return sum(holding.get_current_value() for holding in self.holdings)
+        return self.get_valuation().total_value
     
     def get_total_cost(self) -> float:
         """计算投资组合总成本"""
@@ -42,39 +50,23 @@ class Portfolio(db.Model):
     
     def get_total_profit(self) -> float:
         """计算投资组合总收益"""
-        return self.get_total_value() - self.get_total_cost()
+        return self.get_valuation().total_profit
     
     def get_profit_percentage(self) -> float:
         """计算投资组合收益率"""
-        total_cost = self.get_total_cost()
-        if total_cost == 0:
-            return 0
-        return (self.get_total_profit() / total_cost) * 100
+        return self.get_valuation().profit_percentage
     
     def get_holdings_summary(self) -> List[Dict[str, Any]]:
         """获取持仓汇总信息"""
-        result = []
-        for holding in self.holdings:
-            result.append({
-                'stock_code': holding.stock_code,
-                'stock_name': holding.stock_name,
-                'quantity': holding.quantity,
-                'average_cost': holding.average_cost,
-                'current_price': holding.get_current_price(),
-                'current_value': holding.get_current_value(),
-                'total_cost': holding.get_total_cost(),
-                'profit': holding.get_profit(),
-                'profit_percentage': holding.get_profit_percentage()
-            })
-        return result
+        return self.get_valuation().get_holdings_summary()
     
     def calculate_total_assets(self) -> float:
         """计算投资组合总资产（用于仪表盘）"""
-        return self.get_total_value()
+        return self.get_valuation().total_value
     
     def calculate_change_rate(self) -> float:
         """计算投资组合变化率（用于仪表盘）"""
-        return self.get_profit_percentage()
+        return self.get_valuation().profit_percentage
     
     def get_stock_count(self) -> int:
         """获取投资组合中的股票数量（用于仪表盘）"""
@@ -28,6 +28,12 @@ class Stock(db.Model):
                            cascade='all, delete-orphan')
     financials = db.relationship('StockFinancial', backref='stock', lazy='dynamic',
                                cascade='all, delete-orphan')
+    quote_coverage = db.relationship('StockQuoteCoverage', backref='stock', lazy='dynamic',
+                                     cascade='all, delete-orphan')
+    indicator_states = db.relationship('StockIndicatorState', backref='stock', lazy='dynamic',
+                                       cascade='all, delete-orphan')
+    snapshot = db.relationship('StockSnapshot', backref='stock', uselist=False,
+                               cascade='all, delete-orphan')
     
     def __init__(self, code: str, name: str, market: str, **kwargs):
         """初始化股票实例"""
@@ -37,9 +43,9 @@ class Stock(db.Model):
         for key, value in kwargs.items():
             setattr(self, key, value)
     
-    def get_latest_quote(self) -> Optional['StockQuote']:
-        """获取最新行情"""
-        return self.quotes.order_by(StockQuote.date.desc()).first()
+    def get_latest_quote(self) -> Optional['StockSnapshot']:
+        """获取最新行情（按主键读取最新行情快照）"""
+        return self.snapshot
     
     def get_basic_info(self) -> Dict[str, Any]:
         """获取股票基本信息"""
@@ -109,6 +115,113 @@ class StockQuote(db.Model):
         return f"<StockQuote {self.stock_id} on {self.date}>"
 
 
+class StockSnapshot(db.Model):
+    """股票最新行情快照模型
+    
+    每只股票一行，保存stock_quotes中日期最新的一条行情，与行情写入在同一事务中维护，
+    读取最新行情时按主键查找，与历史行情的多少无关。字段与StockQuote相同，
+    created_at/updated_at为对应行情记录的时间。
+    """
+    __tablename__ = 'stock_snapshots'
+
+    stock_id = db.Column(db.Integer, db.ForeignKey('stocks.id'), primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    open_price = db.Column(db.Float)
+    close_price = db.Column(db.Float)
+    high_price = db.Column(db.Float)
+    low_price = db.Column(db.Float)
+    volume = db.Column(db.BigInteger)  # 成交量
+    turnover = db.Column(db.Float)  # 成交额
+    change = db.Column(db.Float)  # 涨跌额
+    change_percent = db.Column(db.Float)  # 涨跌幅
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        return {
+            'date': self.date.strftime('%Y-%m-%d'),
+            'open': self.open_price,
+            'close': self.close_price,
+            'high': self.high_price,
+            'low': self.low_price,
+            'volume': self.volume,
+            'turnover': self.turnover,
+            'change': self.change,
+            'change_percent': self.change_percent
+        }
+    
+    def __repr__(self) -> str:
+        """返回最新行情快照的字符串表示"""
+        return f"<StockSnapshot {self.stock_id} on {self.date}>"
+
+
+class StockQuoteCoverage(db.Model):
+    """股票日线行情覆盖范围模型
+    
+    记录已从数据源完整获取过的日期区间。区间内没有行情的交易日（如停牌、未上市）
+    视为确实无数据，不再重复请求数据源。
+    """
+    __tablename__ = 'stock_quote_coverage'
+
+    id = db.Column(db.Integer, primary_key=True)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 外键关系
+    stock_id = db.Column(db.Integer, db.ForeignKey('stocks.id'), nullable=False, index=True)
+    
+    def __init__(self, stock_id: int, start_date: datetime.date, end_date: datetime.date):
+        """初始化行情覆盖范围实例"""
+        self.stock_id = stock_id
+        self.start_date = start_date
+        self.end_date = end_date
+    
+    def __repr__(self) -> str:
+        """返回行情覆盖范围的字符串表示"""
+        return f"<StockQuoteCoverage {self.stock_id} {self.start_date}~{self.end_date}>"
+
+
+class StockIndicatorState(db.Model):
+    """技术指标增量计算状态模型
+    
+    保存每只股票每个周期每个指标最后一根K线前后的递推状态（EMA值、滚动窗口等）
+    以及最近一段指标值，追加新K线时只需从状态递推，无需重新计算整个序列。
+    """
+    __tablename__ = 'stock_indicator_states'
+
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(20), nullable=False)  # K线周期: daily, weekly, monthly...
+    name = db.Column(db.String(32), nullable=False)  # 指标名称，如ma5, macd12_26_9
+    last_date = db.Column(db.Date, nullable=False)  # 最后一根K线的日期
+    state = db.Column(db.JSON, nullable=False)  # 递推状态及最近的指标值
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 外键关系
+    stock_id = db.Column(db.Integer, db.ForeignKey('stocks.id'), nullable=False)
+    
+    # 组合唯一约束，确保每个股票每个周期每个指标只有一条记录
+    __table_args__ = (
+        db.UniqueConstraint('stock_id', 'period', 'name', name='uix_stock_indicator_state'),
+    )
+    
+    def __init__(self, stock_id: int, period: str, name: str,
+                 last_date: datetime.date, state: Dict[str, Any]):
+        """初始化技术指标状态实例"""
+        self.stock_id = stock_id
+        self.period = period
+        self.name = name
+        self.last_date = last_date
+        self.state = state
+    
+    def __repr__(self) -> str:
+        """返回技术指标状态的字符串表示"""
+        return f"<StockIndicatorState {self.stock_id} {self.period} {self.name} {self.last_date}>"
+
+
 class StockFinancial(db.Model):
     """股票财务数据模型"""
     __tablename__ = 'stock_financials'
@@ -35,6 +35,11 @@ class Transaction(db.Model):
     # 外键关系
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolios.id'), nullable=False)
+
+    # 按用户和时间段统计交易时使用
+    __table_args__ = (
+        db.Index('ix_transactions_user_executed', 'user_id', 'executed_at'),
+    )
     
     def __init__(self, user_id: int, portfolio_id: int, stock_code: str, stock_name: str,
                 transaction_type: TransactionType, quantity: int, price: float,
@@ -110,4 +115,40 @@ class Transaction(db.Model):
     
     def __repr__(self) -> str:
         """返回交易记录的字符串表示"""
-        return f"<Transaction {self.transaction_type.value} {self.quantity} {self.stock_code} at {self.price}>" 
\ No newline at end of file
+        return f"<Transaction {self.transaction_type.value} {self.quantity} {self.stock_code} at {self.price}>" 
+
+class UserTradeStat(db.Model):
+    """
+    用户交易统计汇总模型
+
+    按(用户, 投资组合, 统计周期, 周期起始日, 股票代码)累计交易次数和金额，
+    在交易的同一事务中更新，统计某个时间段时只需读取少量汇总行。
+    """
+    __tablename__ = 'user_trade_stats'
+
+    id = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.String(10), nullable=False)  # day / week / month / year
+    bucket_start = db.Column(db.Date, nullable=False)  # 周期起始日
+    stock_code = db.Column(db.String(20), nullable=False)
+    stock_name = db.Column(db.String(100), nullable=False)
+    buy_count = db.Column(db.Integer, nullable=False, default=0)
+    sell_count = db.Column(db.Integer, nullable=False, default=0)
+    buy_amount = db.Column(db.Float, nullable=False, default=0)
+    sell_amount = db.Column(db.Float, nullable=False, default=0)
+    commission = db.Column(db.Float, nullable=False, default=0)
+    tax = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 外键关系
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolios.id'), nullable=False)
+
+    # 组合唯一约束，确保每个周期每只股票只有一条汇总
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'bucket', 'bucket_start', 'portfolio_id', 'stock_code',
+                            name='uix_user_trade_stat'),
+    )
+
+    def __repr__(self) -> str:
+        """返回交易统计汇总的字符串表示"""
+        return f"<UserTradeStat {self.user_id} {self.bucket} {self.bucket_start} {self.stock_code}>"
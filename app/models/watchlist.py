@@ -59,24 +59,32 @@ class WatchList(db.Model):
     
     def get_stocks_data(self) -> List[Dict[str, Any]]:
         """获取观察列表中所有股票的数据"""
-        from app.services.stock_service import get_stock_data
+        from app.services.stock_service import get_stock_data_batch
         result = []
         
-        for stock in self.stocks:
-            try:
-                # 获取股票数据
-                stock_data = get_stock_data(stock.stock_code)
+        stocks = self.stocks.all()
+        error = '获取股票数据失败'
+        try:
+            # 一次性批量获取所有股票数据
+            stocks_data = get_stock_data_batch([stock.stock_code for stock in stocks])
+        except Exception as e:
+            stocks_data = {}
+            error = str(e)
+        
+        for stock in stocks:
+            stock_data = stocks_data.get(stock.stock_code)
+            if stock_data is not None:
                 stock_data['notes'] = stock.notes
                 stock_data['added_at'] = stock.created_at
                 result.append(stock_data)
-            except Exception as e:
+            else:
                 # 处理获取数据失败的情况
                 result.append({
                     'stock_code': stock.stock_code,
                     'stock_name': stock.stock_name,
                     'notes': stock.notes,
                     'added_at': stock.created_at,
-                    'error': str(e)
+                    'error': error
                 })
                 
         return result
@@ -0,0 +1,57 @@
+"""
+行情数据源包
+
+通过configure_provider选择数据源（create_app中根据配置调用），
+业务代码通过get_provider获取当前数据源。
+"""
+import logging
+from typing import Any
+
+from app.providers.base import MarketDataProvider, ProviderError
+from app.providers.mock_provider import MockProvider
+from app.providers.http_provider import HttpProvider
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+# 可用的数据源
+PROVIDERS = {
+    MockProvider.name: MockProvider,
+    HttpProvider.name: HttpProvider,
+}
+
+_provider: MarketDataProvider = MockProvider()
+
+
+def configure_provider(name: str, **options: Any) -> MarketDataProvider:
+    """
+    设置当前数据源，关闭之前的数据源
+
+    Args:
+        name: 数据源名称，见PROVIDERS
+        **options: 传给数据源构造函数的参数
+
+    Returns:
+        MarketDataProvider: 新的数据源
+    """
+    global _provider
+    provider_class = PROVIDERS.get(name)
+    if provider_class is None:
+        raise ValueError(f"未知的行情数据源: {name}")
+
+    provider = provider_class(**options)
+    previous, _provider = _provider, provider
+    previous.close()
+    logger.info(f"行情数据源: {name}")
+    return provider
+
+
+def get_provider() -> MarketDataProvider:
+    """获取当前数据源"""
+    return _provider
+
+
+__all__ = [
+    'MarketDataProvider', 'ProviderError', 'MockProvider', 'HttpProvider',
+    'PROVIDERS', 'configure_provider', 'get_provider',
+]
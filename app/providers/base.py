@@ -0,0 +1,92 @@
+"""
+股票系统 - 行情数据源接口
+
+所有行情数据源实现同一组方法，返回的数据结构与原先stock_service中的fetch_*函数一致：
+- 股票信息: {'name', 'market', 'industry', 'full_name'}
+- 实时行情: {'stock_code', 'date', 'price', 'open', 'high', 'low', 'prev_close',
+            'change', 'change_percent', 'volume', 'turnover'}
+- K线: [{'date', 'open', 'close', 'high', 'low', 'volume', 'turnover', 'change', 'change_percent'}]
+- 搜索结果: [{'code', 'name', 'market'}]
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+
+class ProviderError(Exception):
+    """数据源请求失败（网络错误、超时、重试耗尽或响应格式错误）"""
+
+
+class MarketDataProvider(ABC):
+    """行情数据源基类"""
+
+    # 数据源名称，用于配置和日志
+    name = 'base'
+
+    @abstractmethod
+    def get_stock_info(self, stock_code: str) -> Dict[str, Any]:
+        """
+        获取股票基本信息
+
+        Args:
+            stock_code: 股票代码
+
+        Returns:
+            Dict: 股票基本信息，未知股票返回空字典
+        """
+
+    @abstractmethod
+    def get_quotes(self, stock_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取实时行情
+
+        Args:
+            stock_codes: 股票代码列表
+
+        Returns:
+            Dict[str, Dict]: 股票代码到实时行情的映射，无行情的股票不在结果中
+        """
+
+    def get_quote(self, stock_code: str) -> Dict[str, Any]:
+        """
+        获取单只股票的实时行情
+
+        Args:
+            stock_code: 股票代码
+
+        Returns:
+            Dict: 实时行情，无行情时返回空字典
+        """
+        return self.get_quotes([stock_code]).get(stock_code, {})
+
+    @abstractmethod
+    def get_kline(self, stock_code: str, period: str = 'daily',
+                  start_date: Optional[str] = None,
+                  end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        获取K线数据
+
+        Args:
+            stock_code: 股票代码
+            period: 周期，如'daily', 'weekly', 'monthly'
+            start_date: 开始日期，格式'YYYY-MM-DD'
+            end_date: 结束日期，格式'YYYY-MM-DD'
+
+        Returns:
+            List[Dict]: 按日期升序的K线数据
+        """
+
+    @abstractmethod
+    def search(self, keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        搜索股票
+
+        Args:
+            keyword: 搜索关键词
+            limit: 返回结果限制
+
+        Returns:
+            List[Dict]: 股票列表
+        """
+
+    def close(self) -> None:
+        """释放连接等资源"""
@@ -0,0 +1,180 @@
+"""
+股票系统 - HTTP行情数据源
+
+通过HTTP JSON接口获取行情，接口约定（均为GET，响应为JSON）：
+- {base}/stocks/{code}                               -> 股票信息，未知股票返回404
+- {base}/quotes?codes=600000,000001                  -> {"data": {代码: 实时行情}}
+- {base}/kline/{code}?period=&start_date=&end_date=  -> {"data": [K线]}
+- {base}/search?keyword=&limit=                      -> {"data": [股票]}
+
+所有请求共用一个requests.Session，连接池复用keep-alive连接；
+连接/读取分别设置超时，对连接错误、读取超时和429/5xx响应按指数退避重试。
+每次调用（含全部重试和退避等待）不超过deadline：每次尝试的超时按剩余时间缩短，
+剩余时间不够退避等待时不再重试，调用方和等待合并请求的调用者据此确定最长阻塞时间。
+requests.Session在多线程下只做GET请求是安全的，连接池大小决定最大并发连接数。
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.providers.base import MarketDataProvider, ProviderError
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+# 需要重试的响应状态码
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class HttpProvider(MarketDataProvider):
+    """HTTP行情数据源"""
+
+    name = 'http'
+
+    def __init__(self, base_url: str, api_key: str = '',
+                 timeout: Tuple[float, float] = (3.0, 10.0),
+                 retries: int = 3, backoff_factor: float = 0.2,
+                 pool_size: int = 10, batch_size: int = 200, deadline: float = 10.0):
+        """
+        初始化HTTP数据源
+
+        Args:
+            base_url: 接口根地址
+            api_key: API密钥，通过X-API-Key请求头发送
+            timeout: (连接超时, 读取超时)秒
+            retries: 最大重试次数
+            backoff_factor: 退避系数，第n次重试前等待 backoff_factor * 2^(n-1) 秒
+            pool_size: 连接池大小
+            batch_size: 批量行情每次请求的最大股票数
+            deadline: 每次调用的总时限(秒)，包括全部重试和退避等待
+        """
+        if not base_url:
+            raise ValueError("HTTP行情数据源需要配置STOCK_API_URL")
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.backoff_factor = backoff_factor
+        self.batch_size = max(1, batch_size)
+        self.deadline = deadline
+
+        # 重试在_get中进行，适配器的重试无法限制总时长（每次重试都使用完整的超时）
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=0, pool_block=True)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Accept': 'application/json'})
+        if api_key:
+            self.session.headers['X-API-Key'] = api_key
+
+    def _get(self, path: str, params: Optional[Dict[str, Any]] = None,
+             allow_not_found: bool = False) -> Any:
+        """
+        发送GET请求并解析JSON
+
+        Args:
+            path: 接口路径
+            params: 查询参数
+            allow_not_found: 为True时404返回None
+
+        Returns:
+            解析后的JSON
+
+        Raises:
+            ProviderError: 请求失败、重试耗尽、超过总时限或响应不是JSON
+        """
+        url = f"{self.base_url}{path}"
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ProviderError(f"请求行情接口超过总时限 {path}: {self.deadline}秒")
+            timeout = (min(self.timeout[0], remaining), min(self.timeout[1], remaining))
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response, error = None, e
+            except requests.RequestException as e:
+                raise ProviderError(f"请求行情接口失败 {path}: {str(e)}") from e
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    break
+                error = None
+
+            attempt += 1
+            wait = self._retry_wait(attempt, response)
+            if attempt > self.retries or time.monotonic() + wait >= deadline:
+                if error is not None:
+                    raise ProviderError(f"请求行情接口失败 {path}: {str(error)}") from error
+                break
+            logger.debug(f"重试行情接口 {path}（第{attempt}次），等待{wait:.2f}秒")
+            time.sleep(wait)
+
+        if allow_not_found and response.status_code == 404:
+            return None
+        if response.status_code >= 400:
+            raise ProviderError(f"行情接口返回错误 {path}: HTTP {response.status_code}")
+        try:
+            return response.json()
+        except ValueError as e:
+            raise ProviderError(f"行情接口响应格式错误 {path}: {str(e)}") from e
+
+    def _retry_wait(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """
+        计算第attempt次重试前的等待时间
+
+        Args:
+            attempt: 重试序号，从1开始
+            response: 需要重试的响应，连接错误时为None
+
+        Returns:
+            float: 等待秒数，响应带有Retry-After（秒数）时不少于该值
+        """
+        wait = self.backoff_factor * (2 ** (attempt - 1))
+        if response is not None:
+            try:
+                wait = max(wait, float(response.headers.get('Retry-After') or 0))
+            except ValueError:
+                pass
+        return wait
+
+    def get_stock_info(self, stock_code: str) -> Dict[str, Any]:
+        """获取股票基本信息"""
+        return self._get(f"/stocks/{quote(stock_code, safe='')}", allow_not_found=True) or {}
+
+    def get_quotes(self, stock_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量获取实时行情，超过batch_size时分多次请求"""
+        codes = list(dict.fromkeys(stock_codes))
+        result = {}
+        for offset in range(0, len(codes), self.batch_size):
+            chunk = codes[offset:offset + self.batch_size]
+            payload = self._get('/quotes', {'codes': ','.join(chunk)})
+            result.update((payload or {}).get('data') or {})
+        return result
+
+    def get_kline(self, stock_code: str, period: str = 'daily',
+                  start_date: Optional[str] = None,
+                  end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取K线数据"""
+        params = {'period': period}
+        if start_date:
+            params['start_date'] = start_date
+        if end_date:
+            params['end_date'] = end_date
+        payload = self._get(f"/kline/{quote(stock_code, safe='')}", params, allow_not_found=True)
+        return (payload or {}).get('data') or []
+
+    def search(self, keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """搜索股票"""
+        payload = self._get('/search', {'keyword': keyword, 'limit': limit})
+        return (payload or {}).get('data') or []
+
+    def close(self) -> None:
+        """关闭连接池"""
+        self.session.close()
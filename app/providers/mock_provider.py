@@ -0,0 +1,151 @@
+"""
+股票系统 - 模拟行情数据源
+
+没有配置行情API时使用，生成随机但结构完整的数据；也是本地桩HTTP服务的数据来源。
+"""
+import random
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.providers.base import MarketDataProvider
+from app.utils.market_session import last_session_date
+from app.utils.trading_calendar import get_calendar
+
+# 模拟常见股票数据
+MOCK_STOCKS = {
+    '600000': {'name': '浦发银行', 'market': 'SH', 'industry': '银行', 'full_name': '上海浦东发展银行股份有限公司'},
+    '601398': {'name': '工商银行', 'market': 'SH', 'industry': '银行', 'full_name': '中国工商银行股份有限公司'},
+    '000001': {'name': '平安银行', 'market': 'SZ', 'industry': '银行', 'full_name': '平安银行股份有限公司'},
+    '601288': {'name': '农业银行', 'market': 'SH', 'industry': '银行', 'full_name': '中国农业银行股份有限公司'},
+    '601988': {'name': '中国银行', 'market': 'SH', 'industry': '银行', 'full_name': '中国银行股份有限公司'},
+    '600519': {'name': '贵州茅台', 'market': 'SH', 'industry': '白酒', 'full_name': '贵州茅台酒股份有限公司'},
+    '000858': {'name': '五粮液', 'market': 'SZ', 'industry': '白酒', 'full_name': '宜宾五粮液股份有限公司'},
+    '601318': {'name': '中国平安', 'market': 'SH', 'industry': '保险', 'full_name': '中国平安保险(集团)股份有限公司'},
+    '600036': {'name': '招商银行', 'market': 'SH', 'industry': '银行', 'full_name': '招商银行股份有限公司'},
+    '000651': {'name': '格力电器', 'market': 'SZ', 'industry': '家电', 'full_name': '珠海格力电器股份有限公司'},
+    '600887': {'name': '伊利股份', 'market': 'SH', 'industry': '食品饮料', 'full_name': '内蒙古伊利实业集团股份有限公司'},
+    '601857': {'name': '中国石油', 'market': 'SH', 'industry': '石油石化', 'full_name': '中国石油天然气股份有限公司'},
+}
+
+
+class MockProvider(MarketDataProvider):
+    """模拟行情数据源"""
+
+    name = 'mock'
+
+    def get_stock_info(self, stock_code: str) -> Dict[str, Any]:
+        """获取股票基本信息，未收录的代码返回默认信息"""
+        info = MOCK_STOCKS.get(stock_code)
+        if info:
+            return dict(info)
+        return {
+            'name': f'未知股票{stock_code}',
+            'market': '未知',
+            'industry': '未知',
+            'full_name': f'未知股票{stock_code}'
+        }
+
+    def get_quotes(self, stock_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量获取实时行情"""
+        return {code: self._make_quote(code) for code in stock_codes}
+
+    @staticmethod
+    def _make_quote(stock_code: str) -> Dict[str, Any]:
+        """生成一只股票的实时行情"""
+        # 随机生成一个合理的价格
+        base_price = 10.0 + (hash(stock_code) % 1000) / 10.0
+        price = round(base_price * (1 + random.uniform(-0.05, 0.05)), 2)
+
+        # 基于价格生成其他数据
+        open_price = round(price * (1 + random.uniform(-0.02, 0.02)), 2)
+        high_price = round(max(open_price, price) * (1 + random.uniform(0, 0.02)), 2)
+        low_price = round(min(open_price, price) * (1 - random.uniform(0, 0.02)), 2)
+
+        # 生成涨跌幅
+        prev_close = round(price / (1 + random.uniform(-0.05, 0.05)), 2)
+        change = round(price - prev_close, 2)
+        change_percent = round(change / prev_close * 100, 2)
+
+        # 生成成交量和成交额
+        volume = random.randint(10000, 10000000)
+        turnover = round(volume * price / 100, 2)
+
+        # 行情日期为已开盘的最近交易日（开盘前和非交易日取上一交易日）
+        today = last_session_date(None)
+
+        return {
+            'stock_code': stock_code,
+            'date': today.strftime('%Y-%m-%d'),
+            'price': price,
+            'open': open_price,
+            'high': high_price,
+            'low': low_price,
+            'prev_close': prev_close,
+            'change': change,
+            'change_percent': change_percent,
+            'volume': volume,
+            'turnover': turnover
+        }
+
+    def get_kline(self, stock_code: str, period: str = 'daily',
+                  start_date: Optional[str] = None,
+                  end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取K线数据，只生成交易日的日K线"""
+        calendar = get_calendar(None)
+
+        # 解析日期，截止日期调整到最近的交易日
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else last_session_date(None)
+        end_dt = calendar.session_on_or_before(end_dt)
+
+        if start_date:
+            start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
+        else:
+            # 默认获取30个交易日的数据
+            start_dt = calendar.sessions_back(end_dt, 30)
+
+        # 基于股票代码生成一个基础价格
+        base_price = 10.0 + (hash(stock_code) % 1000) / 10.0
+        current_price = base_price
+
+        result = []
+        for current_dt in calendar.sessions_between(start_dt, end_dt):
+            # 随机生成涨跌幅
+            change_percent = random.uniform(-2.0, 2.0)
+            close_price = round(current_price * (1 + change_percent / 100), 2)
+
+            # 生成开盘价、最高价和最低价
+            open_price = round(current_price * (1 + random.uniform(-1.0, 1.0) / 100), 2)
+            high_price = round(max(open_price, close_price) * (1 + random.uniform(0, 1.0) / 100), 2)
+            low_price = round(min(open_price, close_price) * (1 - random.uniform(0, 1.0) / 100), 2)
+
+            # 生成成交量和成交额
+            volume = random.randint(5000000, 50000000)
+            turnover = round(volume * (open_price + close_price) / 2 / 10000, 2)
+
+            # 计算涨跌额
+            change = round(close_price - current_price, 2)
+
+            result.append({
+                'date': current_dt.strftime('%Y-%m-%d'),
+                'open': open_price,
+                'close': close_price,
+                'high': high_price,
+                'low': low_price,
+                'volume': volume,
+                'turnover': turnover,
+                'change': change,
+                'change_percent': round(change_percent, 2)
+            })
+
+            current_price = close_price
+
+        return result
+
+    def search(self, keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """在模拟股票中按代码或名称搜索"""
+        keyword = keyword.lower()
+        return [
+            {'code': code, 'name': info['name'], 'market': info['market']}
+            for code, info in MOCK_STOCKS.items()
+            if keyword in code.lower() or keyword in info['name'].lower()
+        ][:limit]
@@ -0,0 +1,165 @@
+"""
+股票系统 - 本地桩行情HTTP服务
+
+按HttpProvider的接口约定提供数据（数据来自MockProvider），用于测试和基准测试中
+测量真实的HTTP往返开销和并发表现。可注入固定延迟和按比例返回503以验证超时和重试。
+
+运行方式:
+    python -m app.providers.stub_server --port 8765 --latency 0.02
+
+代码中使用:
+    with StubServer(latency=0.01) as server:
+        provider = HttpProvider(server.url)
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from app.providers.mock_provider import MockProvider
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """桩服务请求处理"""
+
+    # 支持keep-alive
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写出，keep-alive连接上需关闭Nagle算法，
+    # 否则每个请求都要等待客户端的延迟确认
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """不输出访问日志"""
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        """处理GET请求"""
+        server: 'StubServer' = self.server.stub
+        server.record_request()
+
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            self._send_json(503, {'error': 'injected failure'})
+            return
+        if server.api_key and self.headers.get('X-API-Key') != server.api_key:
+            self._send_json(401, {'error': 'invalid api key'})
+            return
+
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+        provider = server.provider
+
+        if parts == ['quotes']:
+            codes = [code for code in params.get('codes', '').split(',') if code]
+            self._send_json(200, {'data': provider.get_quotes(codes)})
+        elif parts == ['search']:
+            limit = int(params.get('limit', 10))
+            self._send_json(200, {'data': provider.search(params.get('keyword', ''), limit)})
+        elif len(parts) == 2 and parts[0] == 'stocks':
+            self._send_json(200, provider.get_stock_info(parts[1]))
+        elif len(parts) == 2 and parts[0] == 'kline':
+            self._send_json(200, {'data': provider.get_kline(
+                parts[1], params.get('period', 'daily'),
+                params.get('start_date'), params.get('end_date')
+            )})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+
+class StubServer:
+    """在后台线程运行的本地桩行情服务"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 error_rate: float = 0.0, api_key: str = ''):
+        """
+        初始化桩服务
+
+        Args:
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            latency: 每个请求的固定延迟(秒)
+            error_rate: 返回503的比例(0-1)
+            api_key: 非空时校验X-API-Key请求头
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.api_key = api_key
+        self.provider = MockProvider()
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """服务根地址"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_request(self) -> None:
+        """记录一次请求"""
+        with self._count_lock:
+            self.request_count += 1
+
+    def start(self) -> 'StubServer':
+        """在后台线程启动服务"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """在当前线程运行服务，直到被中断"""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        """停止服务"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'StubServer':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def main() -> None:
+    """以前台方式运行桩服务"""
+    parser = argparse.ArgumentParser(description='本地桩行情HTTP服务')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的固定延迟(秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回503的比例(0-1)')
+    parser.add_argument('--api-key', default='', help='需要校验的API密钥')
+    args = parser.parse_args()
+
+    server = StubServer(args.host, args.port, args.latency, args.error_rate, args.api_key)
+    print(f"桩行情服务运行于 {server.url}，Ctrl+C退出")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
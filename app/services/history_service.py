@@ -0,0 +1,104 @@
+"""
+股票系统 - K线历史数据服务
+
+日K线的读取入口。开启HISTORY_STORE_ENABLED时从列式内存映射存储读取，
+首次读取某只股票时从数据库构建，之后由行情写入路径和其他机器的行情失效事件增量同步；
+未开启时直接按列查询数据库。
+"""
+import logging
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+
+from app import db
+from app.models.stock import StockQuote
+from app.utils.history_store import HistoryStore, COLUMNS
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+# 日K线历史存储，存储目录在create_app中根据配置设置
+history_store = HistoryStore()
+
+# 与history_store.COLUMNS对应的数据库列
+_QUOTE_COLUMNS = (
+    StockQuote.date, StockQuote.open_price, StockQuote.high_price, StockQuote.low_price,
+    StockQuote.close_price, StockQuote.volume, StockQuote.turnover, StockQuote.change,
+    StockQuote.change_percent
+)
+
+
+def query_daily_arrays(stock_id: int, start_dt: Optional[date] = None,
+                       end_dt: Optional[date] = None) -> Dict[str, np.ndarray]:
+    """
+    从数据库按列读取日K线，缺失值转换为NaN
+
+    Args:
+        stock_id: 股票ID
+        start_dt: 开始日期（含），为空表示不限
+        end_dt: 结束日期（含），为空表示不限
+
+    Returns:
+        Dict[str, np.ndarray]: 各列数组，date为datetime64[D]
+    """
+    query = db.session.query(*_QUOTE_COLUMNS).filter(StockQuote.stock_id == stock_id)
+    if start_dt:
+        query = query.filter(StockQuote.date >= start_dt)
+    if end_dt:
+        query = query.filter(StockQuote.date <= end_dt)
+    rows = query.order_by(StockQuote.date).all()
+
+    columns = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+    daily = {'date': np.array(columns[0], dtype='datetime64[D]')}
+    for name, values in zip(COLUMNS[1:], columns[1:]):
+        daily[name] = np.array(values, dtype=float)
+    return daily
+
+
+def load_daily_arrays(stock_id: int, start_dt: Optional[date] = None,
+                      end_dt: Optional[date] = None) -> Dict[str, np.ndarray]:
+    """
+    读取日K线列数组
+
+    启用历史存储时返回内存映射的只读切片，调用方不能修改返回的数组。
+
+    Args:
+        stock_id: 股票ID
+        start_dt: 开始日期（含），为空表示不限
+        end_dt: 结束日期（含），为空表示不限
+
+    Returns:
+        Dict[str, np.ndarray]: 各列数组，date为datetime64[D]
+    """
+    if not history_store.enabled:
+        return query_daily_arrays(stock_id, start_dt, end_dt)
+
+    daily = history_store.read(stock_id, start_dt, end_dt)
+    if daily is None:
+        # 持有与合并写入相同的锁后再读取数据库，避免覆盖并发合并的K线
+        with history_store.lock(stock_id):
+            if history_store.load(stock_id) is None:
+                history_store.write(stock_id, query_daily_arrays(stock_id))
+        daily = history_store.read(stock_id, start_dt, end_dt)
+    return daily
+
+
+def sync_daily_history(stock_id: int, start_dt: date, end_dt: Optional[date] = None) -> None:
+    """
+    行情写入数据库并提交后，将[start_dt, end_dt]区间的数据同步到历史存储
+
+    同步失败时删除该股票的存储文件，下次读取时从数据库重新构建。
+
+    Args:
+        stock_id: 股票ID
+        start_dt: 写入的最早日期
+        end_dt: 写入的最晚日期，为空表示不限
+    """
+    if not history_store.enabled:
+        return
+    try:
+        history_store.merge(stock_id, query_daily_arrays(stock_id, start_dt, end_dt))
+    except Exception as e:
+        logger.warning(f"同步K线历史存储失败: {str(e)}")
+        history_store.remove(stock_id)
@@ -0,0 +1,594 @@
+"""
+股票系统 - 技术指标服务
+
+使用NumPy对K线的收盘价、最高价、最低价序列向量化计算MA/EMA/MACD/RSI/KDJ/BOLL，
+计算公式与通达信、同花顺等行情软件保持一致。
+
+每个指标的递推状态（EMA值、滚动窗口等）和最近一段指标值保存在stock_indicator_states表中，
+追加新K线时只需从状态逐根递推，每根K线的计算量与历史长度无关。
+"""
+import logging
+import math
+import re
+from bisect import bisect_left
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models.stock import Stock, StockIndicatorState
+from app.services.history_service import load_daily_arrays
+from app.services.resample_service import get_resampled_series, period_start
+from app.utils.upsert import bulk_upsert
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+# 默认保存的最近指标值数量
+DEFAULT_INDICATOR_HISTORY = 500
+
+# 指标参数上限，防止请求过大的窗口
+MAX_INDICATOR_PARAM = 250
+
+# 分块计算EMA时w的负幂次上限（10的指数）
+_EMA_MAX_EXPONENT = 100
+
+
+def ema_filter(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """
+    向量化计算指数平滑 y[t] = y[t-1] + alpha * (x[t] - y[t-1])，y[-1] = initial
+
+    展开为 y[t] = w^(t+1) * (initial + alpha * Σ x[i] / w^(i+1))，其中w = 1 - alpha，
+    按块计算以避免w的负幂次溢出。
+
+    Args:
+        values: 输入序列
+        alpha: 平滑系数，0 < alpha <= 1
+        initial: 第一个值之前的平滑值
+
+    Returns:
+        np.ndarray: 平滑结果
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.empty(len(values))
+    decay = 1.0 - alpha
+    if decay <= 0:
+        result[:] = values
+        return result
+
+    block = max(int(_EMA_MAX_EXPONENT / -math.log10(decay)), 1)
+    prev = initial
+    for offset in range(0, len(values), block):
+        chunk = values[offset:offset + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        result[offset:offset + len(chunk)] = powers * (prev + alpha * np.cumsum(chunk / powers))
+        prev = result[offset + len(chunk) - 1]
+    return result
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """滚动均值，不足window个值的位置为NaN"""
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        sums = np.cumsum(np.r_[0.0, values])
+        result[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return result
+
+
+def rolling_extreme(values: np.ndarray, window: int, func) -> np.ndarray:
+    """滚动极值，前window-1个位置使用已有的值"""
+    if len(values) == 0:
+        return np.array([], dtype=float)
+    fill = -np.inf if func is np.max else np.inf
+    padded = np.r_[np.full(window - 1, fill), values]
+    return func(np.lib.stride_tricks.sliding_window_view(padded, window), axis=1)
+
+
+def _tail(values: np.ndarray, index: int, window: int) -> List[float]:
+    """截至index（含）最近window个值"""
+    return values[max(index - window + 1, 0):index + 1].tolist()
+
+
+def _float(value: float) -> Optional[float]:
+    """将NaN转换为None，便于JSON序列化"""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+class Indicator:
+    """
+    技术指标基类
+
+    子类需实现compute（向量化计算整个序列）、state_at（从计算结果提取某根K线之后的递推状态）
+    和step（从递推状态计算下一根K线）。
+    """
+
+    kind = ''
+    defaults: Tuple[int, ...] = ()
+    lines: Tuple[str, ...] = ()
+
+    def __init__(self, *params: int):
+        """
+        初始化指标
+
+        Args:
+            params: 指标参数，未提供的使用默认值
+        """
+        self.params = tuple(params) + self.defaults[len(params):]
+        self.name = self.kind + '_'.join(str(p) for p in self.params)
+
+    def compute(self, bars: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """向量化计算整个序列，返回所有输出线及递推所需的中间序列"""
+        raise NotImplementedError
+
+    def state_at(self, bars: Dict[str, np.ndarray], values: Dict[str, np.ndarray],
+                 index: int) -> Dict[str, Any]:
+        """提取第index根K线之后的递推状态"""
+        raise NotImplementedError
+
+    def step(self, state: Optional[Dict[str, Any]],
+             bar: Dict[str, float]) -> Tuple[Dict[str, float], Dict[str, Any]]:
+        """从递推状态计算下一根K线的指标值，返回(指标值, 新状态)"""
+        raise NotImplementedError
+
+
+class MovingAverage(Indicator):
+    """简单移动平均 MA(N)"""
+
+    kind = 'ma'
+    defaults = (5,)
+    lines = ('ma',)
+
+    def compute(self, bars):
+        return {'ma': rolling_mean(bars['close'], self.params[0])}
+
+    def state_at(self, bars, values, index):
+        return {'window': _tail(bars['close'], index, self.params[0])}
+
+    def step(self, state, bar):
+        n = self.params[0]
+        window = ((state or {}).get('window', []) + [bar['close']])[-n:]
+        ma = sum(window) / n if len(window) == n else math.nan
+        return {'ma': ma}, {'window': window}
+
+
+class ExponentialMovingAverage(Indicator):
+    """指数移动平均 EMA(N)，首根K线取收盘价"""
+
+    kind = 'ema'
+    defaults = (12,)
+    lines = ('ema',)
+
+    @property
+    def alpha(self) -> float:
+        return 2 / (self.params[0] + 1)
+
+    def compute(self, bars):
+        close = bars['close']
+        return {'ema': ema_filter(close, self.alpha, close[0] if len(close) else 0)}
+
+    def state_at(self, bars, values, index):
+        return {'ema': float(values['ema'][index])}
+
+    def step(self, state, bar):
+        close = bar['close']
+        ema = close if state is None else state['ema'] + self.alpha * (close - state['ema'])
+        return {'ema': ema}, {'ema': ema}
+
+
+class MACD(Indicator):
+    """
+    指数平滑异同移动平均 MACD(SHORT, LONG, M)
+
+    DIF = EMA(C, SHORT) - EMA(C, LONG)，DEA = EMA(DIF, M)，MACD = 2 * (DIF - DEA)
+    """
+
+    kind = 'macd'
+    defaults = (12, 26, 9)
+    lines = ('dif', 'dea', 'macd')
+
+    def _alphas(self) -> Tuple[float, float, float]:
+        return tuple(2 / (p + 1) for p in self.params)
+
+    def compute(self, bars):
+        close = bars['close']
+        fast_alpha, slow_alpha, signal_alpha = self._alphas()
+        first = close[0] if len(close) else 0
+        fast = ema_filter(close, fast_alpha, first)
+        slow = ema_filter(close, slow_alpha, first)
+        dif = fast - slow
+        dea = ema_filter(dif, signal_alpha, dif[0] if len(dif) else 0)
+        return {'dif': dif, 'dea': dea, 'macd': 2 * (dif - dea), 'fast': fast, 'slow': slow}
+
+    def state_at(self, bars, values, index):
+        return {name: float(values[name][index]) for name in ('fast', 'slow', 'dea')}
+
+    def step(self, state, bar):
+        close = bar['close']
+        fast_alpha, slow_alpha, signal_alpha = self._alphas()
+        if state is None:
+            fast = slow = close
+            dea = 0.0
+        else:
+            fast = state['fast'] + fast_alpha * (close - state['fast'])
+            slow = state['slow'] + slow_alpha * (close - state['slow'])
+            dea = state['dea'] + signal_alpha * (fast - slow - state['dea'])
+        dif = fast - slow
+        return ({'dif': dif, 'dea': dea, 'macd': 2 * (dif - dea)},
+                {'fast': fast, 'slow': slow, 'dea': dea})
+
+
+class RSI(Indicator):
+    """
+    相对强弱指标 RSI(N)
+
+    RSI = SMA(MAX(C - LC, 0), N, 1) / SMA(ABS(C - LC), N, 1) * 100，首根K线涨跌视为0
+    """
+
+    kind = 'rsi'
+    defaults = (14,)
+    lines = ('rsi',)
+
+    def compute(self, bars):
+        close = bars['close']
+        alpha = 1 / self.params[0]
+        diff = np.diff(close, prepend=close[:1])
+        gain = ema_filter(np.maximum(diff, 0), alpha, 0.0)
+        total = ema_filter(np.abs(diff), alpha, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(total > 0, gain / total * 100, np.nan)
+        return {'rsi': rsi, 'gain': gain, 'total': total}
+
+    def state_at(self, bars, values, index):
+        return {'close': float(bars['close'][index]),
+                'gain': float(values['gain'][index]),
+                'total': float(values['total'][index])}
+
+    def step(self, state, bar):
+        close = bar['close']
+        alpha = 1 / self.params[0]
+        state = state or {'close': close, 'gain': 0.0, 'total': 0.0}
+        diff = close - state['close']
+        gain = state['gain'] + alpha * (max(diff, 0) - state['gain'])
+        total = state['total'] + alpha * (abs(diff) - state['total'])
+        rsi = gain / total * 100 if total > 0 else math.nan
+        return {'rsi': rsi}, {'close': close, 'gain': gain, 'total': total}
+
+
+class KDJ(Indicator):
+    """
+    随机指标 KDJ(N, M1, M2)
+
+    RSV = (C - LLV(L, N)) / (HHV(H, N) - LLV(L, N)) * 100，最高价等于最低价时RSV取50；
+    K = SMA(RSV, M1, 1)，D = SMA(K, M2, 1)，初始值均为50，J = 3K - 2D
+    """
+
+    kind = 'kdj'
+    defaults = (9, 3, 3)
+    lines = ('k', 'd', 'j')
+
+    @staticmethod
+    def _rsv(close, highest, lowest):
+        spread = highest - lowest
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(spread > 0, (close - lowest) / spread * 100, 50.0)
+
+    def compute(self, bars):
+        n, m1, m2 = self.params
+        rsv = self._rsv(bars['close'], rolling_extreme(bars['high'], n, np.max),
+                        rolling_extreme(bars['low'], n, np.min))
+        k = ema_filter(rsv, 1 / m1, 50.0)
+        d = ema_filter(k, 1 / m2, 50.0)
+        return {'k': k, 'd': d, 'j': 3 * k - 2 * d}
+
+    def state_at(self, bars, values, index):
+        n = self.params[0]
+        return {'highs': _tail(bars['high'], index, n), 'lows': _tail(bars['low'], index, n),
+                'k': float(values['k'][index]), 'd': float(values['d'][index])}
+
+    def step(self, state, bar):
+        n, m1, m2 = self.params
+        state = state or {'highs': [], 'lows': [], 'k': 50.0, 'd': 50.0}
+        highs = (state['highs'] + [bar['high']])[-n:]
+        lows = (state['lows'] + [bar['low']])[-n:]
+        rsv = float(self._rsv(bar['close'], max(highs), min(lows)))
+        k = state['k'] + (rsv - state['k']) / m1
+        d = state['d'] + (k - state['d']) / m2
+        return {'k': k, 'd': d, 'j': 3 * k - 2 * d}, {'highs': highs, 'lows': lows, 'k': k, 'd': d}
+
+
+class Bollinger(Indicator):
+    """
+    布林线 BOLL(N, P)
+
+    MID = MA(C, N)，UPPER = MID + P * STD(C, N)，LOWER = MID - P * STD(C, N)（总体标准差）
+    """
+
+    kind = 'boll'
+    defaults = (20, 2)
+    lines = ('mid', 'upper', 'lower')
+
+    def compute(self, bars):
+        n, width = self.params
+        close = bars['close']
+        mid = rolling_mean(close, n)
+        std = np.full(len(close), np.nan)
+        if len(close) >= n:
+            std[n - 1:] = np.lib.stride_tricks.sliding_window_view(close, n).std(axis=1)
+        return {'mid': mid, 'upper': mid + width * std, 'lower': mid - width * std}
+
+    def state_at(self, bars, values, index):
+        return {'window': _tail(bars['close'], index, self.params[0])}
+
+    def step(self, state, bar):
+        n, width = self.params
+        window = ((state or {}).get('window', []) + [bar['close']])[-n:]
+        if len(window) < n:
+            return {'mid': math.nan, 'upper': math.nan, 'lower': math.nan}, {'window': window}
+        mid = sum(window) / n
+        std = math.sqrt(sum((x - mid) ** 2 for x in window) / n)
+        return ({'mid': mid, 'upper': mid + width * std, 'lower': mid - width * std},
+                {'window': window})
+
+
+INDICATORS = {cls.kind: cls for cls in
+              (MovingAverage, ExponentialMovingAverage, MACD, RSI, KDJ, Bollinger)}
+
+_SPEC_PATTERN = re.compile(r'^([a-z]+?)(\d+(?:_\d+)*)?$')
+
+
+def parse_indicator(spec: str) -> Indicator:
+    """
+    解析指标描述，如'ma5'、'ema12'、'macd'、'macd12_26_9'、'rsi14'、'kdj'、'boll20_2'
+
+    Args:
+        spec: 指标描述，省略的参数使用默认值
+
+    Returns:
+        Indicator: 指标实例
+
+    Raises:
+        ValueError: 无法识别的指标或参数
+    """
+    match = _SPEC_PATTERN.match(spec.strip().lower())
+    cls = INDICATORS.get(match.group(1)) if match else None
+    if cls is None:
+        raise ValueError(f"不支持的技术指标: {spec}")
+
+    params = [int(p) for p in match.group(2).split('_')] if match.group(2) else []
+    if len(params) > len(cls.defaults) or not all(0 < p <= MAX_INDICATOR_PARAM for p in params):
+        raise ValueError(f"技术指标参数无效: {spec}")
+    return cls(*params)
+
+
+def load_bars(stock_id: int, period: str, since: Optional[date] = None) -> Dict[str, np.ndarray]:
+    """
+    读取计算指标所需的K线列数组
+
+    Args:
+        stock_id: 股票ID
+        period: 周期
+        since: 只读取日期不早于since的K线，为空表示全部
+
+    Returns:
+        Dict[str, np.ndarray]: 包含date, open, high, low, close, volume的列数组
+    """
+    if period == 'daily':
+        return load_daily_arrays(stock_id, since)
+
+    series = get_resampled_series(stock_id, period)
+    bars = series.bars[bisect_left(series.dates, since):] if since else series.bars
+    result = {'date': np.array([d['date'] for d in bars], dtype='datetime64[D]')}
+    for name in ('open', 'high', 'low', 'close', 'volume'):
+        result[name] = np.array([d[name] for d in bars], dtype=float)
+    return result
+
+
+def _state_row(stock_id: int, period: str, indicator: Indicator,
+               dates: List[str], lines: Dict[str, list],
+               prev: Optional[Dict[str, Any]], state: Dict[str, Any]) -> Dict[str, Any]:
+    """生成保存递推状态和最近指标值的行字典，由save_indicator_states写入"""
+    history = current_app.config.get('INDICATOR_HISTORY_SIZE', DEFAULT_INDICATOR_HISTORY)
+    data = {
+        'prev': prev,
+        'state': state,
+        'dates': dates[-history:],
+        'lines': {name: values[-history:] for name, values in lines.items()}
+    }
+    now = datetime.utcnow()
+    return {
+        'stock_id': stock_id,
+        'period': period,
+        'name': indicator.name,
+        'last_date': datetime.strptime(dates[-1], '%Y-%m-%d').date(),
+        'state': data,
+        'created_at': now,
+        'updated_at': now
+    }
+
+
+def save_indicator_states(rows: List[Dict[str, Any]]) -> None:
+    """
+    写入指标状态（不提交事务）
+
+    使用UPSERT写入，两个请求同时首次计算同一指标时后写入的覆盖先写入的，不会违反唯一约束。
+
+    Args:
+        rows: _state_row生成的行字典
+    """
+    bulk_upsert(db.session, StockIndicatorState.__table__, rows,
+                index_elements=('stock_id', 'period', 'name'),
+                update_columns=('last_date', 'state', 'updated_at'))
+
+
+def _compute_full(stock_id: int, period: str, indicator: Indicator,
+                  row: Optional[StockIndicatorState],
+                  loader: Callable) -> Tuple[List[str], Dict[str, list], Optional[Dict[str, Any]]]:
+    """向量化计算全部K线的指标值，并重建递推状态"""
+    bars = loader(None)
+    count = len(bars['date'])
+    if not count:
+        return [], {name: [] for name in indicator.lines}, None
+
+    values = indicator.compute(bars)
+    dates = [d.strftime('%Y-%m-%d') for d in bars['date'].astype(object)]
+    lines = {name: [_float(v) for v in values[name]] for name in indicator.lines}
+    prev = indicator.state_at(bars, values, count - 2) if count > 1 else None
+    return dates, lines, _state_row(stock_id, period, indicator, dates, lines,
+                                    prev, indicator.state_at(bars, values, count - 1))
+
+
+def _advance(stock_id: int, period: str, indicator: Indicator,
+             row: StockIndicatorState,
+             loader: Callable) -> Optional[Tuple[List[str], Dict[str, list], Optional[Dict[str, Any]]]]:
+    """
+    从保存的状态递推：重新计算最后一根K线（可能被盘中行情或新的日K线修改），再追加之后的K线
+
+    Returns:
+        Optional[Tuple]: (日期列表, 指标值, 需要保存的状态行或None)，无法递推时返回None
+    """
+    bars = loader(row.last_date)
+    if not len(bars['date']):
+        return None
+
+    data = row.state
+    dates = data['dates'][:-1]
+    lines = {name: list(data['lines'][name][:-1]) for name in indicator.lines}
+    prev, state = None, data['prev']
+    columns = {name: bars[name].tolist() for name in ('open', 'high', 'low', 'close', 'volume')}
+    for i, day in enumerate(bars['date'].astype(object)):
+        bar = {name: column[i] for name, column in columns.items()}
+        values, new_state = indicator.step(state, bar)
+        prev, state = state, new_state
+        dates.append(day.strftime('%Y-%m-%d'))
+        for name in indicator.lines:
+            lines[name].append(_float(values[name]))
+
+    unchanged = (len(bars['date']) == 1 and dates == data['dates']
+                 and all(lines[name][-1] == data['lines'][name][-1] for name in indicator.lines))
+    if unchanged:
+        return dates, lines, None
+    return dates, lines, _state_row(stock_id, period, indicator, dates, lines, prev, state)
+
+
+def get_indicator_series(stock_id: int, period: str, indicator: Indicator,
+                         start_date: Optional[str] = None,
+                         row: Optional[StockIndicatorState] = None,
+                         loader: Optional[Callable] = None
+                         ) -> Tuple[List[str], Dict[str, list], Optional[Dict[str, Any]]]:
+    """
+    获取指标序列，优先从保存的状态增量计算
+
+    Args:
+        stock_id: 股票ID
+        period: 周期
+        indicator: 指标实例
+        start_date: 需要的最早K线日期（'YYYY-MM-DD'），早于保存的指标值时整体重新计算
+        row: 已加载的状态记录，为空时从数据库查询
+        loader: K线读取函数loader(since)，多个指标共用时可避免重复读取
+
+    Returns:
+        Tuple: (日期列表, 各输出线的指标值, 需要用save_indicator_states保存的状态行，无变化时为None)
+    """
+    loader = loader or (lambda since: load_bars(stock_id, period, since))
+    if row is None:
+        row = StockIndicatorState.query.filter_by(
+            stock_id=stock_id, period=period, name=indicator.name).first()
+
+    if row is not None:
+        result = _advance(stock_id, period, indicator, row, loader)
+        if result and result[0] and (start_date is None or result[0][0] <= start_date):
+            return result
+    return _compute_full(stock_id, period, indicator, row, loader)
+
+
+def calculate_kline_indicators(stock_code: str, period: str, kline: List[Dict[str, Any]],
+                               specs: List[str]) -> Dict[str, Any]:
+    """
+    计算与K线数据对齐的技术指标
+
+    Args:
+        stock_code: 股票代码
+        period: K线周期
+        kline: get_stock_k_line返回的K线数据
+        specs: 指标描述列表，如['ma5', 'macd', 'rsi14']
+
+    Returns:
+        Dict: 指标描述到指标值的映射；单线指标为列表，多线指标为{线名: 列表}，
+            列表与kline逐条对应
+
+    保存递推状态失败只记录日志，仍返回已计算的指标值，下次请求时重新保存。
+
+    Raises:
+        ValueError: 无法识别的指标
+    """
+    indicators = [(spec, parse_indicator(spec)) for spec in specs]
+    if not kline or not indicators:
+        return {}
+
+    stock = Stock.query.filter_by(code=stock_code).first()
+    if not stock:
+        return {}
+
+    rows = {
+        row.name: row for row in StockIndicatorState.query.filter(
+            StockIndicatorState.stock_id == stock.id,
+            StockIndicatorState.period == period,
+            StockIndicatorState.name.in_([ind.name for _, ind in indicators])
+        )
+    }
+
+    loader = lru_cache(maxsize=None)(lambda since: load_bars(stock.id, period, since))
+    wanted = [bar['date'] for bar in kline]
+    result = {}
+    states = {}
+    for spec, indicator in indicators:
+        dates, lines, state = get_indicator_series(stock.id, period, indicator, wanted[0],
+                                                   rows.get(indicator.name), loader)
+        if state is not None:
+            states[indicator.name] = state
+        index = {day: i for i, day in enumerate(dates)}
+        aligned = {
+            name: [values[index[day]] if day in index else None for day in wanted]
+            for name, values in lines.items()
+        }
+        result[spec] = aligned[indicator.lines[0]] if len(indicator.lines) == 1 else aligned
+
+    if states:
+        try:
+            save_indicator_states(list(states.values()))
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.warning(f"保存技术指标状态失败: {str(e)}")
+    return result
+
+
+def expire_indicator_states(stock_id: int, earliest: date) -> int:
+    """
+    行情写入后删除无法增量更新的指标状态（不提交事务）
+
+    写入日期早于状态的最后一根K线（周期K线为其所在周期的第一天）时，
+    之前的指标值可能已变化，需要整体重新计算。
+
+    Args:
+        stock_id: 股票ID
+        earliest: 写入的最早行情日期
+
+    Returns:
+        int: 删除的状态数
+    """
+    expired = 0
+    for row in StockIndicatorState.query.filter(
+        StockIndicatorState.stock_id == stock_id,
+        StockIndicatorState.last_date > earliest
+    ):
+        boundary = row.last_date if row.period == 'daily' else period_start(row.last_date, row.period)
+        if earliest < boundary:
+            db.session.delete(row)
+            expired += 1
+    return expired
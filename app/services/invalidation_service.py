@@ -0,0 +1,278 @@
+"""
+股票系统 - 跨进程缓存失效服务
+
+某个worker进程修改数据后，通过缓存失效总线把带类型的失效事件广播给其他进程，
+其他进程收到后调用各自注册的处理函数，使进程内缓存（行情缓存、周期K线缓存、
+股票代码注册表、推送等）及时失效，而不必依赖较短的过期时间。
+
+事件类型:
+- quote: 股票行情写入，项为 {'code', 'stock_id', 'since', 'host', 'fields'(可选，用于推送)}，
+  host为写入行情的机器，其他机器据此同步各自的K线历史存储
+- symbol: 股票基本信息改动，项为 {'code'}
+- portfolio: 用户的投资组合、持仓或交易记录改动，项为 {'user_id'}
+- watchlist: 用户的观察列表改动，项为 {'user_id'}
+
+quote和symbol事件由写入数据的代码在本进程处理完之后广播；portfolio和watchlist事件
+通过会话事件在事务提交后自动产生（如execute_buy、add_stock_to_watchlist），同时在
+本进程和其他进程分发，按用户缓存的数据可以据此使用较长的过期时间。每个进程发出的消息带有递增序号，
+接收方发现某个进程的序号不连续（总线丢弃了消息）时，调用add_reset_handler注册的
+处理函数清空全部进程内缓存，保证缓存可以使用较长的过期时间。
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db, socketio
+from app.bus import get_bus
+from app.models.portfolio import Portfolio, PortfolioHolding
+from app.models.transaction import Transaction
+from app.models.watchlist import WatchList, WatchListStock
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+# 事件类型
+QUOTE = 'quote'
+SYMBOL = 'symbol'
+PORTFOLIO = 'portfolio'
+WATCHLIST = 'watchlist'
+EVENT_KINDS = (QUOTE, SYMBOL, PORTFOLIO, WATCHLIST)
+
+# 本机和本进程的标识，收到自己发出的消息时忽略
+HOST = socket.gethostname()
+ORIGIN = f'{HOST}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+# 每条消息最多包含的项数，超过时拆成多条
+MAX_ITEMS_PER_MESSAGE = 200
+
+# 处理函数，参数为事件的项列表
+InvalidationHandler = Callable[[List[Dict[str, Any]]], None]
+_handlers: Dict[str, List[InvalidationHandler]] = defaultdict(list)
+
+# 发现消息丢失时调用的处理函数，清空全部进程内缓存
+ResetHandler = Callable[[], None]
+_reset_handlers: List[ResetHandler] = []
+
+# 本进程发出消息的序号，取号和发送在同一把锁内，保证按序号顺序发出
+_sequence = itertools.count(1)
+_publish_lock = threading.Lock()
+
+# 各进程最近收到的消息序号
+_last_seq: Dict[str, int] = {}
+
+# 发现消息丢失的次数
+missed = 0
+
+# session.info中暂存待广播的用户ID的键
+_PENDING_KEY = 'invalidation_pending'
+
+
+def add_invalidation_handler(kind: str, handler: InvalidationHandler) -> None:
+    """
+    注册失效事件的处理函数
+
+    Args:
+        kind: 事件类型，见EVENT_KINDS
+        handler: 处理函数，参数为事件的项列表
+    """
+    if kind not in EVENT_KINDS:
+        raise ValueError(f"未知的失效事件类型: {kind}")
+    _handlers[kind].append(handler)
+
+
+def add_reset_handler(handler: ResetHandler) -> None:
+    """
+    注册发现消息丢失时调用的处理函数
+
+    Args:
+        handler: 处理函数，应清空对应的进程内缓存
+    """
+    _reset_handlers.append(handler)
+
+
+def _dispatch(kind: str, items: List[Dict[str, Any]]) -> None:
+    """调用本进程的处理函数，单个处理函数失败不影响其他处理函数"""
+    for handler in _handlers.get(kind, ()):
+        try:
+            handler(items)
+        except Exception as e:
+            logger.warning(f"失效事件处理失败 {kind}: {str(e)}")
+
+
+def _reset() -> None:
+    """清空全部进程内缓存，单个处理函数失败不影响其他处理函数"""
+    for handler in _reset_handlers:
+        try:
+            handler()
+        except Exception as e:
+            logger.warning(f"清空缓存失败: {str(e)}")
+
+
+def broadcast(kind: str, items: List[Dict[str, Any]], local: bool = False) -> None:
+    """
+    广播失效事件，发送失败只记录日志
+
+    Args:
+        kind: 事件类型，见EVENT_KINDS
+        items: 事件的项
+        local: 是否同时调用本进程的处理函数
+    """
+    if not items:
+        return
+    if local:
+        _dispatch(kind, items)
+
+    bus = get_bus()
+    pending = [items[i:i + MAX_ITEMS_PER_MESSAGE] for i in range(0, len(items), MAX_ITEMS_PER_MESSAGE)]
+    while pending:
+        chunk = pending.pop()
+        if len(chunk) > 1 and len(_encode(kind, chunk, 0)) > bus.max_message_size:
+            middle = len(chunk) // 2
+            pending.extend((chunk[:middle], chunk[middle:]))
+            continue
+        with _publish_lock:
+            try:
+                bus.publish(_encode(kind, chunk, next(_sequence)))
+            except Exception as e:
+                # 序号已占用，接收方会发现丢失并清空缓存
+                logger.warning(f"广播失效事件失败 {kind}: {str(e)}")
+
+
+def _encode(kind: str, items: List[Dict[str, Any]], seq: int) -> bytes:
+    """编码总线消息"""
+    return json.dumps({'origin': ORIGIN, 'seq': seq, 'kind': kind, 'items': items},
+                      ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def handle_message(message: bytes) -> None:
+    """
+    处理从总线收到的消息，忽略本进程发出的消息
+
+    发送方的序号不连续时说明中间的消息已丢失，先清空全部进程内缓存再处理本条消息。
+
+    Args:
+        message: broadcast编码的消息
+    """
+    global missed
+    try:
+        payload = json.loads(message.decode('utf-8'))
+    except ValueError:
+        logger.warning("无法解析的失效事件消息")
+        _reset()
+        return
+    origin = payload.get('origin')
+    if origin == ORIGIN:
+        return
+    seq = payload.get('seq')
+    last = _last_seq.get(origin)
+    if last is not None and seq != last + 1:
+        missed += 1
+        logger.warning(f"来自 {origin} 的失效事件序号不连续({last} -> {seq})，清空进程内缓存")
+        _reset()
+    _last_seq[origin] = seq
+    _dispatch(payload.get('kind'), payload.get('items') or [])
+
+
+class InvalidationListener:
+    """接收其他进程失效事件的后台任务"""
+
+    def __init__(self):
+        """初始化，未启动"""
+        self.app = None
+        self._running = False
+        self.received = 0
+
+    def start(self, app) -> None:
+        """启动后台任务（重复调用无效）"""
+        if self._running:
+            return
+        self.app = app
+        self._running = True
+        # 使用SocketIO的后台任务，在eventlet下为绿色线程
+        socketio.start_background_task(self._loop)
+        # 退出时关闭总线，删除本进程的套接字文件
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """停止后台任务"""
+        self._running = False
+        get_bus().close()
+
+    def _loop(self) -> None:
+        """后台循环，总线的listen在关闭前不会返回"""
+        try:
+            get_bus().listen(self._on_message)
+        except Exception as e:
+            logger.warning(f"缓存失效总线停止接收: {str(e)}")
+        finally:
+            self._running = False
+
+    def _on_message(self, message: bytes) -> None:
+        """在应用上下文中处理消息（处理函数可能需要查询数据库）"""
+        self.received += 1
+        with self.app.app_context():
+            try:
+                handle_message(message)
+            finally:
+                db.session.remove()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取运行统计信息"""
+        return {'running': self._running, 'received': self.received, 'missed': missed,
+                **get_bus().stats()}
+
+
+# 失效事件接收任务，在create_app中根据配置启动
+invalidation_listener = InvalidationListener()
+
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_user_changes(session, flush_context) -> None:
+    """记录本次flush中改动了投资组合或观察列表的用户，提交后再广播"""
+    portfolio_users: Set[int] = set()
+    watchlist_users: Set[int] = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, (Portfolio, Transaction)):
+            portfolio_users.add(obj.user_id)
+        elif isinstance(obj, PortfolioHolding):
+            # 持仓所属的组合通常已在会话中，不在时按主键查询
+            portfolio = session.get(Portfolio, obj.portfolio_id)
+            if portfolio is not None:
+                portfolio_users.add(portfolio.user_id)
+        elif isinstance(obj, WatchList):
+            watchlist_users.add(obj.user_id)
+        elif isinstance(obj, WatchListStock):
+            watchlist = session.get(WatchList, obj.watchlist_id)
+            if watchlist is not None:
+                watchlist_users.add(watchlist.user_id)
+
+    if portfolio_users or watchlist_users:
+        pending = session.info.setdefault(_PENDING_KEY, {PORTFOLIO: set(), WATCHLIST: set()})
+        pending[PORTFOLIO].update(user_id for user_id in portfolio_users if user_id is not None)
+        pending[WATCHLIST].update(user_id for user_id in watchlist_users if user_id is not None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _broadcast_user_changes(session) -> None:
+    """事务提交后在本进程和其他进程分发用户数据的失效事件"""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        for kind, user_ids in pending.items():
+            broadcast(kind, [{'user_id': user_id} for user_id in sorted(user_ids)], local=True)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session) -> None:
+    """事务回滚时丢弃未提交的改动"""
+    session.info.pop(_PENDING_KEY, None)
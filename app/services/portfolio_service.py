@@ -8,7 +8,8 @@ from datetime import datetime
 from app import db
 from app.models.portfolio import Portfolio, PortfolioHolding
 from app.models.transaction import Transaction, TransactionType
-from app.services.stock_service import get_stock_data
+from app.services.stock_service import resolve_symbol
+from app.services.valuation_service import value_portfolio, value_portfolios
 
 # 日志配置
 logger = logging.getLogger(__name__)
@@ -26,19 +27,21 @@ def get_user_portfolios(user_id: int) -> List[Dict[str, Any]]:
     """
     try:
         portfolios = Portfolio.query.filter_by(user_id=user_id).all()
+        valuations = value_portfolios(portfolios)
         
         result = []
         for portfolio in portfolios:
+            valuation = valuations[portfolio.id]
             portfolio_data = {
                 'id': portfolio.id,
                 'name': portfolio.name,
                 'description': portfolio.description,
                 'is_default': portfolio.is_default,
-                'total_value': portfolio.get_total_value(),
-                'total_cost': portfolio.get_total_cost(),
-                'total_profit': portfolio.get_total_profit(),
-                'profit_percentage': portfolio.get_profit_percentage(),
-                'holdings_count': portfolio.holdings.count(),
+                'total_value': valuation.total_value,
+                'total_cost': valuation.total_cost,
+                'total_profit': valuation.total_profit,
+                'profit_percentage': valuation.profit_percentage,
+                'holdings_count': valuation.holdings_count,
                 'created_at': portfolio.created_at
             }
             result.append(portfolio_data)
@@ -65,7 +68,7 @@ def get_portfolio_detail(portfolio_id: int, user_id: int) -> Optional[Dict[str,
         if not portfolio:
             return None
         
-        holdings = portfolio.get_holdings_summary()
+        valuation = value_portfolio(portfolio)
         
         return {
             'id': portfolio.id,
@@ -73,11 +76,11 @@ def get_portfolio_detail(portfolio_id: int, user_id: int) -> Optional[Dict[str,
             'description': portfolio.description,
             'is_default': portfolio.is_default,
             'created_at': portfolio.created_at,
-            'total_value': portfolio.get_total_value(),
-            'total_cost': portfolio.get_total_cost(),
-            'total_profit': portfolio.get_total_profit(),
-            'profit_percentage': portfolio.get_profit_percentage(),
-            'holdings': holdings
+            'total_value': valuation.total_value,
+            'total_cost': valuation.total_cost,
+            'total_profit': valuation.total_profit,
+            'profit_percentage': valuation.profit_percentage,
+            'holdings': valuation.get_holdings_summary()
         }
     except Exception as e:
         logger.error(f"获取投资组合详情失败: {str(e)}")
@@ -220,10 +223,12 @@ def add_holding(portfolio_id: int, user_id: int, stock_code: str,
         if not portfolio:
             return False, "投资组合不存在或无权限", None
         
-        # 获取股票信息
-        stock_data = get_stock_data(stock_code)
-        if 'error' in stock_data:
-            return False, f"获取股票信息失败: {stock_data['error']}", None
+        # 校验股票代码
+        symbol = resolve_symbol(stock_code)
+        if symbol is None:
+            return False, f"无法识别股票代码 {stock_code}", None
+        if not symbol.is_active:
+            return False, f"股票 {stock_code} 已退市", None
         
         # 检查是否已存在该股票持仓
         existing = PortfolioHolding.query.filter_by(
@@ -248,7 +253,7 @@ def add_holding(portfolio_id: int, user_id: int, stock_code: str,
             holding = PortfolioHolding(
                 portfolio_id=portfolio_id,
                 stock_code=stock_code,
-                stock_name=stock_data.get('name', '未知'),
+                stock_name=symbol.name,
                 quantity=quantity,
                 average_cost=average_cost
             )
@@ -0,0 +1,201 @@
+"""
+股票系统 - 行情预热服务
+
+后台定时刷新“活跃股票”（任一用户持仓或观察列表中的股票）的实时行情，
+使用户请求读取行情时几乎不需要等待行情接口。
+
+每轮只刷新在下一轮之前就会过期的行情：交易时段内按盘中时效刷新，收盘后补取一次收盘行情，
+非交易时段行情有效至下一次开盘，因此不会发出请求。多个gunicorn worker各自运行时，
+通过文件锁保证同一时刻只有一个进程在刷新，其余进程在下一轮发现行情已新鲜而跳过。
+刷新写入数据库的行情同时写入共享内存行情板。
+"""
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app import db, socketio
+from app.models.portfolio import PortfolioHolding
+from app.models.watchlist import WatchListStock
+from app.providers import get_provider
+from app.services.stock_service import (
+    get_latest_quotes, get_stock_quote_ttl, bulk_update_latest_quotes, quote_to_row, update_quote_board
+)
+from app.services.symbol_service import get_symbol
+
+try:
+    import fcntl
+except ImportError:  # Windows下不支持文件锁，仅用于开发环境
+    fcntl = None
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+
+def get_active_universe() -> List[str]:
+    """
+    获取活跃股票：所有持仓和观察列表中的股票代码（去重）
+
+    Returns:
+        List[str]: 股票代码列表
+    """
+    query = db.session.query(PortfolioHolding.stock_code).union(
+        db.session.query(WatchListStock.stock_code)
+    )
+    return [code for code, in query.all()]
+
+
+def get_stale_codes(stock_codes: List[str], lead_time: float = 0) -> List[str]:
+    """
+    筛选需要刷新行情的股票
+
+    Args:
+        stock_codes: 股票代码列表
+        lead_time: 提前量(秒)，剩余有效时间不超过该值的行情也视为需要刷新
+
+    Returns:
+        List[str]: 没有行情或行情将在lead_time内过期的已注册股票
+    """
+    codes = [code for code in stock_codes if get_symbol(code) is not None]
+    quotes = get_latest_quotes(codes)
+    stale = []
+    for code in codes:
+        quote = quotes.get(code)
+        if quote is None or get_stock_quote_ttl(get_symbol(code).market, quote) <= lead_time:
+            stale.append(code)
+    return stale
+
+
+def refresh_active_quotes(lead_time: float = 0) -> int:
+    """
+    刷新活跃股票中需要刷新的行情，并把活跃股票的最新行情写入共享内存行情板
+
+    Args:
+        lead_time: 提前量(秒)，见get_stale_codes
+
+    Returns:
+        int: 写入的股票数
+    """
+    universe = get_active_universe()
+    stale = get_stale_codes(universe, lead_time)
+    refreshed = 0
+    if stale:
+        # 数据源按批量大小分块请求
+        quotes = get_provider().get_quotes(stale)
+        refreshed = bulk_update_latest_quotes(quotes)
+    # 行情板与最新行情快照表保持一致，重启后也能在第一轮填满
+    update_quote_board(quote_to_row(quote) for quote in get_latest_quotes(universe).values())
+    return refreshed
+
+
+class QuotePrewarmer:
+    """行情预热后台任务"""
+
+    def __init__(self):
+        """初始化，未启动"""
+        self.interval = 30.0
+        self.lock_file: Optional[str] = None
+        self._running = False
+        self.runs = 0
+        self.skipped = 0
+        self.refreshed = 0
+        self.errors = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration_ms = 0.0
+
+    def configure(self, interval: Optional[float] = None, lock_file: Optional[str] = None) -> None:
+        """
+        调整刷新间隔和跨进程锁文件
+
+        Args:
+            interval: 刷新间隔(秒)
+            lock_file: 跨进程锁文件路径，为空时不加锁
+        """
+        if interval is not None:
+            self.interval = interval
+        if lock_file is not None:
+            self.lock_file = lock_file or None
+
+    def start(self, app) -> None:
+        """启动后台任务（重复调用无效）"""
+        if self._running:
+            return
+        self._running = True
+        # 使用SocketIO的后台任务，在eventlet下为绿色线程
+        socketio.start_background_task(self._loop, app)
+        logger.info(f"行情预热任务已启动，间隔 {self.interval}s")
+
+    def stop(self) -> None:
+        """在当前轮结束后停止后台任务"""
+        self._running = False
+
+    def _loop(self, app) -> None:
+        """后台循环"""
+        while self._running:
+            with app.app_context():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    self.errors += 1
+                    logger.warning(f"行情预热失败: {str(e)}")
+                finally:
+                    db.session.remove()
+            socketio.sleep(self.interval)
+
+    def run_once(self) -> int:
+        """
+        执行一轮刷新，其他进程正在刷新时跳过
+
+        Returns:
+            int: 写入的股票数
+        """
+        lock = self._acquire_lock()
+        if lock is False:
+            self.skipped += 1
+            return 0
+        try:
+            start = time.perf_counter()
+            # 提前一个间隔刷新，保证两轮之间行情不过期
+            refreshed = refresh_active_quotes(lead_time=self.interval)
+            self.runs += 1
+            self.refreshed += refreshed
+            self.last_run_at = datetime.utcnow()
+            self.last_duration_ms = (time.perf_counter() - start) * 1000
+            if refreshed:
+                logger.info(f"行情预热: 刷新 {refreshed} 只股票，耗时 {self.last_duration_ms:.0f}ms")
+            return refreshed
+        finally:
+            if lock:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+                lock.close()
+
+    def _acquire_lock(self):
+        """获取跨进程锁，返回锁文件对象；未配置时返回None；已被占用时返回False"""
+        if not self.lock_file or fcntl is None:
+            return None
+        os.makedirs(os.path.dirname(self.lock_file) or '.', exist_ok=True)
+        lock = open(self.lock_file, 'a')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return False
+        return lock
+
+    def stats(self) -> Dict[str, Any]:
+        """获取运行统计信息"""
+        return {
+            'running': self._running,
+            'interval': self.interval,
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'refreshed': self.refreshed,
+            'errors': self.errors,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_duration_ms': self.last_duration_ms
+        }
+
+
+# 行情预热任务，在create_app中根据配置启动
+quote_prewarmer = QuotePrewarmer()
@@ -0,0 +1,425 @@
+"""
+股票系统 - 实时行情推送服务
+
+客户端通过SocketIO的/quotes命名空间订阅股票。
+行情写入数据库并提交后调用publish_quotes，有订阅者的股票的更新按股票合并到待发送缓冲；
+后台任务每个刷新间隔计算每只股票与上次推送相比变化的字段，分发到其订阅连接的发送缓冲，
+再把每个连接缓冲中的全部股票作为一帧发送。同一刷新间隔内同一股票的多次更新合并为一次，
+发送次数和分发开销只与连接数、订阅数和刷新频率有关，与行情更新频率无关。
+
+客户端收到一帧后确认（ack），连接未确认的帧达到上限时暂不发送，
+期间新的更新继续合并到缓冲中，被覆盖的中间行情直接丢弃，慢客户端只会收到最新的行情。
+
+订阅索引记录 股票 -> 订阅连接 和 连接 -> 股票，用于把更新分发到连接、跳过无人订阅的股票、
+限制单个连接的订阅数量以及断开连接时清理。订阅索引和发送缓冲都在进程内，
+其他进程写入的行情通过缓存失效总线的quote事件到达本进程后再调用publish_quotes。
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from app import socketio
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+# 行情推送的命名空间和事件名，每帧为 {股票代码: 变化的字段}
+QUOTE_NAMESPACE = '/quotes'
+QUOTES_EVENT = 'quotes'
+
+# 推送的行情字段
+QUOTE_FIELDS = ('price', 'open', 'high', 'low', 'change', 'change_percent',
+                'volume', 'turnover', 'date')
+
+
+def quote_row_to_fields(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将stock_quotes行字典转换为推送字段，忽略为空的值
+
+    Args:
+        row: build_quote_row生成的行字典
+
+    Returns:
+        Dict: 推送字段
+    """
+    fields = {
+        'price': row.get('close_price'),
+        'open': row.get('open_price'),
+        'high': row.get('high_price'),
+        'low': row.get('low_price'),
+        'change': row.get('change'),
+        'change_percent': row.get('change_percent'),
+        'volume': row.get('volume'),
+        'turnover': row.get('turnover'),
+        'date': row['date'].strftime('%Y-%m-%d') if row.get('date') else None
+    }
+    return {key: value for key, value in fields.items() if value is not None}
+
+
+class QuoteSubscriptions:
+    """订阅索引，所有操作在锁内完成"""
+
+    def __init__(self):
+        """初始化空索引"""
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._by_client: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, sid: str, stock_codes: Iterable[str], limit: Optional[int] = None) -> List[str]:
+        """
+        订阅股票
+
+        Args:
+            sid: 连接ID
+            stock_codes: 股票代码
+            limit: 单个连接的最大订阅数，超出部分忽略
+
+        Returns:
+            List[str]: 本次新增的订阅
+        """
+        added = []
+        with self._lock:
+            symbols = self._by_client.setdefault(sid, set())
+            for code in stock_codes:
+                if code in symbols:
+                    continue
+                if limit is not None and len(symbols) >= limit:
+                    break
+                symbols.add(code)
+                self._by_symbol.setdefault(code, set()).add(sid)
+                added.append(code)
+        return added
+
+    def unsubscribe(self, sid: str, stock_codes: Iterable[str]) -> List[str]:
+        """
+        取消订阅
+
+        Returns:
+            List[str]: 实际取消的订阅
+        """
+        removed = []
+        with self._lock:
+            symbols = self._by_client.get(sid)
+            if not symbols:
+                return removed
+            for code in stock_codes:
+                if code in symbols:
+                    symbols.discard(code)
+                    self._discard(code, sid)
+                    removed.append(code)
+            if not symbols:
+                del self._by_client[sid]
+        return removed
+
+    def remove_client(self, sid: str) -> List[str]:
+        """
+        移除连接的全部订阅
+
+        Returns:
+            List[str]: 该连接订阅过的股票
+        """
+        with self._lock:
+            symbols = self._by_client.pop(sid, set())
+            for code in symbols:
+                self._discard(code, sid)
+        return list(symbols)
+
+    def _discard(self, code: str, sid: str) -> None:
+        """从股票的订阅者中移除连接（调用方需持有锁）"""
+        subscribers = self._by_symbol.get(code)
+        if subscribers is not None:
+            subscribers.discard(sid)
+            if not subscribers:
+                del self._by_symbol[code]
+
+    def has_subscribers(self, stock_code: str) -> bool:
+        """股票是否有订阅者"""
+        return stock_code in self._by_symbol
+
+    def subscribers(self, stock_code: str) -> List[str]:
+        """订阅股票的连接ID"""
+        with self._lock:
+            return list(self._by_symbol.get(stock_code, ()))
+
+    def subscriber_count(self, stock_code: str) -> int:
+        """股票的订阅者数量"""
+        return len(self._by_symbol.get(stock_code, ()))
+
+    def client_symbols(self, sid: str) -> List[str]:
+        """连接订阅的股票"""
+        with self._lock:
+            return list(self._by_client.get(sid, ()))
+
+    def stats(self) -> Dict[str, Any]:
+        """获取订阅统计信息"""
+        with self._lock:
+            return {
+                'clients': len(self._by_client),
+                'symbols': len(self._by_symbol),
+                'subscriptions': sum(len(symbols) for symbols in self._by_client.values())
+            }
+
+
+class _Outbox:
+    """单个连接的发送缓冲"""
+
+    __slots__ = ('pending', 'in_flight', 'sent_at')
+
+    def __init__(self):
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.in_flight = 0
+        self.sent_at = 0.0
+
+
+def _emit_frame(sid: str, frame: Dict[str, Dict[str, Any]], callback: Callable[..., None]) -> None:
+    """通过SocketIO向单个连接发送一帧"""
+    socketio.emit(QUOTES_EVENT, frame, to=sid, namespace=QUOTE_NAMESPACE, callback=callback)
+
+
+class QuotePublisher:
+    """
+    行情发布
+
+    更新先按股票合并，刷新时与每只股票最近一次推送的字段比较，只把变化的字段
+    合并到各订阅连接的发送缓冲并成帧发送；股票无人订阅时丢弃其记录，
+    之后新的订阅者通过订阅时的快照获得完整数据。推送记录由所有订阅连接共用，
+    只在刷新时更新，订阅时的快照不改变它，否则尚在缓冲中的更新不会发给已有的订阅者。
+    """
+
+    def __init__(self, subscriptions: QuoteSubscriptions,
+                 emit: Callable[[str, Dict[str, Dict[str, Any]], Callable[..., None]], None] = _emit_frame,
+                 flush_interval: float = 0.25, max_in_flight: int = 2, ack_timeout: float = 10.0):
+        """
+        初始化
+
+        Args:
+            subscriptions: 订阅索引
+            emit: 发送函数，参数为连接ID、帧和客户端确认时的回调
+            flush_interval: 刷新间隔(秒)
+            max_in_flight: 每个连接最多未确认的帧数，达到后暂停向该连接发送
+            ack_timeout: 等待确认的最长时间(秒)，超时后视为已确认，避免连接永久停发
+        """
+        self.subscriptions = subscriptions
+        self.emit = emit
+        self.flush_interval = flush_interval
+        self.max_in_flight = max_in_flight
+        self.ack_timeout = ack_timeout
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._outboxes: Dict[str, _Outbox] = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self.published = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self.superseded = 0
+        self.frames = 0
+        self.deferred = 0
+        self.ack_timeouts = 0
+        self.errors = 0
+
+    def configure(self, flush_interval: Optional[float] = None, max_in_flight: Optional[int] = None,
+                  ack_timeout: Optional[float] = None) -> None:
+        """调整刷新间隔、未确认帧上限和确认超时"""
+        if flush_interval is not None:
+            self.flush_interval = max(0.01, flush_interval)
+        if max_in_flight is not None:
+            self.max_in_flight = max(1, max_in_flight)
+        if ack_timeout is not None:
+            self.ack_timeout = ack_timeout
+
+    def diff(self, stock_code: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        计算与上次推送相比变化的字段并更新记录
+
+        Args:
+            stock_code: 股票代码
+            fields: 最新的行情字段
+
+        Returns:
+            Dict: 变化的字段，没有变化时为空字典
+        """
+        with self._lock:
+            last = self._last.setdefault(stock_code, {})
+            changes = {key: value for key, value in fields.items()
+                       if key in QUOTE_FIELDS and value is not None and last.get(key) != value}
+            last.update(changes)
+        return changes
+
+    def forget(self, stock_code: str) -> None:
+        """丢弃股票的推送记录"""
+        with self._lock:
+            self._last.pop(stock_code, None)
+
+    def publish(self, quotes: Dict[str, Dict[str, Any]]) -> int:
+        """
+        把行情更新合并到待发送的股票缓冲，在下一次刷新时分发给订阅连接
+
+        Args:
+            quotes: 股票代码到最新行情字段的映射
+
+        Returns:
+            int: 进入缓冲的股票数（无人订阅的股票直接丢弃）
+        """
+        published = 0
+        for code, fields in quotes.items():
+            if not self.subscriptions.has_subscribers(code):
+                self.forget(code)
+                self.skipped += 1
+                continue
+            fields = {key: value for key, value in fields.items()
+                      if key in QUOTE_FIELDS and value is not None}
+            with self._lock:
+                pending = self._dirty.get(code)
+                if pending is None:
+                    self._dirty[code] = fields
+                else:
+                    # 同一刷新间隔内被新值覆盖的旧值
+                    self.superseded += sum(1 for key in fields if key in pending)
+                    pending.update(fields)
+            published += 1
+        self.published += published
+        return published
+
+    def discard(self, sid: str, stock_codes: Optional[Iterable[str]] = None) -> None:
+        """
+        丢弃连接缓冲中尚未发送的更新
+
+        Args:
+            sid: 连接ID
+            stock_codes: 股票代码，为空时移除整个连接的缓冲
+        """
+        with self._lock:
+            if stock_codes is None:
+                self._outboxes.pop(sid, None)
+                return
+            outbox = self._outboxes.get(sid)
+            if outbox is not None:
+                for code in stock_codes:
+                    outbox.pending.pop(code, None)
+
+    def flush(self) -> int:
+        """
+        分发本刷新间隔内变化的行情，并把每个连接缓冲中的更新作为一帧发送；
+        未确认帧达到上限的连接保留缓冲到下一次刷新，耗时只与订阅数有关，与行情更新次数无关
+
+        Returns:
+            int: 发送的帧数
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+
+        for code, fields in dirty.items():
+            changes = self.diff(code, fields)
+            if not changes:
+                self.unchanged += 1
+                continue
+            subscribers = self.subscriptions.subscribers(code)
+            with self._lock:
+                for sid in subscribers:
+                    outbox = self._outboxes.get(sid)
+                    if outbox is None:
+                        outbox = self._outboxes[sid] = _Outbox()
+                    pending = outbox.pending.get(code)
+                    if pending is None:
+                        outbox.pending[code] = changes
+                    else:
+                        # 慢客户端尚未发送的旧值被新值覆盖
+                        self.superseded += sum(1 for key in changes if key in pending)
+                        outbox.pending[code] = {**pending, **changes}
+
+        now = time.monotonic()
+        frames = []
+        with self._lock:
+            for sid, outbox in self._outboxes.items():
+                if not outbox.pending:
+                    continue
+                if outbox.in_flight >= self.max_in_flight:
+                    if now - outbox.sent_at < self.ack_timeout:
+                        self.deferred += 1
+                        continue
+                    outbox.in_flight = 0
+                    self.ack_timeouts += 1
+                frames.append((sid, outbox, outbox.pending))
+                outbox.pending = {}
+                outbox.in_flight += 1
+                outbox.sent_at = now
+
+        for sid, outbox, frame in frames:
+            try:
+                self.emit(sid, frame, self._ack_callback(outbox))
+            except Exception as e:
+                self.errors += 1
+                with self._lock:
+                    outbox.in_flight = max(0, outbox.in_flight - 1)
+                logger.warning(f"推送行情失败 {sid}: {str(e)}")
+        self.frames += len(frames)
+        return len(frames)
+
+    def _ack_callback(self, outbox: _Outbox) -> Callable[..., None]:
+        """生成客户端确认一帧时的回调"""
+        def ack(*args):
+            with self._lock:
+                outbox.in_flight = max(0, outbox.in_flight - 1)
+        return ack
+
+    def start(self) -> None:
+        """启动后台刷新任务（重复调用无效）"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        # 使用SocketIO的后台任务，在eventlet下为绿色线程
+        socketio.start_background_task(self._loop)
+
+    def stop(self) -> None:
+        """在当前刷新结束后停止后台任务"""
+        self._running = False
+
+    def _loop(self) -> None:
+        """后台循环"""
+        while self._running:
+            socketio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"行情推送刷新失败: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """获取推送统计信息"""
+        with self._lock:
+            pending = len(self._dirty) + sum(len(outbox.pending) for outbox in self._outboxes.values())
+            in_flight = sum(outbox.in_flight for outbox in self._outboxes.values())
+        return {
+            'flush_interval_ms': self.flush_interval * 1000,
+            'published': self.published,
+            'unchanged': self.unchanged,
+            'skipped': self.skipped,
+            'superseded': self.superseded,
+            'frames': self.frames,
+            'deferred': self.deferred,
+            'ack_timeouts': self.ack_timeouts,
+            'errors': self.errors,
+            'pending': pending,
+            'in_flight': in_flight,
+            **self.subscriptions.stats()
+        }
+
+
+# 订阅索引和行情发布
+quote_subscriptions = QuoteSubscriptions()
+quote_publisher = QuotePublisher(quote_subscriptions)
+
+
+def publish_quotes(quotes: Dict[str, Dict[str, Any]]) -> int:
+    """
+    推送行情更新，在行情提交到数据库之后调用
+
+    Args:
+        quotes: 股票代码到最新行情字段的映射
+
+    Returns:
+        int: 有变化并进入发送缓冲的股票数
+    """
+    return quote_publisher.publish(quotes)
@@ -0,0 +1,85 @@
+"""
+股票系统 - 实时行情延迟写入服务
+
+查询股票时获取的实时行情先放入stock_service.quote_write_buffer，
+由本服务的后台任务每隔一个写入间隔（或缓冲达到最大行数时）用一次UPSERT批量写入并提交，
+使读请求不需要写锁；在SQLite上多个读请求不再因逐条提交而串行。
+未启动后台任务时（QUOTE_WRITE_BEHIND_ENABLED关闭）仍然缓冲，由写入间隔到期后的
+第一个请求批量写入。进程退出时写入缓冲中剩余的行情。
+"""
+import atexit
+import logging
+from typing import Any, Dict
+
+from app import db, socketio
+from app.services.stock_service import quote_write_buffer
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+
+class QuoteWriter:
+    """行情延迟写入后台任务"""
+
+    def __init__(self):
+        """初始化，未启动"""
+        self.app = None
+        self._running = False
+
+    def attach(self, app) -> None:
+        """绑定应用并注册退出时的写入（重复调用无效）"""
+        if self.app is not None:
+            return
+        self.app = app
+        atexit.register(self.stop)
+
+    def start(self, app) -> None:
+        """启动后台任务（重复调用无效）"""
+        if self._running:
+            return
+        self.attach(app)
+        self._running = True
+        quote_write_buffer.background = True
+        # 使用SocketIO的后台任务，在eventlet下为绿色线程
+        socketio.start_background_task(self._loop)
+        logger.info(f"行情延迟写入任务已启动，间隔 {quote_write_buffer.interval}s，"
+                    f"最多 {quote_write_buffer.max_rows} 行")
+
+    def stop(self) -> None:
+        """停止后台任务并写入缓冲中剩余的行情"""
+        self._running = False
+        quote_write_buffer.background = False
+        self.flush()
+
+    def _loop(self) -> None:
+        """后台循环"""
+        while self._running:
+            quote_write_buffer.wait()
+            if self._running:
+                self.flush()
+
+    def flush(self) -> int:
+        """
+        在应用上下文中写入缓冲中的行情，失败的行情留在缓冲中下次重试
+
+        Returns:
+            int: 写入的行数
+        """
+        if self.app is None or not len(quote_write_buffer):
+            return 0
+        with self.app.app_context():
+            try:
+                return quote_write_buffer.flush()
+            except Exception as e:
+                logger.warning(f"行情延迟写入失败: {str(e)}")
+                return 0
+            finally:
+                db.session.remove()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取运行统计信息"""
+        return {'running': self._running, **quote_write_buffer.stats()}
+
+
+# 行情延迟写入任务，在create_app中绑定应用并根据配置启动
+quote_writer = QuoteWriter()
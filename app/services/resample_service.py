@@ -0,0 +1,274 @@
+"""
+股票系统 - K线周期重采样服务
+
+将日K线聚合为周、月、季、年K线：开盘价取周期内首个交易日的开盘价，最高/最低价取极值，
+收盘价取最后一个交易日的收盘价，成交量和成交额求和。
+每只股票每个周期的结果缓存在进程内，写入新的日K线后只重算最后一根K线。
+"""
+import logging
+import threading
+from bisect import bisect_left
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.history_service import load_daily_arrays
+from app.utils.cache import TTLCache
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+# 支持重采样的周期
+PERIODS = ('weekly', 'monthly', 'quarterly', 'yearly')
+
+# 各周期平均包含的交易日数，用于估算默认查询范围
+PERIOD_SESSIONS = {'daily': 1, 'weekly': 5, 'monthly': 21, 'quarterly': 63, 'yearly': 250}
+
+# (股票ID, 周期) -> ResampledSeries
+resample_cache = TTLCache(max_size=512, ttl=3600)
+
+
+def period_keys(dates: np.ndarray, period: str) -> np.ndarray:
+    """
+    计算每个日期所属周期的编号，相同编号的日期聚合为一根K线
+
+    Args:
+        dates: datetime64[D]日期数组
+        period: 周期
+
+    Returns:
+        np.ndarray: 周期编号数组
+    """
+    if period == 'weekly':
+        # 1970-01-01为周四，偏移3天后按7天分组即为周一至周日
+        return (dates.astype('datetime64[D]').astype(np.int64) + 3) // 7
+    if period == 'monthly':
+        return dates.astype('datetime64[M]').astype(np.int64)
+    if period == 'quarterly':
+        return dates.astype('datetime64[M]').astype(np.int64) // 3
+    if period == 'yearly':
+        return dates.astype('datetime64[Y]').astype(np.int64)
+    raise ValueError(f"不支持的K线周期: {period}")
+
+
+def period_start(day: date, period: str) -> date:
+    """获取日期所属周期的第一天"""
+    if period == 'weekly':
+        return day - timedelta(days=day.weekday())
+    if period == 'monthly':
+        return day.replace(day=1)
+    if period == 'quarterly':
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    if period == 'yearly':
+        return date(day.year, 1, 1)
+    raise ValueError(f"不支持的K线周期: {period}")
+
+
+def resample_ohlcv(daily: Dict[str, np.ndarray], period: str,
+                   prev_close: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """
+    将按日期升序排列的日K线聚合为指定周期的K线
+
+    Args:
+        daily: 日K线列数组，包含date, open, high, low, close, volume, turnover, change
+        period: 周期
+        prev_close: 第一根K线之前的收盘价，为空时根据首日涨跌额推算
+
+    Returns:
+        Dict[str, np.ndarray]: K线列数组，date为周期内最后一个交易日，
+            start_date为周期内第一个交易日
+    """
+    dates = daily['date']
+    if len(dates) == 0:
+        empty = np.array([], dtype=float)
+        return {'date': dates, 'start_date': dates, 'open': empty, 'high': empty,
+                'low': empty, 'close': empty, 'volume': empty, 'turnover': empty,
+                'change': empty, 'change_percent': empty}
+
+    keys = period_keys(dates, period)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    close = daily['close'][ends]
+    if prev_close is None:
+        first_change = daily['change'][0]
+        prev_close = daily['close'][0] - first_change if np.isfinite(first_change) else daily['open'][0]
+    prev = np.r_[prev_close, close[:-1]]
+    change = close - prev
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_percent = np.where(prev != 0, change / prev * 100, np.nan)
+
+    return {
+        'date': dates[ends],
+        'start_date': dates[starts],
+        'open': daily['open'][starts],
+        # fmax/fmin忽略缺失值
+        'high': np.fmax.reduceat(daily['high'], starts),
+        'low': np.fmin.reduceat(daily['low'], starts),
+        'close': close,
+        'volume': np.add.reduceat(np.nan_to_num(daily['volume']), starts),
+        'turnover': np.add.reduceat(np.nan_to_num(daily['turnover']), starts),
+        'change': change,
+        'change_percent': change_percent
+    }
+
+
+def _optional(value: float) -> Optional[float]:
+    """将NaN转换为None"""
+    return None if value != value else value
+
+
+def bars_to_dicts(bars: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """将K线列数组转换为与StockQuote.to_dict一致的字典列表"""
+    columns = {name: bars[name].tolist() for name in
+               ('open', 'close', 'high', 'low', 'volume', 'turnover', 'change', 'change_percent')}
+    return [
+        {
+            'date': day.strftime('%Y-%m-%d'),
+            'open': _optional(columns['open'][i]),
+            'close': _optional(columns['close'][i]),
+            'high': _optional(columns['high'][i]),
+            'low': _optional(columns['low'][i]),
+            'volume': None if columns['volume'][i] != columns['volume'][i] else int(columns['volume'][i]),
+            'turnover': _optional(columns['turnover'][i]),
+            'change': _optional(columns['change'][i]),
+            'change_percent': _optional(columns['change_percent'][i])
+        }
+        for i, day in enumerate(bars['date'].astype(object))
+    ]
+
+
+class ResampledSeries:
+    """单只股票单个周期的重采样K线缓存"""
+
+    def __init__(self, stock_id: int, period: str):
+        """
+        初始化重采样K线缓存
+
+        Args:
+            stock_id: 股票ID
+            period: 周期
+        """
+        self.stock_id = stock_id
+        self.period = period
+        self.bars: List[Dict[str, Any]] = []
+        self.dates: List[date] = []  # 每根K线最后一个交易日
+        self.tail_start: Optional[date] = None  # 最后一根K线的第一个交易日
+        self.stale = True
+        self.lock = threading.Lock()
+
+    def rebuild(self) -> None:
+        """从全部日K线重新计算"""
+        self._replace_tail(0, load_daily_arrays(self.stock_id), None)
+
+    def extend(self) -> None:
+        """只重新读取并计算最后一根K线所在周期及之后的日K线"""
+        if self.tail_start is None:
+            self.rebuild()
+            return
+        keep = len(self.bars) - 1
+        prev_close = self.bars[keep - 1]['close'] if keep > 0 else None
+        self._replace_tail(keep, load_daily_arrays(self.stock_id, self.tail_start), prev_close)
+
+    def _replace_tail(self, keep: int, daily: Dict[str, np.ndarray],
+                      prev_close: Optional[float]) -> None:
+        """保留前keep根K线，其余替换为daily的聚合结果"""
+        bars = resample_ohlcv(daily, self.period, prev_close)
+        if keep and not len(bars['date']):
+            # 最后一个周期的日K线已被删除，整体重算
+            self.rebuild()
+            return
+        self.bars[keep:] = bars_to_dicts(bars)
+        self.dates[keep:] = bars['date'].astype(object).tolist()
+        self.tail_start = bars['start_date'][-1].astype(object) if len(bars['date']) else None
+
+    def refresh(self) -> None:
+        """数据有变化时增量更新"""
+        with self.lock:
+            if not self.stale:
+                return
+            # 先清除标记，读取期间发生的写入会在下次刷新时处理
+            self.stale = False
+            try:
+                self.extend()
+            except Exception:
+                self.stale = True
+                raise
+
+    def mark_written(self, earliest: date) -> bool:
+        """
+        记录日K线写入
+
+        Args:
+            earliest: 写入的最早日期
+
+        Returns:
+            bool: 能否增量更新，写入早于最后一根K线时需要整体重算
+        """
+        if self.tail_start is not None and earliest < self.tail_start:
+            return False
+        self.stale = True
+        return True
+
+
+def get_resampled_series(stock_id: int, period: str) -> ResampledSeries:
+    """
+    获取股票指定周期的重采样K线，优先使用缓存
+
+    Args:
+        stock_id: 股票ID
+        period: 周期
+
+    Returns:
+        ResampledSeries: 重采样K线
+    """
+    key = (stock_id, period)
+    series = resample_cache.get(key)
+    if series is None:
+        series = ResampledSeries(stock_id, period)
+        resample_cache.set(key, series)
+    series.refresh()
+    return series
+
+
+def get_resampled_kline(stock_id: int, period: str, start_dt: date,
+                        end_dt: date, limit: int) -> List[Dict[str, Any]]:
+    """
+    获取[start_dt, end_dt]区间内的周期K线
+
+    截止日期不早于已有数据时使用缓存；查询历史区间时按区间直接计算，
+    避免截止日期所在周期被之后的日K线污染。
+
+    Args:
+        stock_id: 股票ID
+        period: 周期
+        start_dt: 开始日期
+        end_dt: 结束日期
+        limit: 返回的最大K线数量
+
+    Returns:
+        List[Dict]: K线数据列表
+    """
+    series = get_resampled_series(stock_id, period)
+    if series.dates and end_dt < series.dates[-1]:
+        daily = load_daily_arrays(stock_id, period_start(start_dt, period), end_dt)
+        return bars_to_dicts(resample_ohlcv(daily, period))[-limit:]
+
+    bars = series.bars[bisect_left(series.dates, start_dt):]
+    return bars[-limit:]
+
+
+def notify_quotes_written(stock_id: int, earliest: date) -> None:
+    """
+    日K线写入后更新重采样缓存状态
+
+    Args:
+        stock_id: 股票ID
+        earliest: 写入的最早日期
+    """
+    for period in PERIODS:
+        key = (stock_id, period)
+        series = resample_cache.get(key)
+        if series is not None and not series.mark_written(earliest):
+            resample_cache.invalidate(key)
@@ -0,0 +1,85 @@
+"""
+股票系统 - 股票搜索服务
+
+维护进程内的股票搜索索引。索引从股票代码注册表构建，
+并订阅注册表的改动，在Stock的新增、修改和删除提交后同步更新。
+"""
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from app.services.invalidation_service import add_reset_handler
+from app.services.symbol_service import add_symbol_listener, get_symbols
+from app.utils.search_index import StockSearchIndex, SearchEntry
+from app.utils.symbol_registry import SymbolInfo
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+# 股票搜索索引
+stock_search_index = StockSearchIndex()
+
+_build_lock = threading.Lock()
+_built = False
+
+
+def build_search_index() -> int:
+    """
+    从股票代码注册表重建搜索索引
+
+    Returns:
+        int: 索引的股票数量
+    """
+    global _built
+    _built = False
+    count = stock_search_index.build(
+        (symbol.id, symbol.code, symbol.name, symbol.market) for symbol in get_symbols()
+    )
+    _built = True
+    logger.info(f"股票搜索索引已构建，共 {count} 只股票")
+    return count
+
+
+def ensure_search_index() -> None:
+    """索引尚未构建时构建索引"""
+    if _built:
+        return
+    with _build_lock:
+        if not _built:
+            build_search_index()
+
+
+def search_index(keyword: str, limit: int = 10) -> List[SearchEntry]:
+    """
+    通过索引搜索股票
+
+    Args:
+        keyword: 搜索关键词（代码、名称或拼音首字母）
+        limit: 最大返回数量
+
+    Returns:
+        List[SearchEntry]: 按相关度排序的股票
+    """
+    ensure_search_index()
+    return stock_search_index.search(keyword, limit)
+
+
+def _on_symbols_changed(changes: Dict[str, Optional[SymbolInfo]]) -> None:
+    """同步注册表的改动"""
+    for code, symbol in changes.items():
+        if symbol is None:
+            stock_search_index.remove(code)
+        else:
+            stock_search_index.add(symbol.id, symbol.code, symbol.name, symbol.market)
+
+
+add_symbol_listener(_on_symbols_changed)
+
+
+def _reset_search_index() -> None:
+    """其他进程的失效事件丢失时，在下次搜索时从重新加载的注册表重建索引"""
+    global _built
+    _built = False
+
+
+add_reset_handler(_reset_search_index)
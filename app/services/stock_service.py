@@ -4,16 +4,60 @@
 import os
 import logging
 import requests
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Any, Optional, Tuple, Union
+
+from flask import current_app
+from sqlalchemy import func, and_, select
+from sqlalchemy.orm import contains_eager
 
 from app import db
-from app.models.stock import Stock, StockQuote, StockFinancial
+from app.models.stock import Stock, StockQuote, StockSnapshot, StockQuoteCoverage, StockFinancial
+from app.utils.cache import TTLCache
+from app.utils.singleflight import SingleFlight
+from app.utils.microbatch import MicroBatcher
+from app.utils.write_behind import WriteBehindBuffer
+from app.utils.quote_board import QuoteBoard, BoardEntry
+from app.utils.upsert import bulk_upsert, DEFAULT_CHUNK_SIZE
+from app.utils.market_session import (
+    get_quote_ttl, get_market_session, last_session_date, MarketSession, DEFAULT_INTRADAY_MAX_AGE
+)
+from app.utils.trading_calendar import get_calendar
+from app.services.history_service import load_daily_arrays, sync_daily_history
+from app.providers import get_provider
+from app.services.search_service import search_index
+from app.services.symbol_service import get_symbol, refresh_symbols
+from app.services.push_service import publish_quotes, quote_row_to_fields
+from app.services.invalidation_service import HOST, QUOTE, add_invalidation_handler, add_reset_handler, broadcast
+from app.utils.symbol_registry import SymbolInfo
+from app.services.resample_service import (
+    PERIODS, PERIOD_SESSIONS, bars_to_dicts, get_resampled_kline, notify_quotes_written, resample_cache
+)
+from app.services.indicator_service import expire_indicator_states
 
 
 # 日志配置
 logger = logging.getLogger(__name__)
 
+# 股票行情快照缓存，键为股票代码，值为get_stock_data组装的数据字典
+# 容量和过期时间在create_app中根据配置调整
+quote_cache = TTLCache()
+
+# 行情查询的并发请求合并，键为(操作, 股票代码)，等待时间在create_app中根据配置调整
+quote_flight = SingleFlight()
+
+# 单只股票实时行情请求的微批处理，窗口内的请求合并为一次批量接口调用
+# 窗口、每批数量和等待时间在create_app中根据配置调整
+quote_batcher = MicroBatcher(lambda codes: get_provider().get_quotes(codes))
+
+# 查询时获取的实时行情的延迟写入缓冲，键为股票代码，值为build_quote_row生成的行字典
+# 由quote_writer_service的后台任务批量写入，间隔和行数在create_app中根据配置调整
+quote_write_buffer = WriteBehindBuffer(lambda rows: persist_quote_rows(rows))
+
+# 各worker进程共享的最新行情板，按股票ID索引，每次行情写入数据库后同步写入
+# 共享内存在create_app中根据配置映射，未映射时读取均未命中
+quote_board = QuoteBoard()
+
 
 def get_stock_price(stock_code: str) -> float:
     """
@@ -26,16 +70,26 @@ def get_stock_price(stock_code: str) -> float:
         float: 当前价格
     """
     try:
-        # 优先从数据库获取最新价格
+        # 优先从缓存获取
+        cached = quote_cache.get(stock_code)
+        if cached and cached.get('price') is not None:
+            return cached['price']
+        
+        # 其次从共享内存行情板获取，不访问数据库和网络
+        price = get_board_price(stock_code)
+        if price is not None:
+            return price
+        
+        # 再从数据库获取仍然有效的最新价格
         stock = Stock.query.filter_by(code=stock_code).first()
         if stock:
             quote = stock.get_latest_quote()
-            if quote and (datetime.now().date() - quote.date).days <= 7:
+            if quote and quote.close_price is not None and get_stock_quote_ttl(stock.market, quote) > 0:
                 return quote.close_price
         
-        # 否则从API获取实时价格
-        stock_data = fetch_realtime_stock_data(stock_code)
-        if stock_data and 'price' in stock_data:
+        # 否则刷新行情（结果会写入缓存，避免重复请求API）
+        stock_data = get_stock_data(stock_code)
+        if stock_data.get('price') is not None:
             return stock_data['price']
         
         # 如果都失败，则返回默认值或抛出异常
@@ -45,6 +99,265 @@ def get_stock_price(stock_code: str) -> float:
         raise
 
 
+def get_board_entry(stock_code: str) -> Optional[BoardEntry]:
+    """
+    从共享内存行情板获取仍然有效的最新行情
+    
+    股票ID来自进程内的股票代码注册表，行情有效期按交易时段计算，全程不访问数据库和网络。
+    
+    Args:
+        stock_code: 股票代码
+    
+    Returns:
+        BoardEntry: 最新行情，行情板中没有或已过期时返回None
+    """
+    if not quote_board.is_open:
+        return None
+    symbol = get_symbol(stock_code)
+    if symbol is None:
+        return None
+    entry = quote_board.read(symbol.id)
+    if entry is None or get_stock_quote_ttl(symbol.market, entry) <= 0:
+        return None
+    return entry
+
+
+def get_board_price(stock_code: str) -> Optional[float]:
+    """
+    从共享内存行情板获取仍然有效的最新价格
+    
+    Args:
+        stock_code: 股票代码
+    
+    Returns:
+        float: 最新价格，行情板中没有或已过期时返回None
+    """
+    entry = get_board_entry(stock_code)
+    return entry.price if entry is not None else None
+
+
+def update_quote_board(rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    把行情行写入共享内存行情板
+    
+    每次行情写入数据库后调用，任何进程都可以写入；行情板只保留较新的行情，
+    补写的历史行情不会覆盖最新行情。
+    
+    Args:
+        rows: build_quote_row或quote_to_row生成的行字典
+    
+    Returns:
+        int: 写入的股票数
+    """
+    if not quote_board.writable:
+        return 0
+    written = 0
+    for row in rows:
+        if row.get('close_price') is not None and row.get('updated_at') is not None:
+            written += quote_board.write(
+                row['stock_id'], row['close_price'], row['date'], row['updated_at'],
+                change=row.get('change'), change_percent=row.get('change_percent'),
+                volume=row.get('volume')
+            )
+    return written
+
+
+def get_latest_quotes(stock_codes: List[str]) -> Dict[str, StockSnapshot]:
+    """
+    批量获取多只股票的最新行情
+    
+    通过一条SQL（股票表按主键关联最新行情快照表）完成查询，
+    与历史行情的多少无关，避免逐只股票调用get_latest_quote()。
+    
+    Args:
+        stock_codes: 股票代码列表
+    
+    Returns:
+        Dict[str, StockSnapshot]: 股票代码到最新行情的映射，无行情的股票不在结果中
+    """
+    codes = list(set(stock_codes))
+    if not codes:
+        return {}
+    
+    # 关联的Stock实体填充到quote.stock上，读取时无需逐只股票查询
+    # （只从会话的标识映射中取得不可靠：未被引用的实体会被回收）
+    quotes = db.session.query(StockSnapshot).join(StockSnapshot.stock).options(
+        contains_eager(StockSnapshot.stock)
+    ).filter(Stock.code.in_(codes)).all()
+    
+    return {quote.stock.code: quote for quote in quotes}
+
+
+def get_stock_prices(stock_codes: List[str]) -> Dict[str, float]:
+    """
+    批量获取多只股票的当前价格
+    
+    数据库中的最新行情通过一条SQL获取，仅对缺失或过期的股票
+    发起一次批量API调用。
+    
+    Args:
+        stock_codes: 股票代码列表
+    
+    Returns:
+        Dict[str, float]: 股票代码到当前价格的映射，无法获取价格的股票不在结果中
+    """
+    codes = list(set(stock_codes))
+    if not codes:
+        return {}
+    
+    # 优先使用缓存中的快照
+    prices = {}
+    for code in codes:
+        cached = quote_cache.get(code)
+        if cached and cached.get('price') is not None:
+            prices[code] = cached['price']
+    
+    for code in codes:
+        if code not in prices:
+            price = get_board_price(code)
+            if price is not None:
+                prices[code] = price
+    
+    uncached = [code for code in codes if code not in prices]
+    if uncached:
+        prices.update({
+            code: quote.close_price
+            for code, quote in get_latest_quotes(uncached).items()
+            if quote.close_price is not None and get_stock_quote_ttl(quote.stock.market, quote) > 0
+        })
+    
+    missing = [code for code in codes if code not in prices]
+    if missing:
+        try:
+            for code, stock_data in fetch_realtime_stock_data_batch(missing).items():
+                if stock_data and 'price' in stock_data:
+                    prices[code] = stock_data['price']
+        except Exception as e:
+            logger.warning(f"批量获取实时价格失败: {str(e)}")
+    
+    return prices
+
+
+def get_stock_data_batch(stock_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    批量获取多只股票的行情概要（不含财务数据）
+    
+    依次使用行情缓存、仍然有效的最新行情快照和共享内存行情板；股票信息和最新行情
+    各用一条SQL获取。没有行情或行情已过期的股票通过一次批量API调用刷新，
+    刷新得到的行情放入延迟写入缓冲；刷新失败时仍返回过期的行情。
+    
+    Args:
+        stock_codes: 股票代码列表
+    
+    Returns:
+        Dict[str, Dict]: 股票代码到数据字典的映射
+    """
+    codes = list(set(stock_codes))
+    if not codes:
+        return {}
+    
+    result = {}
+    for code in codes:
+        cached = quote_cache.get(code)
+        if cached and cached.get('price') is not None:
+            result[code] = dict(cached)
+    
+    uncached = [code for code in codes if code not in result]
+    if not uncached:
+        return result
+    
+    stocks = {stock.code: stock for stock in Stock.query.filter(Stock.code.in_(uncached)).all()}
+    quotes = get_latest_quotes(uncached)
+    
+    rows = {}
+    stale = []
+    for code in uncached:
+        quote = quotes.get(code)
+        row = quote_to_row(quote) if quote else None
+        if row is None or get_quote_row_ttl(quote.stock.market, row) <= 0:
+            entry = get_board_entry(code)
+            if entry is not None:
+                # 其他进程刚写入的行情，其余字段沿用同一天的快照
+                same_day = row is not None and row['date'] == entry.date
+                row = {**(row if same_day else {'open_price': None, 'high_price': None,
+                                                'low_price': None, 'turnover': None}),
+                       'close_price': entry.price, 'change': entry.change,
+                       'change_percent': entry.change_percent, 'volume': entry.volume,
+                       'date': entry.date}
+            else:
+                stale.append(code)
+        if row is not None:
+            rows[code] = row
+    
+    # 没有行情和行情已过期的股票一起刷新
+    if stale:
+        try:
+            realtime = fetch_realtime_stock_data_batch(stale)
+        except Exception as e:
+            logger.warning(f"批量获取实时行情失败: {str(e)}")
+            realtime = {}
+        for code, quote_data in realtime.items():
+            if not quote_data or quote_data.get('price') is None:
+                continue
+            stock = stocks.get(code)
+            rows[code] = build_quote_row(stock.id if stock else None, quote_data)
+            if stock is not None:
+                write_quote_row(code, rows[code])
+    
+    for code in uncached:
+        stock = stocks.get(code)
+        data = stock.get_basic_info() if stock else {'code': code, 'name': '未知'}
+        row = rows.get(code)
+        if row:
+            data.update({
+                'price': row['close_price'],
+                'open': row['open_price'],
+                'high': row['high_price'],
+                'low': row['low_price'],
+                'change': row['change'],
+                'change_percent': row['change_percent'],
+                'volume': row['volume'],
+                'turnover': row['turnover'],
+                'date': row['date'].strftime('%Y-%m-%d')
+            })
+        result[code] = data
+    
+    return result
+
+
+def resolve_symbol(stock_code: str) -> Optional[SymbolInfo]:
+    """
+    校验股票代码并获取基本信息
+    
+    已知股票直接从注册表返回，不访问数据库和行情接口；
+    未知股票从API获取基本信息并写入数据库，不获取行情。
+    
+    Args:
+        stock_code: 股票代码
+    
+    Returns:
+        SymbolInfo: 股票基本信息，无法识别的代码返回None
+    """
+    symbol = get_symbol(stock_code)
+    if symbol is not None:
+        return symbol
+    
+    stock_info = fetch_stock_info(stock_code)
+    if not stock_info:
+        return None
+    
+    bulk_upsert(db.session, Stock.__table__, [{
+        'code': stock_code,
+        'name': stock_info.get('name', '未知'),
+        'market': stock_info.get('market', '未知'),
+        'full_name': stock_info.get('full_name'),
+        'industry': stock_info.get('industry')
+    }], index_elements=('code',))
+    db.session.commit()
+    refresh_symbols([stock_code])
+    return get_symbol(stock_code)
+
+
 def get_stock_data(stock_code: str) -> Dict[str, Any]:
     """
     获取股票综合数据
@@ -56,65 +369,13 @@ def get_stock_data(stock_code: str) -> Dict[str, Any]:
         Dict: 股票数据字典
     """
     try:
-        # 查询股票基本信息
-        stock = Stock.query.filter_by(code=stock_code).first()
-        
-        # 如果数据库中不存在该股票，则从API获取并保存
-        if not stock:
-            stock_info = fetch_stock_info(stock_code)
-            if not stock_info:
-                raise ValueError(f"无法获取股票 {stock_code} 的信息")
-                
-            stock = Stock(
-                code=stock_code,
-                name=stock_info.get('name', '未知'),
-                market=stock_info.get('market', '未知'),
-                full_name=stock_info.get('full_name'),
-                industry=stock_info.get('industry')
-            )
-            db.session.add(stock)
-            db.session.commit()
-        
-        # 获取最新行情
-        latest_quote = stock.get_latest_quote()
-        if not latest_quote or (datetime.now().date() - latest_quote.date).days > 0:
-            # 从API获取最新行情并保存
-            try:
-                quote_data = fetch_realtime_stock_data(stock_code)
-                if quote_data:
-                    update_stock_quote(stock.id, quote_data)
-                    latest_quote = stock.get_latest_quote()
-            except Exception as e:
-                logger.warning(f"获取实时行情失败: {str(e)}")
+        # 优先从缓存获取
+        cached = quote_cache.get(stock_code)
+        if cached is not None:
+            return dict(cached)
         
-        # 构建返回数据
-        result = stock.get_basic_info()
-        if latest_quote:
-            result.update({
-                'price': latest_quote.close_price,
-                'open': latest_quote.open_price,
-                'high': latest_quote.high_price,
-                'low': latest_quote.low_price,
-                'change': latest_quote.change,
-                'change_percent': latest_quote.change_percent,
-                'volume': latest_quote.volume,
-                'turnover': latest_quote.turnover,
-                'date': latest_quote.date.strftime('%Y-%m-%d')
-            })
-        
-        # 获取财务数据
-        latest_financial = stock.financials.order_by(StockFinancial.report_date.desc()).first()
-        if latest_financial:
-            result.update({
-                'eps': latest_financial.eps,
-                'pe_ratio': latest_financial.pe_ratio,
-                'pb_ratio': latest_financial.pb_ratio,
-                'roe': latest_financial.roe,
-                'dividend_yield': latest_financial.dividend_yield,
-                'financial_date': latest_financial.report_date.strftime('%Y-%m-%d')
-            })
-        
-        return result
+        # 缓存未命中时合并并发请求，同一股票只由一个调用者查询数据库并刷新行情
+        return dict(quote_flight.do(('stock_data', stock_code), _load_stock_data, stock_code))
     except Exception as e:
         logger.error(f"获取股票数据失败: {str(e)}")
         # 返回最小数据集，避免前端错误
@@ -125,6 +386,73 @@ def get_stock_data(stock_code: str) -> Dict[str, Any]:
         }
 
 
+def _load_stock_data(stock_code: str) -> Dict[str, Any]:
+    """
+    查询股票综合数据，必要时刷新行情，并写入行情缓存
+    
+    刷新得到的行情立即用于返回结果和行情缓存，数据库写入交给延迟写入缓冲，
+    查询过程不提交事务（首次出现的股票需要先登记基本信息）。
+    
+    Args:
+        stock_code: 股票代码
+    
+    Returns:
+        Dict: 股票数据字典（与缓存共享，调用方需复制后再修改）
+    """
+    # 查询股票基本信息，数据库中不存在时从API获取并登记
+    stock = Stock.query.filter_by(code=stock_code).first()
+    if not stock:
+        if resolve_symbol(stock_code) is None:
+            raise ValueError(f"无法获取股票 {stock_code} 的信息")
+        stock = Stock.query.filter_by(code=stock_code).first()
+    
+    # 获取最新行情（尚未写入数据库的行情优先），按交易时段判断是否需要刷新
+    row = quote_write_buffer.get(stock_code)
+    if row is None:
+        latest_quote = stock.get_latest_quote()
+        row = quote_to_row(latest_quote) if latest_quote else None
+    if row is None or get_quote_row_ttl(stock.market, row) <= 0:
+        try:
+            quote_data = fetch_realtime_stock_data(stock_code)
+            if quote_data:
+                row = build_quote_row(stock.id, quote_data)
+                write_quote_row(stock_code, row)
+        except Exception as e:
+            logger.warning(f"获取实时行情失败: {str(e)}")
+    
+    # 构建返回数据
+    result = stock.get_basic_info()
+    if row:
+        result.update({
+            'price': row['close_price'],
+            'open': row['open_price'],
+            'high': row['high_price'],
+            'low': row['low_price'],
+            'change': row['change'],
+            'change_percent': row['change_percent'],
+            'volume': row['volume'],
+            'turnover': row['turnover'],
+            'date': row['date'].strftime('%Y-%m-%d')
+        })
+    
+    # 获取财务数据
+    latest_financial = stock.financials.order_by(StockFinancial.report_date.desc()).first()
+    if latest_financial:
+        result.update({
+            'eps': latest_financial.eps,
+            'pe_ratio': latest_financial.pe_ratio,
+            'pb_ratio': latest_financial.pb_ratio,
+            'roe': latest_financial.roe,
+            'dividend_yield': latest_financial.dividend_yield,
+            'financial_date': latest_financial.report_date.strftime('%Y-%m-%d')
+        })
+    
+    # 收盘后的行情缓存至下一次开盘；刷新后仍未更新的行情（如停牌）使用默认过期时间
+    quote_ttl = get_quote_row_ttl(stock.market, row) if row else 0
+    quote_cache.set(stock_code, result, ttl=quote_ttl or None)
+    return result
+
+
 def get_stock_k_line(stock_code: str, period: str = 'daily', 
                     start_date: Optional[str] = None, 
                     end_date: Optional[str] = None,
@@ -147,36 +475,40 @@ def get_stock_k_line(stock_code: str, period: str = 'daily',
         if not stock:
             raise ValueError(f"股票 {stock_code} 不存在")
         
-        # 解析日期
+        if period != 'daily' and period not in PERIODS:
+            raise ValueError(f"不支持的K线周期: {period}")
+        
+        calendar = get_calendar(stock.market)
+        
+        # 解析日期，截止日期不晚于已开盘的最近交易日
         end_dt = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else datetime.now().date()
+        end_dt = min(end_dt, last_session_date(stock.market))
         if start_date:
             start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
         else:
-            # 默认获取最近limit天的数据
-            start_dt = end_dt - timedelta(days=limit * 2)  # 乘2是为了兼顾非交易日
+            # 默认获取最近limit个周期的数据
+            start_dt = calendar.sessions_back(end_dt, limit * PERIOD_SESSIONS[period])
         
-        # 查询数据库中的K线数据
-        quotes = stock.quotes.filter(
-            StockQuote.date >= start_dt,
-            StockQuote.date <= end_dt
-        ).order_by(StockQuote.date).all()
+        # 读取区间内的日K线
+        daily = load_daily_arrays(stock.id, start_dt, end_dt)
         
-        # 如果数据不足，尝试从API获取并保存
-        if len(quotes) < min(limit, (end_dt - start_dt).days / 2):
+        # 只对覆盖范围之外的缺失交易日请求API，已完整覆盖的区间直接读取
+        uncovered = get_uncovered_ranges(stock.id, start_dt, end_dt)
+        if uncovered:
             try:
-                kline_data = fetch_stock_kline(stock_code, period, start_date, end_date)
-                if kline_data:
-                    bulk_update_stock_quotes(stock.id, kline_data)
-                    # 重新查询
-                    quotes = stock.quotes.filter(
-                        StockQuote.date >= start_dt,
-                        StockQuote.date <= end_dt
-                    ).order_by(StockQuote.date).all()
+                if backfill_stock_quotes(stock, uncovered, set(daily['date'].astype(object))):
+                    # 重新读取
+                    daily = load_daily_arrays(stock.id, start_dt, end_dt)
             except Exception as e:
+                db.session.rollback()
                 logger.warning(f"获取K线数据失败: {str(e)}")
         
+        if period != 'daily':
+            # 周、月、季、年K线由日K线聚合
+            return get_resampled_kline(stock.id, period, start_dt, end_dt, limit)
+        
         # 转换为前端所需格式
-        result = [quote.to_dict() for quote in quotes[-limit:]]
+        result = bars_to_dicts({name: values[-limit:] for name, values in daily.items()})
         return result
     except Exception as e:
         logger.error(f"获取股票K线数据失败: {str(e)}")
@@ -195,53 +527,41 @@ def search_stocks(keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
         List[Dict]: 股票列表
     """
     try:
-        # 先从数据库中搜索
-        stocks = Stock.query.filter(
-            (Stock.code.like(f'%{keyword}%')) | 
-            (Stock.name.like(f'%{keyword}%'))
-        ).limit(limit).all()
+        # 先从内存索引中搜索
+        entries = search_index(keyword, limit)
         
         # 如果结果太少，可以考虑从API获取更多
-        if len(stocks) < limit:
+        if len(entries) < limit:
             try:
-                api_results = fetch_stock_search(keyword, limit - len(stocks))
-                if api_results:
-                    for result in api_results:
-                        # 检查是否已存在
-                        if not Stock.query.filter_by(code=result['code']).first():
-                            stock = Stock(
-                                code=result['code'],
-                                name=result['name'],
-                                market=result.get('market', '未知')
-                            )
-                            db.session.add(stock)
+                api_results = fetch_stock_search(keyword, limit - len(entries))
+                missing = {result['code']: result for result in api_results or []
+                           if get_symbol(result['code']) is None}
+                if missing:
+                    # 一条UPSERT写入，数据库中已存在的股票（如其他进程写入的）保持不变
+                    bulk_upsert(db.session, Stock.__table__, [
+                        {'code': code, 'name': result['name'], 'market': result.get('market', '未知')}
+                        for code, result in missing.items()
+                    ], index_elements=('code',))
                     db.session.commit()
                     
-                    # 重新查询
-                    stocks = Stock.query.filter(
-                        (Stock.code.like(f'%{keyword}%')) | 
-                        (Stock.name.like(f'%{keyword}%'))
-                    ).limit(limit).all()
+                    # Core语句不触发会话事件，回读后更新注册表和索引并重新查询
+                    refresh_symbols(missing)
+                    entries = search_index(keyword, limit)
             except Exception as e:
+                db.session.rollback()
                 logger.warning(f"API搜索股票失败: {str(e)}")
         
-        # 构建返回结果
+        # 构建返回结果，最新行情一次批量查询
+        latest_quotes = get_latest_quotes([entry.code for entry in entries])
         result = []
-        for stock in stocks:
-            stock_data = {
-                'code': stock.code,
-                'name': stock.name,
-                'market': stock.market
-            }
-            
-            # 获取最新价格
-            latest_quote = stock.get_latest_quote()
+        for entry in entries:
+            stock_data = entry.to_dict()
+            latest_quote = latest_quotes.get(entry.code)
             if latest_quote:
                 stock_data.update({
                     'price': latest_quote.close_price,
                     'change_percent': latest_quote.change_percent
                 })
-                
             result.append(stock_data)
             
         return result
@@ -250,7 +570,7 @@ def search_stocks(keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
         return []
 
 
-# 以下是与外部API交互的函数
+# 以下是与外部API交互的函数，实际请求由create_app中配置的行情数据源完成
 
 def fetch_stock_info(stock_code: str) -> Dict[str, Any]:
     """
@@ -262,35 +582,7 @@ def fetch_stock_info(stock_code: str) -> Dict[str, Any]:
     Returns:
         Dict: 股票基本信息
     """
-    # TODO: 实现实际的API调用
-    # 由于目前没有实际的API，这里返回模拟数据
-    logger.info(f"使用模拟数据替代API调用: fetch_stock_info({stock_code})")
-    
-    # 模拟常见股票数据
-    mock_data = {
-        '600000': {'name': '浦发银行', 'market': 'SH', 'industry': '银行', 'full_name': '上海浦东发展银行股份有限公司'},
-        '601398': {'name': '工商银行', 'market': 'SH', 'industry': '银行', 'full_name': '中国工商银行股份有限公司'},
-        '000001': {'name': '平安银行', 'market': 'SZ', 'industry': '银行', 'full_name': '平安银行股份有限公司'},
-        '601288': {'name': '农业银行', 'market': 'SH', 'industry': '银行', 'full_name': '中国农业银行股份有限公司'},
-        '601988': {'name': '中国银行', 'market': 'SH', 'industry': '银行', 'full_name': '中国银行股份有限公司'},
-        '600519': {'name': '贵州茅台', 'market': 'SH', 'industry': '白酒', 'full_name': '贵州茅台酒股份有限公司'},
-        '000858': {'name': '五粮液', 'market': 'SZ', 'industry': '白酒', 'full_name': '宜宾五粮液股份有限公司'},
-        '601318': {'name': '中国平安', 'market': 'SH', 'industry': '保险', 'full_name': '中国平安保险(集团)股份有限公司'},
-        '600036': {'name': '招商银行', 'market': 'SH', 'industry': '银行', 'full_name': '招商银行股份有限公司'},
-        '000651': {'name': '格力电器', 'market': 'SZ', 'industry': '家电', 'full_name': '珠海格力电器股份有限公司'},
-        '600887': {'name': '伊利股份', 'market': 'SH', 'industry': '食品饮料', 'full_name': '内蒙古伊利实业集团股份有限公司'},
-        '601857': {'name': '中国石油', 'market': 'SH', 'industry': '石油石化', 'full_name': '中国石油天然气股份有限公司'},
-    }
-    
-    # 提供一个默认的股票信息
-    default_info = {
-        'name': f'未知股票{stock_code}',
-        'market': '未知',
-        'industry': '未知',
-        'full_name': f'未知股票{stock_code}'
-    }
-    
-    return mock_data.get(stock_code, default_info)
+    return get_provider().get_stock_info(stock_code)
 
 
 def fetch_realtime_stock_data(stock_code: str) -> Dict[str, Any]:
@@ -303,49 +595,21 @@ def fetch_realtime_stock_data(stock_code: str) -> Dict[str, Any]:
     Returns:
         Dict: 股票实时数据
     """
-    # TODO: 实现实际的API调用
-    # 由于目前没有实际的API，这里返回模拟数据
-    logger.info(f"使用模拟数据替代API调用: fetch_realtime_stock_data({stock_code})")
-    
-    import random
-    from datetime import datetime, timedelta
-    
-    # 随机生成一个合理的价格
-    base_price = 10.0 + (hash(stock_code) % 1000) / 10.0
-    price = round(base_price * (1 + random.uniform(-0.05, 0.05)), 2)
-    
-    # 基于价格生成其他数据
-    open_price = round(price * (1 + random.uniform(-0.02, 0.02)), 2)
-    high_price = round(max(open_price, price) * (1 + random.uniform(0, 0.02)), 2)
-    low_price = round(min(open_price, price) * (1 - random.uniform(0, 0.02)), 2)
-    
-    # 生成涨跌幅
-    prev_close = round(price / (1 + random.uniform(-0.05, 0.05)), 2)
-    change = round(price - prev_close, 2)
-    change_percent = round(change / prev_close * 100, 2)
-    
-    # 生成成交量和成交额
-    volume = random.randint(10000, 10000000)
-    turnover = round(volume * price / 100, 2)
+    # 与同一时间窗口内其他股票的请求合并为一次批量调用
+    return dict(quote_batcher.submit(stock_code) or {})
+
+
+def fetch_realtime_stock_data_batch(stock_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    从API批量获取多只股票的实时数据
     
-    # 当前日期，如果是周末则取最近的周五
-    today = datetime.now().date()
-    if today.weekday() > 4:  # 0是周一，5是周六，6是周日
-        today = today - timedelta(days=today.weekday() - 4)
+    Args:
+        stock_codes: 股票代码列表
     
-    return {
-        'stock_code': stock_code,
-        'date': today.strftime('%Y-%m-%d'),
-        'price': price,
-        'open': open_price,
-        'high': high_price,
-        'low': low_price,
-        'prev_close': prev_close,
-        'change': change,
-        'change_percent': change_percent,
-        'volume': volume,
-        'turnover': turnover
-    }
+    Returns:
+        Dict[str, Dict]: 股票代码到实时数据的映射
+    """
+    return get_provider().get_quotes(stock_codes)
 
 
 def fetch_stock_kline(stock_code: str, period: str = 'daily', 
@@ -363,69 +627,7 @@ def fetch_stock_kline(stock_code: str, period: str = 'daily',
     Returns:
         List[Dict]: K线数据列表
     """
-    # TODO: 实现实际的API调用
-    # 由于目前没有实际的API，这里返回模拟数据
-    logger.info(f"使用模拟数据替代API调用: fetch_stock_kline({stock_code}, {period}, {start_date}, {end_date})")
-    
-    import random
-    
-    # 解析日期
-    end_dt = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else datetime.now().date()
-    # 如果是周末，调整到最近的工作日
-    if end_dt.weekday() > 4:
-        end_dt = end_dt - timedelta(days=end_dt.weekday() - 4)
-        
-    if start_date:
-        start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
-    else:
-        # 默认获取30个交易日的数据
-        start_dt = end_dt - timedelta(days=30 * 7 // 5)  # 考虑周末和节假日
-    
-    # 基于股票代码生成一个基础价格
-    base_price = 10.0 + (hash(stock_code) % 1000) / 10.0
-    current_price = base_price
-    
-    result = []
-    current_dt = start_dt
-    
-    while current_dt <= end_dt:
-        # 跳过周末
-        if current_dt.weekday() < 5:  # 0-4为周一至周五
-            # 随机生成涨跌幅
-            change_percent = random.uniform(-2.0, 2.0)
-            close_price = round(current_price * (1 + change_percent / 100), 2)
-            
-            # 生成开盘价、最高价和最低价
-            open_price = round(current_price * (1 + random.uniform(-1.0, 1.0) / 100), 2)
-            high_price = round(max(open_price, close_price) * (1 + random.uniform(0, 1.0) / 100), 2)
-            low_price = round(min(open_price, close_price) * (1 - random.uniform(0, 1.0) / 100), 2)
-            
-            # 生成成交量
-            volume = random.randint(5000000, 50000000)
-            
-            # 生成成交额
-            turnover = round(volume * (open_price + close_price) / 2 / 10000, 2)
-            
-            # 计算涨跌额
-            change = round(close_price - current_price, 2)
-            
-            result.append({
-                'date': current_dt.strftime('%Y-%m-%d'),
-                'open': open_price,
-                'close': close_price,
-                'high': high_price,
-                'low': low_price,
-                'volume': volume,
-                'turnover': turnover,
-                'change': change,
-                'change_percent': round(change_percent, 2)
-            })
-            
-            current_price = close_price
-            
-        current_dt += timedelta(days=1)
-    
-    return result
+    return get_provider().get_kline(stock_code, period, start_date, end_date)
 
 
 def fetch_stock_search(keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
@@ -439,37 +641,421 @@ def fetch_stock_search(keyword: str, limit: int = 10) -> List[Dict[str, Any]]:
     Returns:
         List[Dict]: 股票列表
     """
-    # TODO: 实现实际的API调用
-    # 由于目前没有实际的API，这里返回模拟数据
-    logger.info(f"使用模拟数据替代API调用: fetch_stock_search({keyword}, {limit})")
-    
-    # 模拟搜索结果
-    all_stocks = [
-        {'code': '600000', 'name': '浦发银行', 'market': 'SH'},
-        {'code': '601398', 'name': '工商银行', 'market': 'SH'},
-        {'code': '000001', 'name': '平安银行', 'market': 'SZ'},
-        {'code': '601288', 'name': '农业银行', 'market': 'SH'},
-        {'code': '601988', 'name': '中国银行', 'market': 'SH'},
-        {'code': '600519', 'name': '贵州茅台', 'market': 'SH'},
-        {'code': '000858', 'name': '五粮液', 'market': 'SZ'},
-        {'code': '601318', 'name': '中国平安', 'market': 'SH'},
-        {'code': '600036', 'name': '招商银行', 'market': 'SH'},
-        {'code': '000651', 'name': '格力电器', 'market': 'SZ'},
-        {'code': '600887', 'name': '伊利股份', 'market': 'SH'},
-        {'code': '601857', 'name': '中国石油', 'market': 'SH'},
-    ]
-    
-    # 根据关键词过滤
-    filtered_stocks = []
-    for stock in all_stocks:
-        if keyword.lower() in stock['code'].lower() or keyword.lower() in stock['name'].lower():
-            filtered_stocks.append(stock)
-    
-    return filtered_stocks[:limit]
+    return get_provider().search(keyword, limit)
 
 
 # 辅助函数
 
+def get_uncovered_ranges(stock_id: int, start_dt: date, end_dt: date) -> List[Tuple[date, date]]:
+    """
+    计算区间内尚未被行情覆盖记录覆盖的日期区间
+    
+    Args:
+        stock_id: 股票ID
+        start_dt: 开始日期
+        end_dt: 结束日期
+    
+    Returns:
+        List[Tuple[date, date]]: 未覆盖的(开始日期, 结束日期)区间列表
+    """
+    if start_dt > end_dt:
+        return []
+    
+    coverage = StockQuoteCoverage.query.filter(
+        StockQuoteCoverage.stock_id == stock_id,
+        StockQuoteCoverage.end_date >= start_dt,
+        StockQuoteCoverage.start_date <= end_dt
+    ).order_by(StockQuoteCoverage.start_date).all()
+    
+    ranges = []
+    cursor = start_dt
+    for item in coverage:
+        if item.start_date > cursor:
+            ranges.append((cursor, item.start_date - timedelta(days=1)))
+        cursor = max(cursor, item.end_date + timedelta(days=1))
+        if cursor > end_dt:
+            break
+    if cursor <= end_dt:
+        ranges.append((cursor, end_dt))
+    return ranges
+
+
+def mark_quotes_covered(stock: Stock, start_dt: date, end_dt: date) -> bool:
+    """
+    记录行情覆盖区间，并与重叠或相邻（中间没有交易日）的已有区间合并
+    
+    调用方负责提交事务。
+    
+    Args:
+        stock: 股票对象
+        start_dt: 开始日期
+        end_dt: 结束日期
+    
+    Returns:
+        bool: 是否新增或合并了区间，已被某个区间完全覆盖时返回False
+    """
+    calendar = get_calendar(stock.market)
+    lower = calendar.previous_session(start_dt) or start_dt
+    upper = calendar.next_session(end_dt)
+    
+    neighbours = StockQuoteCoverage.query.filter(
+        StockQuoteCoverage.stock_id == stock.id,
+        StockQuoteCoverage.end_date >= lower,
+        StockQuoteCoverage.start_date <= upper
+    ).all()
+    if any(item.start_date <= start_dt and item.end_date >= end_dt for item in neighbours):
+        return False
+    
+    merged_start, merged_end = start_dt, end_dt
+    for item in neighbours:
+        merged_start = min(merged_start, item.start_date)
+        merged_end = max(merged_end, item.end_date)
+        db.session.delete(item)
+    
+    db.session.add(StockQuoteCoverage(stock.id, merged_start, merged_end))
+    return True
+
+
+def backfill_stock_quotes(stock: Stock, ranges: List[Tuple[date, date]],
+                          existing_dates: set) -> bool:
+    """
+    只获取并插入指定区间内缺失的日线行情，随后记录覆盖范围
+    
+    覆盖范围有变化时才提交事务；盘中的当日行情不计入覆盖范围，只请求当日时不提交。
+    
+    Args:
+        stock: 股票对象
+        ranges: 需要补齐的(开始日期, 结束日期)区间列表
+        existing_dates: 区间内数据库已有行情的日期
+    
+    Returns:
+        bool: 是否写入了新的行情数据
+    """
+    calendar = get_calendar(stock.market)
+    
+    inserted = False
+    for range_start, range_end in ranges:
+        missing = calendar.missing_sessions(range_start, range_end, existing_dates)
+        for gap_start, gap_end in calendar.to_ranges(missing):
+            kline_data = fetch_stock_kline(stock.code, 'daily',
+                                           gap_start.strftime('%Y-%m-%d'),
+                                           gap_end.strftime('%Y-%m-%d'))
+            if kline_data:
+                bulk_update_stock_quotes(stock.id, kline_data, overwrite=False)
+                inserted = True
+    
+    # 盘中的当日数据尚未收盘，不计入覆盖范围
+    covered_until = last_session_date(stock.market)
+    if get_market_session(stock.market) in (MarketSession.OPEN, MarketSession.LUNCH_BREAK):
+        covered_until = calendar.previous_session(covered_until)
+    
+    covered = False
+    for range_start, range_end in ranges:
+        range_end = min(range_end, covered_until)
+        if range_start <= range_end:
+            covered = mark_quotes_covered(stock, range_start, range_end) or covered
+    if covered:
+        db.session.commit()
+    
+    return inserted
+
+
+def invalidate_stock_cache(stock_id: int, since: Optional[date] = None) -> None:
+    """
+    使股票的行情快照缓存失效
+    
+    Args:
+        stock_id: 股票ID
+        since: 本次写入的最早行情日期，用于增量更新周期K线缓存
+    """
+    stock = db.session.get(Stock, stock_id)
+    if stock:
+        quote_cache.invalidate(stock.code)
+        broadcast(QUOTE, [{'code': stock.code, 'stock_id': stock_id,
+                           'since': since.isoformat() if since else None, 'host': HOST}])
+    if since:
+        notify_quotes_written(stock_id, since)
+
+
+def _on_remote_quotes(items: List[Dict[str, Any]]) -> None:
+    """
+    处理其他进程写入行情的失效事件：使行情缓存和周期K线缓存失效，
+    其他机器写入的行情同步到本机的K线历史存储（同一台机器共用存储文件，已由写入方同步），
+    并把附带的行情推送给本进程的订阅连接
+    
+    Args:
+        items: 事件的项，见invalidation_service
+    """
+    fields = {}
+    for item in items:
+        quote_cache.invalidate(item['code'])
+        if item.get('since'):
+            since = date.fromisoformat(item['since'])
+            if item.get('host') != HOST:
+                sync_daily_history(item['stock_id'], since)
+            notify_quotes_written(item['stock_id'], since)
+        if item.get('fields'):
+            fields[item['code']] = item['fields']
+    if fields:
+        publish_quotes(fields)
+
+
+add_invalidation_handler(QUOTE, _on_remote_quotes)
+
+
+def _reset_quote_caches() -> None:
+    """其他进程的失效事件丢失时清空行情缓存和周期K线缓存"""
+    quote_cache.clear()
+    resample_cache.clear()
+
+
+add_reset_handler(_reset_quote_caches)
+
+
+def get_stock_quote_ttl(market: str, quote: Union[StockSnapshot, BoardEntry]) -> float:
+    """
+    按交易时段计算行情的剩余有效时间
+    
+    Args:
+        market: 市场代码
+        quote: 最新行情快照或行情板中的行情
+    
+    Returns:
+        float: 剩余有效秒数，0表示需要重新获取
+    """
+    intraday_max_age = current_app.config.get('QUOTE_INTRADAY_MAX_AGE', DEFAULT_INTRADAY_MAX_AGE)
+    return get_quote_ttl(market, quote.date, quote.updated_at,
+                         intraday_max_age=intraday_max_age)
+
+
+def get_quote_row_ttl(market: str, row: Dict[str, Any]) -> float:
+    """
+    按交易时段计算行情行字典的剩余有效时间，与get_stock_quote_ttl相同
+    
+    Args:
+        market: 市场代码
+        row: build_quote_row或quote_to_row生成的行字典
+    
+    Returns:
+        float: 剩余有效秒数，0表示需要重新获取
+    """
+    intraday_max_age = current_app.config.get('QUOTE_INTRADAY_MAX_AGE', DEFAULT_INTRADAY_MAX_AGE)
+    return get_quote_ttl(market, row['date'], row['updated_at'],
+                         intraday_max_age=intraday_max_age)
+
+
+def get_quote_cache_stats() -> Dict[str, Any]:
+    """
+    获取行情快照缓存的统计信息
+    
+    Returns:
+        Dict: 命中、未命中、淘汰等计数
+    """
+    return quote_cache.stats()
+
+
+def get_quote_flight_stats() -> Dict[str, Any]:
+    """
+    获取行情查询并发合并的统计信息
+    
+    Returns:
+        Dict: 调用次数、实际执行次数、被合并的调用次数等
+    """
+    return quote_flight.stats()
+
+
+def get_quote_batch_stats() -> Dict[str, Any]:
+    """
+    获取实时行情微批处理的统计信息
+    
+    Returns:
+        Dict: 请求数、批次数，以及等待耗时和批次大小的直方图
+    """
+    return quote_batcher.stats()
+
+
+def get_quote_board_stats() -> Dict[str, Any]:
+    """
+    获取共享内存行情板的统计信息
+    
+    Returns:
+        Dict: 容量、当前进程的读取命中和未命中次数等
+    """
+    return quote_board.stats()
+
+
+def get_quote_write_stats() -> Dict[str, Any]:
+    """
+    获取实时行情延迟写入的统计信息
+    
+    Returns:
+        Dict: 待写入行数、写入次数、被覆盖的行数等
+    """
+    return quote_write_buffer.stats()
+
+
+# 行情UPSERT时更新的列，新值为空时保留原值
+QUOTE_UPDATE_COLUMNS = (
+    'open_price', 'close_price', 'high_price', 'low_price', 'volume',
+    'turnover', 'change', 'change_percent', 'updated_at'
+)
+
+
+def build_quote_row(stock_id: int, quote_data: Dict[str, Any],
+                    now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    将行情数据转换为stock_quotes表的行字典
+    
+    Args:
+        stock_id: 股票ID
+        quote_data: 行情数据，收盘价可以是'price'或'close'字段
+        now: 写入时间，默认为当前UTC时间
+    
+    Returns:
+        Dict: 行字典
+    """
+    now = now or datetime.utcnow()
+    quote_date = quote_data.get('date')
+    if isinstance(quote_date, str):
+        quote_date = datetime.strptime(quote_date, '%Y-%m-%d').date()
+    
+    return {
+        'stock_id': stock_id,
+        'date': quote_date or datetime.now().date(),
+        'open_price': quote_data.get('open'),
+        'close_price': quote_data.get('price') or quote_data.get('close'),
+        'high_price': quote_data.get('high'),
+        'low_price': quote_data.get('low'),
+        'volume': quote_data.get('volume'),
+        'turnover': quote_data.get('turnover'),
+        'change': quote_data.get('change'),
+        'change_percent': quote_data.get('change_percent'),
+        'created_at': now,
+        'updated_at': now
+    }
+
+
+def quote_to_row(quote: StockSnapshot) -> Dict[str, Any]:
+    """
+    将最新行情快照转换为与build_quote_row相同结构的行字典
+    
+    Args:
+        quote: 最新行情快照
+    
+    Returns:
+        Dict: 行字典
+    """
+    return {
+        'stock_id': quote.stock_id,
+        'date': quote.date,
+        'open_price': quote.open_price,
+        'close_price': quote.close_price,
+        'high_price': quote.high_price,
+        'low_price': quote.low_price,
+        'volume': quote.volume,
+        'turnover': quote.turnover,
+        'change': quote.change,
+        'change_percent': quote.change_percent,
+        'created_at': quote.created_at,
+        'updated_at': quote.updated_at
+    }
+
+
+def upsert_quote_rows(rows: List[Dict[str, Any]], overwrite: bool = True,
+                      chunk_size: Optional[int] = None, newer_only: bool = False) -> int:
+    """
+    批量UPSERT行情行（可包含多只股票）并刷新这些股票的最新行情快照，不提交事务
+    
+    Args:
+        rows: build_quote_row生成的行字典列表
+        overwrite: 是否覆盖已存在日期的记录，为False时只插入新日期的记录
+        chunk_size: 每次executemany的行数，默认使用QUOTE_UPSERT_CHUNK_SIZE配置
+        newer_only: 是否只在新行的updated_at不早于已有记录时覆盖（实时行情可能由多个进程写入）
+    
+    Returns:
+        int: 写入的行数
+    """
+    chunk_size = chunk_size or current_app.config.get('QUOTE_UPSERT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    written = bulk_upsert(
+        db.session, StockQuote.__table__, rows,
+        index_elements=('stock_id', 'date'),
+        update_columns=QUOTE_UPDATE_COLUMNS if overwrite else None,
+        keep_existing_on_null=True,
+        chunk_size=chunk_size,
+        newer_column='updated_at' if newer_only else None
+    )
+    refresh_stock_snapshots({row['stock_id'] for row in rows})
+    return written
+
+
+# 最新行情快照表的列，与stock_quotes同名
+SNAPSHOT_COLUMNS = (
+    'date', 'open_price', 'close_price', 'high_price', 'low_price', 'volume',
+    'turnover', 'change', 'change_percent', 'created_at', 'updated_at'
+)
+
+# 每条刷新最新行情快照的SQL包含的股票数
+SNAPSHOT_CHUNK_SIZE = 500
+
+
+def refresh_stock_snapshots(stock_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    从stock_quotes重新生成股票的最新行情快照，不提交事务
+    
+    在行情写入的同一事务中调用，按股票取日期最大的一条行情UPSERT到stock_snapshots，
+    读取的是合并空值之后的实际行情，保证快照与行情表一致。
+    
+    Args:
+        stock_ids: 股票ID，为空时刷新所有有行情的股票
+    
+    Returns:
+        int: 写入的快照数
+    """
+    quotes = StockQuote.__table__
+    if stock_ids is None:
+        chunks = [None]
+    else:
+        ids = sorted(set(stock_ids))
+        chunks = [ids[i:i + SNAPSHOT_CHUNK_SIZE] for i in range(0, len(ids), SNAPSHOT_CHUNK_SIZE)]
+    
+    written = 0
+    for chunk in chunks:
+        latest = select(quotes.c.stock_id, func.max(quotes.c.date).label('max_date'))
+        if chunk is not None:
+            latest = latest.where(quotes.c.stock_id.in_(chunk))
+        latest = latest.group_by(quotes.c.stock_id).subquery()
+        
+        rows = db.session.execute(
+            select(quotes.c.stock_id, *(quotes.c[column] for column in SNAPSHOT_COLUMNS)).join(
+                latest, and_(latest.c.stock_id == quotes.c.stock_id,
+                             latest.c.max_date == quotes.c.date)
+            )
+        ).mappings().all()
+        written += bulk_upsert(
+            db.session, StockSnapshot.__table__, [dict(row) for row in rows],
+            index_elements=('stock_id',),
+            update_columns=SNAPSHOT_COLUMNS
+        )
+    return written
+
+
+def ensure_stock_snapshots() -> int:
+    """
+    最新行情快照表为空而已有行情时（如升级后首次启动）从行情表生成全部快照并提交
+    
+    Returns:
+        int: 写入的快照数
+    """
+    if db.session.query(StockSnapshot.stock_id).first() is not None:
+        return 0
+    if db.session.query(StockQuote.id).first() is None:
+        return 0
+    written = refresh_stock_snapshots()
+    db.session.commit()
+    logger.info(f"已生成 {written} 只股票的最新行情快照")
+    return written
+
+
 def update_stock_quote(stock_id: int, quote_data: Dict[str, Any]) -> None:
     """
     更新股票行情数据
@@ -479,101 +1065,127 @@ def update_stock_quote(stock_id: int, quote_data: Dict[str, Any]) -> None:
         quote_data: 行情数据
     """
     try:
-        # 解析日期
-        if 'date' in quote_data:
-            date = datetime.strptime(quote_data['date'], '%Y-%m-%d').date()
-        else:
-            date = datetime.now().date()
-        
-        # 查找是否已存在该日期的行情
-        quote = StockQuote.query.filter_by(stock_id=stock_id, date=date).first()
-        
-        if not quote:
-            # 创建新行情记录
-            quote = StockQuote(
-                stock_id=stock_id,
-                date=date,
-                open_price=quote_data.get('open'),
-                close_price=quote_data.get('price') or quote_data.get('close'),
-                high_price=quote_data.get('high'),
-                low_price=quote_data.get('low'),
-                volume=quote_data.get('volume'),
-                turnover=quote_data.get('turnover'),
-                change=quote_data.get('change'),
-                change_percent=quote_data.get('change_percent')
-            )
-            db.session.add(quote)
-        else:
-            # 更新已有行情
-            quote.open_price = quote_data.get('open', quote.open_price)
-            quote.close_price = quote_data.get('price') or quote_data.get('close', quote.close_price)
-            quote.high_price = quote_data.get('high', quote.high_price)
-            quote.low_price = quote_data.get('low', quote.low_price)
-            quote.volume = quote_data.get('volume', quote.volume)
-            quote.turnover = quote_data.get('turnover', quote.turnover)
-            quote.change = quote_data.get('change', quote.change)
-            quote.change_percent = quote_data.get('change_percent', quote.change_percent)
-        
+        row = build_quote_row(stock_id, quote_data)
+        upsert_quote_rows([row])
+        expire_indicator_states(stock_id, row['date'])
         db.session.commit()
+        update_quote_board([row])
+        sync_daily_history(stock_id, row['date'], row['date'])
+        invalidate_stock_cache(stock_id, row['date'])
     except Exception as e:
         db.session.rollback()
         logger.error(f"更新股票行情失败: {str(e)}")
         raise
+    
+    stock = db.session.get(Stock, stock_id)
+    if stock:
+        publish_quotes({stock.code: quote_row_to_fields(row)})
 
 
-def bulk_update_stock_quotes(stock_id: int, quotes_data: List[Dict[str, Any]]) -> None:
+def bulk_update_stock_quotes(stock_id: int, quotes_data: List[Dict[str, Any]],
+                             overwrite: bool = True) -> None:
     """
     批量更新股票行情数据
     
     Args:
         stock_id: 股票ID
         quotes_data: 行情数据列表
+        overwrite: 是否覆盖已存在日期的记录，为False时只插入新日期的记录
     """
     try:
-        # 收集所有日期
-        dates = [datetime.strptime(q['date'], '%Y-%m-%d').date() for q in quotes_data]
-        
-        # 查询已存在的记录
-        existing_quotes = {
-            q.date: q for q in StockQuote.query.filter(
-                StockQuote.stock_id == stock_id,
-                StockQuote.date.in_(dates)
-            ).all()
-        }
-        
-        # 批量添加或更新
-        for quote_data in quotes_data:
-            date = datetime.strptime(quote_data['date'], '%Y-%m-%d').date()
-            
-            if date in existing_quotes:
-                # 更新已有记录
-                quote = existing_quotes[date]
-                quote.open_price = quote_data.get('open', quote.open_price)
-                quote.close_price = quote_data.get('close', quote.close_price)
-                quote.high_price = quote_data.get('high', quote.high_price)
-                quote.low_price = quote_data.get('low', quote.low_price)
-                quote.volume = quote_data.get('volume', quote.volume)
-                quote.turnover = quote_data.get('turnover', quote.turnover)
-                quote.change = quote_data.get('change', quote.change)
-                quote.change_percent = quote_data.get('change_percent', quote.change_percent)
-            else:
-                # 创建新记录
-                quote = StockQuote(
-                    stock_id=stock_id,
-                    date=date,
-                    open_price=quote_data.get('open'),
-                    close_price=quote_data.get('close'),
-                    high_price=quote_data.get('high'),
-                    low_price=quote_data.get('low'),
-                    volume=quote_data.get('volume'),
-                    turnover=quote_data.get('turnover'),
-                    change=quote_data.get('change'),
-                    change_percent=quote_data.get('change_percent')
-                )
-                db.session.add(quote)
-        
+        now = datetime.utcnow()
+        rows = [build_quote_row(stock_id, q, now) for q in quotes_data]
+        earliest = min((row['date'] for row in rows), default=None)
+        upsert_quote_rows(rows, overwrite)
+        if earliest:
+            expire_indicator_states(stock_id, earliest)
         db.session.commit()
+        if rows and overwrite:
+            update_quote_board([max(rows, key=lambda row: row['date'])])
+        if earliest:
+            sync_daily_history(stock_id, earliest, max(row['date'] for row in rows))
+        invalidate_stock_cache(stock_id, earliest)
     except Exception as e:
         db.session.rollback()
         logger.error(f"批量更新股票行情失败: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+
+def write_quote_row(stock_code: str, row: Dict[str, Any]) -> None:
+    """
+    保存查询时获取的实时行情
+    
+    放入写入缓冲并立即推送，不在请求中逐条提交。由后台任务批量写入数据库，
+    未启动后台任务时由写入间隔到期后的第一个请求批量写入。
+    
+    Args:
+        stock_code: 股票代码
+        row: build_quote_row生成的行字典
+    """
+    quote_write_buffer.put(stock_code, row)
+    if not quote_write_buffer.background and quote_write_buffer.due():
+        try:
+            quote_write_buffer.flush()
+        except Exception as e:
+            # 失败的行情留在缓冲中，下次到期时重试
+            logger.warning(f"行情批量写入失败: {str(e)}")
+    publish_quotes({stock_code: quote_row_to_fields(row)})
+
+
+def persist_quote_rows(rows: Dict[str, Dict[str, Any]]) -> None:
+    """
+    写入多只股票的行情行（每只股票一条），一次UPSERT后统一提交，
+    再同步K线历史存储、通知周期K线缓存，并通知其他进程
+    
+    已有记录的updated_at较新时（如其他进程的缓冲较晚写入了较早获取的行情）不覆盖。
+    
+    Args:
+        rows: 股票代码到build_quote_row生成的行字典的映射
+    """
+    try:
+        upsert_quote_rows(list(rows.values()), newer_only=True)
+        for row in rows.values():
+            expire_indicator_states(row['stock_id'], row['date'])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"批量写入实时行情失败: {str(e)}")
+        raise
+    
+    update_quote_board(rows.values())
+    for row in rows.values():
+        sync_daily_history(row['stock_id'], row['date'], row['date'])
+        notify_quotes_written(row['stock_id'], row['date'])
+    broadcast(QUOTE, [
+        {'code': code, 'stock_id': row['stock_id'], 'since': row['date'].isoformat(),
+         'host': HOST, 'fields': quote_row_to_fields(row)}
+        for code, row in rows.items()
+    ])
+
+
+def bulk_update_latest_quotes(quotes: Dict[str, Dict[str, Any]]) -> int:
+    """
+    批量写入多只股票的实时行情（每只股票一条），一次UPSERT后统一提交
+    
+    Args:
+        quotes: 股票代码到实时行情的映射，未注册的股票忽略
+    
+    Returns:
+        int: 写入的股票数
+    """
+    now = datetime.utcnow()
+    rows = {}
+    for code, quote_data in quotes.items():
+        symbol = get_symbol(code)
+        if symbol is not None and quote_data:
+            rows[code] = build_quote_row(symbol.id, quote_data, now)
+    if not rows:
+        return 0
+    
+    # 写入缓冲中的旧行情不再需要，避免之后覆盖本次写入
+    quote_write_buffer.discard(rows)
+    persist_quote_rows(rows)
+    for code in rows:
+        quote_cache.invalidate(code)
+    publish_quotes({code: quote_row_to_fields(row) for code, row in rows.items()})
+    return len(rows)
@@ -0,0 +1,171 @@
+"""
+股票系统 - 股票代码注册服务
+
+维护进程内的股票代码注册表。应用启动时从stocks表批量加载（表尚不存在时推迟到首次查询），
+之后通过会话事件在事务提交后同步Stock的新增、修改和删除，回滚的改动不会生效；
+改动通过缓存失效总线通知其他进程，其他进程从数据库重新读取。
+其他进程内结构（如搜索索引）可通过add_symbol_listener订阅这些改动。
+"""
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.stock import Stock
+from app.services.invalidation_service import SYMBOL, add_invalidation_handler, add_reset_handler, broadcast
+from app.utils.symbol_registry import SymbolRegistry, SymbolInfo
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+# 股票代码注册表
+symbol_registry = SymbolRegistry()
+
+# 改动监听器，参数为 代码 -> 新的股票信息（删除时为None）
+SymbolListener = Callable[[Dict[str, Optional[SymbolInfo]]], None]
+_listeners: List[SymbolListener] = []
+
+_load_lock = threading.Lock()
+
+# session.info中暂存待同步改动的键
+_PENDING_KEY = 'symbol_registry_pending'
+
+_SYMBOL_COLUMNS = (Stock.id, Stock.code, Stock.name, Stock.market, Stock.industry, Stock.is_active)
+
+
+def _to_symbol(row) -> SymbolInfo:
+    """将查询行或Stock对象转换为SymbolInfo"""
+    return SymbolInfo(row.id, row.code, row.name, row.market, row.industry,
+                      row.is_active is not False)
+
+
+def add_symbol_listener(listener: SymbolListener) -> None:
+    """注册改动监听器，在注册表更新后调用"""
+    _listeners.append(listener)
+
+
+def _notify(changes: Dict[str, Optional[SymbolInfo]]) -> None:
+    """通知监听器，单个监听器失败不影响其他监听器"""
+    for listener in _listeners:
+        try:
+            listener(changes)
+        except Exception as e:
+            logger.warning(f"股票代码改动监听器执行失败: {str(e)}")
+
+
+def load_symbol_registry() -> int:
+    """
+    从数据库批量加载注册表
+
+    Returns:
+        int: 注册的股票数量
+    """
+    rows = db.session.query(*_SYMBOL_COLUMNS).all()
+    count = symbol_registry.load(_to_symbol(row) for row in rows)
+    logger.info(f"股票代码注册表已加载，共 {count} 只股票")
+    return count
+
+
+def ensure_symbol_registry() -> None:
+    """注册表尚未加载时加载"""
+    if symbol_registry.loaded:
+        return
+    with _load_lock:
+        if not symbol_registry.loaded:
+            load_symbol_registry()
+
+
+def get_symbol(stock_code: str) -> Optional[SymbolInfo]:
+    """
+    按代码获取股票基本信息
+
+    Args:
+        stock_code: 股票代码
+
+    Returns:
+        SymbolInfo: 股票基本信息，未注册时返回None
+    """
+    ensure_symbol_registry()
+    return symbol_registry.get(stock_code)
+
+
+def get_symbols() -> Iterable[SymbolInfo]:
+    """获取所有已注册的股票"""
+    ensure_symbol_registry()
+    return symbol_registry
+
+
+def refresh_symbols(stock_codes: Iterable[str]) -> None:
+    """
+    从数据库重新读取指定股票并更新注册表
+
+    用于绕过ORM会话直接写入stocks表（如批量UPSERT）之后，同时通知其他进程。
+
+    Args:
+        stock_codes: 股票代码列表
+    """
+    codes = list(set(stock_codes))
+    if not codes:
+        return
+    _reload_symbols(codes)
+    broadcast(SYMBOL, [{'code': code} for code in codes])
+
+
+def _reload_symbols(codes: List[str]) -> None:
+    """从数据库重新读取指定股票并更新注册表"""
+    changes: Dict[str, Optional[SymbolInfo]] = {code: None for code in codes}
+    for row in db.session.query(*_SYMBOL_COLUMNS).filter(Stock.code.in_(codes)).all():
+        changes[row.code] = _to_symbol(row)
+    _apply(changes)
+
+
+def _apply(changes: Dict[str, Optional[SymbolInfo]]) -> None:
+    """将改动写入注册表并通知监听器"""
+    for code, symbol in changes.items():
+        if symbol is None:
+            symbol_registry.remove(code)
+        else:
+            symbol_registry.put(symbol)
+    _notify(changes)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_stock_changes(session, flush_context) -> None:
+    """记录本次flush中Stock的改动，提交后再生效"""
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Stock):
+            pending = session.info.setdefault(_PENDING_KEY, {})
+            # 修改了代码时移除旧代码
+            for old_code in inspect(obj).attrs.code.history.deleted or ():
+                pending[old_code] = None
+            pending[obj.code] = _to_symbol(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Stock):
+            session.info.setdefault(_PENDING_KEY, {})[obj.code] = None
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_stock_changes(session) -> None:
+    """事务提交后同步注册表"""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        _apply(pending)
+        broadcast(SYMBOL, [{'code': code} for code in pending])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_stock_changes(session) -> None:
+    """事务回滚时丢弃未提交的改动"""
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _on_remote_symbols(items: List[Dict]) -> None:
+    """其他进程改动了股票基本信息，从数据库重新读取"""
+    _reload_symbols(list({item['code'] for item in items}))
+
+
+add_invalidation_handler(SYMBOL, _on_remote_symbols)
+add_reset_handler(load_symbol_registry)
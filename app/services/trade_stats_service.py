@@ -0,0 +1,253 @@
+"""
+股票系统 - 交易统计汇总服务
+
+维护user_trade_stats汇总表：每笔交易在同一事务中累加到所属的日、周、月、年
+四个周期的汇总行，统计某个时间段只需读取该周期的少量汇总行，不再扫描交易记录。
+汇总表可随时从transactions表重建。累加和重建都先锁定用户行（SELECT ... FOR UPDATE），
+重建期间该用户的新交易等待重建完成，不会在读取交易记录和写入汇总之间丢失。
+
+重建方式:
+    python -m app.services.trade_stats_service                 # 重建全部用户
+    python -m app.services.trade_stats_service --user-id 42    # 只重建一个用户
+    python -m app.services.trade_stats_service --if-empty      # 升级后首次部署：汇总表为空时才生成
+"""
+import argparse
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models.transaction import Transaction, TransactionType, UserTradeStat
+from app.models.user import User
+from app.utils.upsert import bulk_upsert
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+# 统计周期
+BUCKETS = ('day', 'week', 'month', 'year')
+
+# 汇总行中累加的列
+STAT_COLUMNS = ('buy_count', 'sell_count', 'buy_amount', 'sell_amount', 'commission', 'tax')
+
+# 汇总表的唯一键
+STAT_KEY = ('user_id', 'bucket', 'bucket_start', 'portfolio_id', 'stock_code')
+
+# 重建时每批读取的交易记录数
+REBUILD_BATCH_SIZE = 10000
+
+
+def bucket_start(bucket: str, day: date) -> date:
+    """
+    获取日期所属周期的起始日
+
+    Args:
+        bucket: 统计周期，见BUCKETS
+        day: 日期
+
+    Returns:
+        date: 周期起始日
+    """
+    if bucket == 'day':
+        return day
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    if bucket == 'year':
+        return day.replace(month=1, day=1)
+    raise ValueError(f"未知的统计周期: {bucket}")
+
+
+def period_start(period: str) -> Optional[datetime]:
+    """
+    获取统计时间段的起始时间
+
+    Args:
+        period: 时间段 ('all', 'year', 'month', 'week')
+
+    Returns:
+        datetime: 起始时间，'all'及未知的时间段返回None
+    """
+    if period not in ('year', 'month', 'week'):
+        return None
+    return datetime.combine(bucket_start(period, datetime.now().date()), datetime.min.time())
+
+
+def _stat_rows(user_id: int, portfolio_id: int, stock_code: str, stock_name: str,
+               transaction_type: TransactionType, total_amount: float, commission: float,
+               tax: float, executed_at: datetime) -> List[Dict[str, Any]]:
+    """生成一笔交易在各个周期的汇总增量行"""
+    is_buy = transaction_type == TransactionType.BUY
+    amount = total_amount or 0.0
+    values = {
+        'user_id': user_id,
+        'portfolio_id': portfolio_id,
+        'stock_code': stock_code,
+        'stock_name': stock_name or '',
+        'buy_count': 1 if is_buy else 0,
+        'sell_count': 0 if is_buy else 1,
+        'buy_amount': amount if is_buy else 0.0,
+        'sell_amount': 0.0 if is_buy else amount,
+        'commission': commission or 0.0,
+        'tax': tax or 0.0,
+        'updated_at': datetime.utcnow(),
+    }
+    day = executed_at.date()
+    return [{**values, 'bucket': bucket, 'bucket_start': bucket_start(bucket, day)}
+            for bucket in BUCKETS]
+
+
+def lock_users(user_id: int = None) -> None:
+    """
+    锁定用户行直到事务结束，使累加与重建汇总互斥（SQLite的写事务本身串行，语句无效果）
+
+    Args:
+        user_id: 用户ID(可选，为空时锁定全部用户)
+    """
+    query = select(User.id)
+    if user_id is not None:
+        query = query.where(User.id == user_id)
+    db.session.execute(query.with_for_update()).all()
+
+
+def record_transaction(transaction: Transaction) -> None:
+    """
+    把一笔交易累加到汇总表，不提交事务（与交易记录在同一事务中提交）
+
+    Args:
+        transaction: 交易记录
+    """
+    lock_users(transaction.user_id)
+    rows = _stat_rows(transaction.user_id, transaction.portfolio_id, transaction.stock_code,
+                      transaction.stock_name, transaction.transaction_type,
+                      transaction.total_amount, transaction.commission, transaction.tax,
+                      transaction.executed_at or datetime.utcnow())
+    bulk_upsert(db.session, UserTradeStat.__table__, rows, index_elements=STAT_KEY,
+                update_columns=('stock_name', 'updated_at'), increment_columns=STAT_COLUMNS)
+
+
+def get_period_stock_stats(user_id: int, portfolio_id: int = None,
+                           period: str = 'all') -> List[Tuple]:
+    """
+    读取时间段内按股票汇总的交易统计
+
+    'all'汇总全部年度行，其他时间段只读取当前周期的汇总行。
+
+    Args:
+        user_id: 用户ID
+        portfolio_id: 投资组合ID(可选，为空时汇总全部组合)
+        period: 时间段 ('all', 'year', 'month', 'week')
+
+    Returns:
+        List[Tuple]: (股票代码, 股票名称, 买入次数, 卖出次数, 买入金额, 卖出金额, 佣金, 税费)
+    """
+    query = db.session.query(
+        UserTradeStat.stock_code,
+        func.max(UserTradeStat.stock_name),
+        *[func.sum(getattr(UserTradeStat, column)) for column in STAT_COLUMNS]
+    ).filter(UserTradeStat.user_id == user_id)
+
+    if portfolio_id:
+        query = query.filter(UserTradeStat.portfolio_id == portfolio_id)
+
+    start = period_start(period)
+    if start is None:
+        query = query.filter(UserTradeStat.bucket == 'year')
+    else:
+        query = query.filter(UserTradeStat.bucket == period,
+                             UserTradeStat.bucket_start == start.date())
+
+    return query.group_by(UserTradeStat.stock_code).all()
+
+
+def rebuild_trade_stats(user_id: int = None) -> int:
+    """
+    从交易记录重建汇总表并提交
+
+    在同一事务中先锁定用户行并删除旧的汇总，再分批读取交易记录并在内存中按汇总键累加，
+    内存占用与汇总行数成正比。锁定期间的新交易等待重建提交后再累加。
+
+    Args:
+        user_id: 用户ID(可选，为空时重建全部用户)
+
+    Returns:
+        int: 写入的汇总行数
+    """
+    totals: Dict[Tuple, Dict[str, Any]] = {}
+    try:
+        # 先锁定并写入，SQLite在此获得写锁，其他数据库由用户行锁阻止并发的累加
+        lock_users(user_id)
+        delete = UserTradeStat.__table__.delete()
+        if user_id is not None:
+            delete = delete.where(UserTradeStat.user_id == user_id)
+        db.session.execute(delete)
+
+        query = db.session.query(
+            Transaction.user_id, Transaction.portfolio_id, Transaction.stock_code,
+            Transaction.stock_name, Transaction.transaction_type, Transaction.total_amount,
+            Transaction.commission, Transaction.tax, Transaction.executed_at
+        )
+        if user_id is not None:
+            query = query.filter(Transaction.user_id == user_id)
+
+        for transaction in query.yield_per(REBUILD_BATCH_SIZE):
+            for row in _stat_rows(*transaction):
+                key = tuple(row[name] for name in STAT_KEY)
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = row
+                else:
+                    for column in STAT_COLUMNS:
+                        total[column] += row[column]
+
+        rows = list(totals.values())
+        for offset in range(0, len(rows), REBUILD_BATCH_SIZE):
+            db.session.execute(UserTradeStat.__table__.insert(), rows[offset:offset + REBUILD_BATCH_SIZE])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"重建交易统计汇总失败: {str(e)}")
+        raise
+
+    logger.info(f"已重建 {len(totals)} 条交易统计汇总")
+    return len(totals)
+
+
+def ensure_trade_stats() -> int:
+    """
+    汇总表为空而已有交易记录时（如升级后首次部署）从交易记录生成汇总
+
+    由部署时的命令调用（--if-empty），不在应用启动时执行，避免多个worker同时重建。
+
+    Returns:
+        int: 写入的汇总行数
+    """
+    if db.session.query(UserTradeStat.id).first() is not None:
+        return 0
+    if db.session.query(Transaction.id).first() is None:
+        return 0
+    return rebuild_trade_stats()
+
+
+def main() -> None:
+    """从交易记录重建汇总表"""
+    from app import create_app
+    from app.config import config
+
+    parser = argparse.ArgumentParser(description='重建交易统计汇总表')
+    parser.add_argument('--user-id', type=int, help='只重建指定用户')
+    parser.add_argument('--if-empty', action='store_true', help='只在汇总表为空而已有交易记录时生成')
+    args = parser.parse_args()
+
+    app = create_app(config[os.environ.get('FLASK_CONFIG') or 'default'])
+    with app.app_context():
+        written = ensure_trade_stats() if args.if_empty else rebuild_trade_stats(args.user_id)
+    print(f"已写入 {written} 条交易统计汇总")
+
+
+if __name__ == '__main__':
+    main()
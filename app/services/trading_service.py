@@ -3,13 +3,13 @@
 """
 import logging
 from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime, timedelta
 
 from app import db
-from app.models.transaction import Transaction, TransactionType
+from app.models.transaction import Transaction
 from app.models.portfolio import Portfolio, PortfolioHolding
-from app.services.stock_service import get_stock_data
+from app.services.stock_service import resolve_symbol
 from app.services.portfolio_service import get_default_portfolio
+from app.services.trade_stats_service import get_period_stock_stats, record_transaction
 
 # 日志配置
 logger = logging.getLogger(__name__)
@@ -43,17 +43,19 @@ def execute_buy(user_id: int, portfolio_id: int, stock_code: str,
             if not portfolio:
                 return False, "投资组合不存在且无法创建默认组合", None
         
-        # 获取股票信息
-        stock_data = get_stock_data(stock_code)
-        if 'error' in stock_data:
-            return False, f"获取股票信息失败: {stock_data['error']}", None
+        # 校验股票代码
+        symbol = resolve_symbol(stock_code)
+        if symbol is None:
+            return False, f"无法识别股票代码 {stock_code}", None
+        if not symbol.is_active:
+            return False, f"股票 {stock_code} 已退市", None
         
         # 创建交易记录
         transaction = Transaction.create_buy_transaction(
             user_id=user_id,
             portfolio_id=portfolio.id,
             stock_code=stock_code,
-            stock_name=stock_data.get('name', '未知'),
+            stock_name=symbol.name,
             quantity=quantity,
             price=price,
             commission=commission,
@@ -62,6 +64,7 @@ def execute_buy(user_id: int, portfolio_id: int, stock_code: str,
         )
         
         db.session.add(transaction)
+        record_transaction(transaction)
         
         # 更新或创建持仓
         holding = PortfolioHolding.query.filter_by(
@@ -76,7 +79,7 @@ def execute_buy(user_id: int, portfolio_id: int, stock_code: str,
             holding = PortfolioHolding(
                 portfolio_id=portfolio.id,
                 stock_code=stock_code,
-                stock_name=stock_data.get('name', '未知'),
+                stock_name=symbol.name,
                 quantity=quantity,
                 average_cost=price
             )
@@ -126,17 +129,17 @@ def execute_sell(user_id: int, portfolio_id: int, stock_code: str,
         if holding.quantity < quantity:
             return False, "持仓数量不足", None
         
-        # 获取股票信息
-        stock_data = get_stock_data(stock_code)
-        if 'error' in stock_data:
-            return False, f"获取股票信息失败: {stock_data['error']}", None
+        # 校验股票代码
+        symbol = resolve_symbol(stock_code)
+        if symbol is None:
+            return False, f"无法识别股票代码 {stock_code}", None
         
         # 创建交易记录
         transaction = Transaction.create_sell_transaction(
             user_id=user_id,
             portfolio_id=portfolio.id,
             stock_code=stock_code,
-            stock_name=stock_data.get('name', holding.stock_name),
+            stock_name=symbol.name,
             quantity=quantity,
             price=price,
             commission=commission,
@@ -145,6 +148,7 @@ def execute_sell(user_id: int, portfolio_id: int, stock_code: str,
         )
         
         db.session.add(transaction)
+        record_transaction(transaction)
         
         # 更新持仓
         holding.update_after_trade(-quantity, price)
@@ -223,6 +227,8 @@ def get_transaction_stats(user_id: int, portfolio_id: int = None,
                          period: str = 'all') -> Dict[str, Any]:
     """
     获取交易统计信息
+
+    从交易统计汇总表读取时间段内按股票汇总的行，不再扫描交易记录。
     
     Args:
         user_id: 用户ID
@@ -233,49 +239,32 @@ def get_transaction_stats(user_id: int, portfolio_id: int = None,
         Dict: 统计信息
     """
     try:
-        query = Transaction.query.filter_by(user_id=user_id)
-        
-        if portfolio_id:
-            query = query.filter_by(portfolio_id=portfolio_id)
-        
-        # 添加时间过滤
-        if period == 'year':
-            year_start = datetime.now().replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-            query = query.filter(Transaction.executed_at >= year_start)
-        elif period == 'month':
-            month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            query = query.filter(Transaction.executed_at >= month_start)
-        elif period == 'week':
-            today = datetime.now().date()
-            week_start = today - timedelta(days=today.weekday())
-            query = query.filter(Transaction.executed_at >= week_start)
+        rows = get_period_stock_stats(user_id, portfolio_id, period)
         
-        transactions = query.all()
+        # 汇总各股票的统计
+        total_buy = total_sell = total_commission = total_tax = 0.0
+        buy_count = sell_count = 0
+        stock_counts: Dict[str, int] = {}
+        stock_names: Dict[str, str] = {}
+        for code, name, buys, sells, buy_amount, sell_amount, commission, tax in rows:
+            total_buy += buy_amount or 0.0
+            total_sell += sell_amount or 0.0
+            buy_count += buys or 0
+            sell_count += sells or 0
+            total_commission += commission or 0.0
+            total_tax += tax or 0.0
+            stock_counts[code] = (buys or 0) + (sells or 0)
+            stock_names[code] = name or ''
         
-        # 计算统计数据
-        total_buy = sum(t.total_amount for t in transactions if t.transaction_type == TransactionType.BUY)
-        total_sell = sum(t.total_amount for t in transactions if t.transaction_type == TransactionType.SELL)
-        total_commission = sum(t.commission for t in transactions)
-        total_tax = sum(t.tax for t in transactions)
         total_fee = total_commission + total_tax
         net_cash_flow = total_sell - total_buy - total_fee
-        transaction_count = len(transactions)
-        buy_count = sum(1 for t in transactions if t.transaction_type == TransactionType.BUY)
-        sell_count = sum(1 for t in transactions if t.transaction_type == TransactionType.SELL)
+        transaction_count = buy_count + sell_count
+        stock_count = len(stock_counts)
         
-        # 获取交易的股票数
-        stock_codes = set(t.stock_code for t in transactions)
-        stock_count = len(stock_codes)
-        
-        # 统计最活跃的股票
-        if transactions:
-            from collections import Counter
-            stock_counter = Counter(t.stock_code for t in transactions)
-            most_active_stocks = stock_counter.most_common(5)
-            most_active = [{'code': code, 'name': next((t.stock_name for t in transactions if t.stock_code == code), ''), 'count': count} 
-                          for code, count in most_active_stocks]
-        else:
-            most_active = []
+        # 统计最活跃的股票（次数相同时按代码排序，保证结果稳定）
+        most_active_stocks = sorted(stock_counts.items(), key=lambda item: (-item[1], item[0]))[:5]
+        most_active = [{'code': code, 'name': stock_names[code], 'count': count}
+                       for code, count in most_active_stocks]
         
         return {
             'total_buy': total_buy,
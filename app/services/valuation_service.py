@@ -0,0 +1,125 @@
+"""
+股票系统 - 投资组合估值服务
+
+一次性加载投资组合持仓，并批量解析所有持仓股票的价格，
+生成可供投资组合服务、仪表盘和API复用的估值对象。
+"""
+import logging
+from typing import List, Dict, Any
+
+from app.models.portfolio import Portfolio, PortfolioHolding
+from app.services.stock_service import get_stock_prices
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+
+class HoldingValuation:
+    """单个持仓的估值结果"""
+
+    def __init__(self, holding: PortfolioHolding, current_price: float):
+        """初始化持仓估值"""
+        self.holding_id = holding.id
+        self.stock_code = holding.stock_code
+        self.stock_name = holding.stock_name
+        self.quantity = holding.quantity
+        self.average_cost = holding.average_cost
+        self.current_price = current_price
+        self.current_value = self.quantity * current_price
+        self.total_cost = self.quantity * self.average_cost
+        self.profit = self.current_value - self.total_cost
+        self.profit_percentage = (self.profit / self.total_cost) * 100 if self.total_cost else 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式（与Portfolio.get_holdings_summary保持一致）"""
+        return {
+            'stock_code': self.stock_code,
+            'stock_name': self.stock_name,
+            'quantity': self.quantity,
+            'average_cost': self.average_cost,
+            'current_price': self.current_price,
+            'current_value': self.current_value,
+            'total_cost': self.total_cost,
+            'profit': self.profit,
+            'profit_percentage': self.profit_percentage
+        }
+
+
+class PortfolioValuation:
+    """投资组合的估值结果"""
+
+    def __init__(self, portfolio: Portfolio, holdings: List[HoldingValuation]):
+        """初始化投资组合估值"""
+        self.portfolio_id = portfolio.id
+        self.holdings = holdings
+        self.total_value = sum(h.current_value for h in holdings)
+        self.total_cost = sum(h.total_cost for h in holdings)
+        self.total_profit = self.total_value - self.total_cost
+        self.profit_percentage = (self.total_profit / self.total_cost) * 100 if self.total_cost else 0
+        self.holdings_count = len(holdings)
+
+    def get_holdings_summary(self) -> List[Dict[str, Any]]:
+        """获取持仓汇总信息"""
+        return [h.to_dict() for h in self.holdings]
+
+    def __repr__(self) -> str:
+        """返回估值结果的字符串表示"""
+        return f"<PortfolioValuation {self.portfolio_id} value={self.total_value:.2f}>"
+
+
+def _build_valuation(portfolio: Portfolio, holdings: List[PortfolioHolding],
+                     prices: Dict[str, float]) -> PortfolioValuation:
+    """根据已加载的持仓和价格构建估值对象"""
+    holding_valuations = [
+        # 无法获取价格时使用平均成本，与PortfolioHolding.get_current_price保持一致
+        HoldingValuation(holding, prices.get(holding.stock_code, holding.average_cost))
+        for holding in holdings
+    ]
+    return PortfolioValuation(portfolio, holding_valuations)
+
+
+def value_portfolio(portfolio: Portfolio) -> PortfolioValuation:
+    """
+    计算单个投资组合的估值
+
+    Args:
+        portfolio: 投资组合对象
+
+    Returns:
+        PortfolioValuation: 估值结果
+    """
+    holdings = portfolio.holdings.all()
+    prices = get_stock_prices([h.stock_code for h in holdings])
+    return _build_valuation(portfolio, holdings, prices)
+
+
+def value_portfolios(portfolios: List[Portfolio]) -> Dict[int, PortfolioValuation]:
+    """
+    批量计算多个投资组合的估值
+
+    所有投资组合的持仓通过一次查询加载，价格通过一次批量查询解析。
+
+    Args:
+        portfolios: 投资组合列表
+
+    Returns:
+        Dict[int, PortfolioValuation]: 投资组合ID到估值结果的映射
+    """
+    if not portfolios:
+        return {}
+
+    portfolio_ids = [p.id for p in portfolios]
+    holdings_by_portfolio: Dict[int, List[PortfolioHolding]] = {pid: [] for pid in portfolio_ids}
+    for holding in PortfolioHolding.query.filter(
+        PortfolioHolding.portfolio_id.in_(portfolio_ids)
+    ).order_by(PortfolioHolding.id).all():
+        holdings_by_portfolio[holding.portfolio_id].append(holding)
+
+    prices = get_stock_prices([
+        h.stock_code for holdings in holdings_by_portfolio.values() for h in holdings
+    ])
+
+    return {
+        p.id: _build_valuation(p, holdings_by_portfolio[p.id], prices)
+        for p in portfolios
+    }
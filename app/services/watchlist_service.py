@@ -6,7 +6,7 @@ from typing import List, Dict, Any, Optional, Tuple
 
 from app import db
 from app.models.watchlist import WatchList, WatchListStock
-from app.services.stock_service import get_stock_data
+from app.services.stock_service import resolve_symbol
 
 # 日志配置
 logger = logging.getLogger(__name__)
@@ -216,15 +216,15 @@ def add_stock_to_watchlist(watchlist_id: int, user_id: int, stock_code: str,
                 db.session.commit()
             return True, "股票已在观察列表中", existing
         
-        # 获取股票信息
-        stock_data = get_stock_data(stock_code)
-        if 'error' in stock_data:
-            return False, f"获取股票信息失败: {stock_data['error']}", None
+        # 校验股票代码
+        symbol = resolve_symbol(stock_code)
+        if symbol is None:
+            return False, f"无法识别股票代码 {stock_code}", None
         
         # 添加到观察列表
         watchlist_stock = watchlist.add_stock(
             stock_code=stock_code,
-            stock_name=stock_data.get('name', '未知'),
+            stock_name=symbol.name,
             notes=notes
         )
         
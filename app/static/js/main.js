@@ -125,5 +125,78 @@ axios.interceptors.response.use(
     }
 );
 
+// 实时行情推送：连接/quotes命名空间并订阅股票，服务端按刷新间隔批量推送变化的字段
+const QuoteStream = {
+    socket: null,
+    codes: new Set(),
+    quotes: {},
+    handlers: [],
+
+    // 浏览器是否支持（页面未加载socket.io客户端时返回false）
+    available() {
+        return typeof io !== 'undefined';
+    },
+
+    // 建立连接，重连后重新订阅
+    connect() {
+        if (this.socket || !this.available()) {
+            return this.socket;
+        }
+        this.socket = io(globalConfig.socketUrl + '/quotes');
+        this.socket.on('connect', () => {
+            if (this.codes.size > 0) {
+                this._subscribe(Array.from(this.codes));
+            }
+        });
+        // 每帧为 {代码: 变化的字段}，处理完后确认，服务端据此控制发送速度
+        this.socket.on('quotes', (frame, ack) => {
+            Object.entries(frame).forEach(([code, fields]) => this._apply({ code: code, ...fields }));
+            if (typeof ack === 'function') {
+                ack();
+            }
+        });
+        return this.socket;
+    },
+
+    // 订阅股票，订阅确认时返回的快照按推送处理
+    subscribe(codes) {
+        codes.forEach(code => this.codes.add(code));
+        this.connect();
+        if (this.socket && this.socket.connected) {
+            this._subscribe(codes);
+        }
+    },
+
+    // 取消订阅
+    unsubscribe(codes) {
+        codes.forEach(code => {
+            this.codes.delete(code);
+            delete this.quotes[code];
+        });
+        if (this.socket && this.socket.connected) {
+            this.socket.emit('unsubscribe', { codes: codes });
+        }
+    },
+
+    // 注册行情回调，参数为合并后的完整行情和本次变化的字段
+    onQuote(handler) {
+        this.handlers.push(handler);
+    },
+
+    _subscribe(codes) {
+        this.socket.emit('subscribe', { codes: codes }, (response) => {
+            if (response && response.status === 'success') {
+                Object.values(response.data.quotes).forEach(quote => this._apply(quote));
+            }
+        });
+    },
+
+    _apply(update) {
+        const quote = Object.assign(this.quotes[update.code] || {}, update);
+        this.quotes[update.code] = quote;
+        this.handlers.forEach(handler => handler(quote, update));
+    }
+};
+
 // 挂载Vue应用
 app.use(ElementPlus).mount('#app'); 
\ No newline at end of file
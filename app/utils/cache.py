@@ -0,0 +1,116 @@
+"""
+股票系统 - 进程内缓存工具
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    带过期时间的有界LRU缓存
+
+    每个条目有独立的过期时间，容量满时淘汰最久未使用的条目。
+    所有操作在锁内完成，可在多线程环境下共享。
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        """
+        初始化缓存
+
+        Args:
+            max_size: 最大条目数
+            ttl: 默认过期时间（秒）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def configure(self, max_size: Optional[int] = None, ttl: Optional[float] = None) -> None:
+        """调整缓存容量和默认过期时间"""
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl is not None:
+                self.ttl = ttl
+            self._evict_overflow()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取缓存值，不存在或已过期时返回default"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        写入缓存值
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 该条目的过期时间（秒），默认使用缓存的ttl
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            self._evict_overflow()
+
+    def invalidate(self, key: Hashable) -> bool:
+        """使指定条目失效，返回条目是否存在"""
+        with self._lock:
+            if self._data.pop(key, None) is None:
+                return False
+            self.invalidations += 1
+            return True
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+    def _evict_overflow(self) -> None:
+        """淘汰超出容量的最久未使用条目（调用方需持有锁）"""
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        """返回当前条目数（包含尚未清理的过期条目）"""
+        return len(self._data)
@@ -0,0 +1,324 @@
+"""
+股票系统 - 列式K线历史存储
+
+每只股票的日K线保存为一个.npy文件，内容是形状为(len(COLUMNS), N)的float64矩阵，
+每一行是一列数据（日期为1970-01-01起的天数），按日期升序排列。
+读取时通过np.load(mmap_mode='r')映射文件，按日期二分查找后返回各列的切片视图，
+不复制数据；多个进程映射同一文件时共享操作系统的页缓存。每个映射占用一个文件描述符，
+进程内只保留最近使用的max_maps个映射。
+
+矩阵按列优先(Fortran)顺序存储，同一天的各列数据在文件中相邻，文件头为固定长度并为
+K线数的增长预留了位置。已写入的数据不会被原地修改，读者持有的切片视图始终有效：
+- 合并的K线都晚于最后一根时追加在文件末尾，再更新文件头中的K线数
+- 实时行情更新最后一天的K线时，新版本同样追加在末尾，读取时以最后一个版本为准
+- 其他情况（补写更早的历史、最后一天的版本数达到上限、新的一天开始时已有多个版本）
+  先写临时文件再原子替换，已映射旧文件的读者不受影响
+
+存储目录按部署标识（如数据库地址）的摘要分开，不同数据库不会读到对方的文件。
+"""
+import ast
+import hashlib
+import os
+import struct
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+from typing import Dict, Hashable, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows下不支持文件锁，仅用于开发环境
+    fcntl = None
+
+# 存储的列，顺序即矩阵的行顺序
+COLUMNS = ('date', 'open', 'high', 'low', 'close', 'volume', 'turnover', 'change', 'change_percent')
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+# .npy文件头的固定长度（含魔数），K线数增长时原地改写
+_HEADER_SIZE = 128
+_MAGIC = b'\x93NUMPY\x01\x00'
+_ITEM_SIZE = np.dtype('<f8').itemsize
+
+# 最后一天K线的最大版本数，达到后重写文件只保留最后一个版本
+MAX_TAIL_VERSIONS = 64
+
+# 默认保留的内存映射数
+DEFAULT_MAX_MAPS = 256
+
+
+def _header(count: int) -> bytes:
+    """生成K线数为count的列优先矩阵的.npy文件头"""
+    text = "{'descr': '<f8', 'fortran_order': True, 'shape': (%d, %d), }" % (len(COLUMNS), count)
+    body_size = _HEADER_SIZE - len(_MAGIC) - 2
+    return _MAGIC + struct.pack('<H', body_size) + text.ljust(body_size - 1).encode('latin1') + b'\n'
+
+
+def _to_days(day: date) -> float:
+    """将日期转换为1970-01-01起的天数"""
+    return float((np.datetime64(day, 'D') - _EPOCH).astype(np.int64))
+
+
+def _to_matrix(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """将各列数组组装为存储矩阵"""
+    matrix = np.empty((len(COLUMNS), len(columns['date'])))
+    matrix[0] = (np.asarray(columns['date'], dtype='datetime64[D]') - _EPOCH).astype(np.int64)
+    for i, name in enumerate(COLUMNS[1:], start=1):
+        matrix[i] = columns[name]
+    return matrix
+
+
+def _tail_start(days: np.ndarray) -> int:
+    """获取最后一天K线第一个版本的下标，没有K线时返回-1"""
+    count = len(days)
+    if count < 2 or days[-1] != days[-2]:
+        return count - 1
+    return int(np.searchsorted(days, days[-1], 'left'))
+
+
+def _compact(matrix: np.ndarray) -> np.ndarray:
+    """去掉最后一天K线的旧版本"""
+    tail = _tail_start(matrix[0])
+    if tail >= matrix.shape[1] - 1:
+        return matrix
+    return np.hstack([matrix[:, :tail], matrix[:, -1:]])
+
+
+class HistoryStore:
+    """按股票存储的列式内存映射K线历史"""
+
+    def __init__(self, root: Optional[str] = None, max_maps: int = DEFAULT_MAX_MAPS):
+        """
+        初始化历史存储
+
+        Args:
+            root: 存储目录，为空表示不启用
+            max_maps: 进程内保留的最大内存映射数
+        """
+        self.root = root
+        self.max_maps = max_maps
+        self._maps: 'OrderedDict[Hashable, Tuple[Tuple[int, int, int], np.ndarray]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """是否已配置存储目录"""
+        return bool(self.root)
+
+    def configure(self, root: Optional[str], deployment: Optional[str] = None,
+                  max_maps: Optional[int] = None) -> None:
+        """
+        设置存储目录，目录不存在时自动创建
+
+        Args:
+            root: 存储目录，为空表示不启用
+            deployment: 部署标识（如数据库地址），实际目录为root下以其摘要命名的子目录
+            max_maps: 进程内保留的最大内存映射数
+        """
+        if root and deployment:
+            root = os.path.join(root, hashlib.sha1(deployment.encode('utf-8')).hexdigest()[:12])
+        if root:
+            os.makedirs(root, exist_ok=True)
+        with self._lock:
+            self.root = root
+            if max_maps is not None:
+                self.max_maps = max_maps
+            self._maps.clear()
+
+    def _path(self, key: Hashable) -> str:
+        """获取股票的数据文件路径"""
+        return os.path.join(self.root, f'{key}.npy')
+
+    @contextmanager
+    def lock(self, key: Hashable) -> Iterator[None]:
+        """
+        跨进程的写锁，保证构建和合并写入不会互相覆盖
+
+        构建数据时应在持有锁后再从数据库读取，锁不可重入（merge内部会加锁）。
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(self._path(key) + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self, key: Hashable) -> Optional[np.ndarray]:
+        """
+        获取股票数据矩阵的内存映射
+
+        文件被其他进程替换或追加后会自动重新映射。超过max_maps时丢弃最久未使用的映射，
+        其文件描述符在读者不再引用它的切片后释放。最后一天的K线可能有多个版本。
+
+        Args:
+            key: 股票标识
+
+        Returns:
+            Optional[np.ndarray]: 只读的(len(COLUMNS), N)矩阵，文件不存在时返回None
+        """
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._maps.pop(key, None)
+            return None
+
+        # 数据只追加或整体替换，文件大小或inode必然变化
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == signature:
+            with self._lock:
+                if key in self._maps:
+                    self._maps.move_to_end(key)
+            return cached[1]
+
+        try:
+            matrix = np.load(path, mmap_mode='r')
+        except ValueError:
+            # 其他进程正在原地改写文件头，沿用上次的映射
+            if cached is None:
+                raise
+            return cached[1]
+        with self._lock:
+            self._maps[key] = (signature, matrix)
+            self._maps.move_to_end(key)
+            while len(self._maps) > self.max_maps:
+                self._maps.popitem(last=False)
+        return matrix
+
+    def read(self, key: Hashable, start: Optional[date] = None,
+             end: Optional[date] = None) -> Optional[Dict[str, np.ndarray]]:
+        """
+        读取[start, end]区间内的K线
+
+        除date列转换为datetime64[D]外，其余列均为内存映射的切片视图；
+        区间包含有多个版本的最后一天时返回去掉旧版本后的副本。
+
+        Args:
+            key: 股票标识
+            start: 开始日期（含），为空表示不限
+            end: 结束日期（含），为空表示不限
+
+        Returns:
+            Optional[Dict[str, np.ndarray]]: 各列数组，股票尚未写入存储时返回None
+        """
+        matrix = self.load(key)
+        if matrix is None:
+            return None
+
+        days = matrix[0]
+        count = len(days)
+        lo = int(np.searchsorted(days, _to_days(start), 'left')) if start else 0
+        hi = int(np.searchsorted(days, _to_days(end), 'right')) if end else count
+        hi = max(hi, lo)
+        tail = _tail_start(days)
+        if tail < count - 1 and lo <= tail < hi:
+            window = np.hstack([matrix[:, lo:tail], matrix[:, -1:]])
+        else:
+            window = matrix[:, lo:hi]
+
+        result = {name: window[i] for i, name in enumerate(COLUMNS)}
+        result['date'] = _EPOCH + window[0].astype(np.int64)
+        return result
+
+    def write(self, key: Hashable, columns: Dict[str, np.ndarray]) -> None:
+        """
+        写入股票的全部K线，覆盖已有数据（调用方需持有lock）
+
+        Args:
+            key: 股票标识
+            columns: 各列数组，date为datetime64[D]，需按日期升序排列
+        """
+        self._replace(key, _to_matrix(columns))
+
+    def merge(self, key: Hashable, columns: Dict[str, np.ndarray]) -> bool:
+        """
+        将部分日期的K线合并到已有数据中，相同日期以新数据为准
+
+        股票尚未写入存储时不做处理，首次读取时再完整构建。
+
+        Args:
+            key: 股票标识
+            columns: 各列数组，date为datetime64[D]
+
+        Returns:
+            bool: 是否已合并
+        """
+        new = _to_matrix(columns)
+        new = new[:, np.argsort(new[0], kind='stable')]
+        with self.lock(key):
+            existing = self.load(key)
+            if existing is None:
+                return False
+            if not new.shape[1]:
+                return True
+            count = existing.shape[1]
+            if self._appendable(key):
+                versions = count - _tail_start(existing[0])
+                if count == 0 or (versions == 1 and new[0][0] > existing[0][-1]):
+                    self._append(key, new, count)
+                    return True
+                if new[0][0] == new[0][-1] == existing[0][-1] and versions < MAX_TAIL_VERSIONS:
+                    # 最后一天的新版本
+                    self._append(key, new[:, -1:], count)
+                    return True
+            current = _compact(existing)
+            keep = ~np.isin(current[0], new[0])
+            merged = np.hstack([current[:, keep], new])
+            self._replace(key, merged[:, np.argsort(merged[0], kind='stable')])
+        return True
+
+    def remove(self, key: Hashable) -> None:
+        """删除股票的数据文件，下次读取时重新构建"""
+        with self._lock:
+            self._maps.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _appendable(self, key: Hashable) -> bool:
+        """数据文件是否为可原地追加的固定文件头格式（旧格式的文件在下次重写时转换）"""
+        with open(self._path(key), 'rb') as f:
+            head = f.read(_HEADER_SIZE)
+        if len(head) < _HEADER_SIZE or not head.startswith(_MAGIC):
+            return False
+        if struct.unpack_from('<H', head, len(_MAGIC))[0] != _HEADER_SIZE - len(_MAGIC) - 2:
+            return False
+        try:
+            header = ast.literal_eval(head[len(_MAGIC) + 2:].decode('latin1').strip())
+        except (ValueError, SyntaxError):
+            return False
+        return header.get('fortran_order') is True and header.get('descr') == '<f8'
+
+    def _append(self, key: Hashable, matrix: np.ndarray, count: int) -> None:
+        """在已有的count根K线之后追加，先写数据再更新文件头中的K线数"""
+        with open(self._path(key), 'r+b') as f:
+            f.seek(_HEADER_SIZE + count * len(COLUMNS) * _ITEM_SIZE)
+            f.write(np.ascontiguousarray(matrix.T).tobytes())
+            f.flush()
+            f.seek(0)
+            f.write(_header(count + matrix.shape[1]))
+
+    def _replace(self, key: Hashable, matrix: np.ndarray) -> None:
+        """写入临时文件后原子替换数据文件"""
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_header(matrix.shape[1]))
+            # 列优先顺序即转置矩阵的行优先顺序
+            f.write(np.ascontiguousarray(matrix.T).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def __repr__(self) -> str:
+        """返回历史存储的字符串表示"""
+        return f"<HistoryStore {self.root or '(disabled)'}>"
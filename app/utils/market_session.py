@@ -0,0 +1,221 @@
+"""
+股票系统 - 交易时段与行情新鲜度策略
+
+根据市场的交易时段判断数据库中的行情是否需要重新获取：
+收盘后采集的行情在下一次开盘前一直有效，盘中采集的行情按最大时效刷新。
+"""
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+
+from app.utils.trading_calendar import get_calendar
+
+
+class MarketSession(Enum):
+    """交易时段枚举"""
+    PRE_OPEN = 'pre_open'  # 交易日开盘前（含集合竞价）
+    OPEN = 'open'  # 连续竞价
+    LUNCH_BREAK = 'lunch_break'  # 午间休市
+    CLOSED = 'closed'  # 交易日收盘后
+    HOLIDAY = 'holiday'  # 非交易日
+
+
+class MarketSchedule:
+    """单个市场的交易时间表"""
+
+    def __init__(self, timezone: str, pre_open: time,
+                 sessions: List[Tuple[time, time]]):
+        """
+        初始化交易时间表
+
+        Args:
+            timezone: 市场所在时区
+            pre_open: 开盘集合竞价开始时间
+            sessions: 连续交易时段列表，按时间顺序排列
+        """
+        self.timezone = pytz.timezone(timezone)
+        self.pre_open = pre_open
+        self.sessions = sessions
+
+    @property
+    def open_time(self) -> time:
+        """开盘时间"""
+        return self.sessions[0][0]
+
+    @property
+    def close_time(self) -> time:
+        """收盘时间"""
+        return self.sessions[-1][1]
+
+
+# 各市场交易时间表，未知市场按A股处理
+_A_SHARE_SCHEDULE = MarketSchedule(
+    'Asia/Shanghai', time(9, 15),
+    [(time(9, 30), time(11, 30)), (time(13, 0), time(15, 0))]
+)
+MARKET_SCHEDULES: Dict[str, MarketSchedule] = {
+    'SH': _A_SHARE_SCHEDULE,
+    'SZ': _A_SHARE_SCHEDULE,
+    'HK': MarketSchedule(
+        'Asia/Hong_Kong', time(9, 0),
+        [(time(9, 30), time(12, 0)), (time(13, 0), time(16, 0))]
+    ),
+}
+
+# 盘中行情的默认最大时效（秒）
+DEFAULT_INTRADAY_MAX_AGE = 60
+
+
+def get_schedule(market: Optional[str]) -> MarketSchedule:
+    """获取市场的交易时间表"""
+    return MARKET_SCHEDULES.get(market or '', _A_SHARE_SCHEDULE)
+
+
+def is_trading_day(market: Optional[str], day: date) -> bool:
+    """判断指定日期是否为交易日"""
+    return get_calendar(market).is_session(day)
+
+
+def previous_trading_day(market: Optional[str], day: date) -> date:
+    """获取指定日期之前（不含）的最近交易日"""
+    return get_calendar(market).previous_session(day)
+
+
+def next_trading_day(market: Optional[str], day: date) -> date:
+    """获取指定日期之后（不含）的最近交易日"""
+    return get_calendar(market).next_session(day)
+
+
+def _market_now(schedule: MarketSchedule, now: Optional[datetime]) -> datetime:
+    """将时间转换为市场所在时区的时间，naive时间视为UTC"""
+    if now is None:
+        return datetime.now(pytz.utc).astimezone(schedule.timezone)
+    if now.tzinfo is None:
+        now = pytz.utc.localize(now)
+    return now.astimezone(schedule.timezone)
+
+
+def _localize(schedule: MarketSchedule, day: date, at: time) -> datetime:
+    """构造市场时区下指定日期和时间的datetime"""
+    return schedule.timezone.localize(datetime.combine(day, at))
+
+
+def get_market_session(market: Optional[str], now: Optional[datetime] = None) -> MarketSession:
+    """
+    获取市场当前所处的交易时段
+
+    Args:
+        market: 市场代码，如'SH', 'SZ', 'HK'
+        now: 当前时间，naive时间视为UTC，默认为当前时间
+
+    Returns:
+        MarketSession: 交易时段
+    """
+    schedule = get_schedule(market)
+    local_now = _market_now(schedule, now)
+    if not is_trading_day(market, local_now.date()):
+        return MarketSession.HOLIDAY
+
+    current = local_now.time()
+    if current < schedule.open_time:
+        return MarketSession.PRE_OPEN
+    if current >= schedule.close_time:
+        return MarketSession.CLOSED
+    for start, end in schedule.sessions:
+        if start <= current < end:
+            return MarketSession.OPEN
+    return MarketSession.LUNCH_BREAK
+
+
+def last_session_date(market: Optional[str], now: Optional[datetime] = None) -> date:
+    """
+    获取已开盘的最近一个交易日，即当前应有行情数据的日期
+
+    Args:
+        market: 市场代码
+        now: 当前时间，naive时间视为UTC
+
+    Returns:
+        date: 交易日日期
+    """
+    schedule = get_schedule(market)
+    local_now = _market_now(schedule, now)
+    today = local_now.date()
+    if is_trading_day(market, today) and local_now.time() >= schedule.open_time:
+        return today
+    return previous_trading_day(market, today)
+
+
+def next_open(market: Optional[str], now: Optional[datetime] = None) -> datetime:
+    """
+    获取下一次开盘时间
+
+    Args:
+        market: 市场代码
+        now: 当前时间，naive时间视为UTC
+
+    Returns:
+        datetime: 市场时区下的开盘时间
+    """
+    schedule = get_schedule(market)
+    local_now = _market_now(schedule, now)
+    today = local_now.date()
+    if is_trading_day(market, today) and local_now.time() < schedule.open_time:
+        return _localize(schedule, today, schedule.open_time)
+    return _localize(schedule, next_trading_day(market, today), schedule.open_time)
+
+
+def get_quote_ttl(market: Optional[str], quote_date: date,
+                  updated_at: Optional[datetime] = None,
+                  now: Optional[datetime] = None,
+                  intraday_max_age: float = DEFAULT_INTRADAY_MAX_AGE) -> float:
+    """
+    计算行情数据的剩余有效时间
+
+    - 行情日期早于最近交易日：已过期
+    - 收盘后采集的行情：有效至下一次开盘
+    - 盘中采集的行情：交易时段内按intraday_max_age刷新，收盘后需重新获取一次收盘数据
+
+    Args:
+        market: 市场代码
+        quote_date: 行情日期
+        updated_at: 行情采集时间（naive时间视为UTC），为空时视为收盘后数据
+        now: 当前时间，naive时间视为UTC
+        intraday_max_age: 盘中行情的最大时效（秒）
+
+    Returns:
+        float: 剩余有效秒数，0表示需要重新获取
+    """
+    schedule = get_schedule(market)
+    local_now = _market_now(schedule, now)
+    if quote_date < last_session_date(market, local_now):
+        return 0
+
+    close_at = _localize(schedule, quote_date, schedule.close_time)
+    captured_at = _market_now(schedule, updated_at) if updated_at else None
+    if captured_at is None or captured_at >= close_at:
+        # 收盘后的数据在下一次开盘前不会变化
+        return max((next_open(market, local_now) - local_now).total_seconds(), 0)
+
+    if local_now < close_at:
+        # 盘中数据按最大时效刷新
+        age = (local_now - captured_at).total_seconds()
+        return max(intraday_max_age - age, 0)
+
+    # 盘中采集但已收盘，需重新获取收盘数据
+    return 0
+
+
+def is_quote_fresh(market: Optional[str], quote_date: date,
+                   updated_at: Optional[datetime] = None,
+                   now: Optional[datetime] = None,
+                   intraday_max_age: float = DEFAULT_INTRADAY_MAX_AGE) -> bool:
+    """
+    判断行情数据是否仍然有效，参数同get_quote_ttl
+
+    Returns:
+        bool: 是否无需重新获取
+    """
+    return get_quote_ttl(market, quote_date, updated_at, now, intraday_max_age) > 0
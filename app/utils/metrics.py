@@ -0,0 +1,87 @@
+"""
+股票系统 - 进程内指标工具
+"""
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Sequence
+
+# 默认的耗时分桶上界（毫秒）
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Histogram:
+    """
+    固定分桶直方图
+
+    记录落在各分桶（值 <= 上界）中的次数，以及总数、总和、最大值，
+    分位数按所在分桶的上界近似。
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        """
+        初始化直方图
+
+        Args:
+            buckets: 升序的分桶上界，超过最大上界的值计入溢出桶
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """记录一个值"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, q: float) -> float:
+        """
+        获取近似分位数
+
+        Args:
+            q: 分位(0-1)
+
+        Returns:
+            float: 分位数所在分桶的上界，落在溢出桶时返回最大值
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank and count:
+                    return self.buckets[index] if index < len(self.buckets) else self.max
+            return self.max
+
+    def reset(self) -> None:
+        """清空记录"""
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        p50, p90, p99 = self.percentile(0.5), self.percentile(0.9), self.percentile(0.99)
+        with self._lock:
+            buckets = {f'le_{bound:g}': count for bound, count in zip(self.buckets, self._counts)}
+            buckets['overflow'] = self._counts[-1]
+            return {
+                'count': self.count,
+                'mean': self.total / self.count if self.count else 0.0,
+                'max': self.max,
+                'p50': p50,
+                'p90': p90,
+                'p99': p99,
+                'buckets': buckets
+            }
@@ -0,0 +1,157 @@
+"""
+股票系统 - 请求微批处理工具
+
+把短时间窗口内到达的单键请求合并成一次批量调用，再把结果分发给各个等待的调用者。
+
+每个批次的第一个调用者负责提交：等待窗口结束或批次达到最大数量后执行批量调用，
+不需要后台线程。与SingleFlight一样，等待使用调用时从threading模块取得的Event，
+eventlet.monkey_patch()之后即为绿色线程的Event。
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from app.utils.metrics import Histogram
+
+# 批次大小的分桶上界
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class _Batch:
+    """一个正在收集或执行的批次"""
+
+    __slots__ = ('keys', 'full', 'done', 'results', 'error')
+
+    def __init__(self):
+        self.keys: Dict[Hashable, None] = {}
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results: Dict[Hashable, Any] = {}
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    请求微批处理
+
+    用法:
+        batcher = MicroBatcher(lambda codes: provider.get_quotes(codes), window=0.005)
+        quote = batcher.submit('600000')
+    """
+
+    def __init__(self, fetch_batch: Callable[[List[Hashable]], Dict[Hashable, Any]],
+                 window: float = 0.005, max_batch_size: int = 100,
+                 timeout: Optional[float] = None):
+        """
+        初始化
+
+        Args:
+            fetch_batch: 批量调用，参数为键列表，返回键到结果的映射（缺少的键结果为None）
+            window: 收集窗口(秒)，为0时不合并，直接逐个调用
+            max_batch_size: 每批最大键数，达到后立即提交
+            timeout: 等待批次完成的默认最长时间(秒)，为空表示一直等待
+        """
+        self.fetch_batch = fetch_batch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self._current: Optional[_Batch] = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.full_batches = 0
+        self.wait_ms = Histogram()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+
+    def configure(self, window: Optional[float] = None, max_batch_size: Optional[int] = None,
+                  timeout: Optional[float] = None) -> None:
+        """调整收集窗口、每批最大键数和默认等待时间"""
+        if window is not None:
+            self.window = window
+        if max_batch_size is not None:
+            self.max_batch_size = max(1, max_batch_size)
+        if timeout is not None:
+            self.timeout = timeout
+
+    def submit(self, key: Hashable, timeout: Optional[float] = None) -> Any:
+        """
+        提交一个键并等待其结果
+
+        Args:
+            key: 请求的键，同一批次内的重复键只请求一次
+            timeout: 等待批次完成的最长时间(秒)，为空时使用默认等待时间
+
+        Returns:
+            该键的结果，批量调用未返回该键时为None
+
+        Raises:
+            批量调用的异常会传递给该批次的所有调用者；等待超时抛出TimeoutError
+        """
+        if timeout is None:
+            timeout = self.timeout
+        start = time.perf_counter()
+        with self._lock:
+            self.requests += 1
+            batch = self._current
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                if self.window > 0:
+                    self._current = batch
+            batch.keys[key] = None
+            if len(batch.keys) >= self.max_batch_size and self._current is batch:
+                self._current = None
+                self.full_batches += 1
+                batch.full.set()
+
+        try:
+            if leader:
+                if self.window > 0:
+                    batch.full.wait(self.window)
+                with self._lock:
+                    if self._current is batch:
+                        self._current = None
+                self._execute(batch)
+            elif not batch.done.wait(timeout):
+                with self._lock:
+                    self.timeouts += 1
+                raise TimeoutError(f"等待批量请求超时: {key}")
+        finally:
+            self.wait_ms.observe((time.perf_counter() - start) * 1000)
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results.get(key)
+
+    def _execute(self, batch: _Batch) -> None:
+        """执行批量调用并唤醒等待者"""
+        keys = list(batch.keys)
+        self.batch_sizes.observe(len(keys))
+        try:
+            batch.results = self.fetch_batch(keys) or {}
+        except BaseException as e:
+            batch.error = e
+            with self._lock:
+                self.errors += 1
+        finally:
+            with self._lock:
+                self.batches += 1
+            batch.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取批处理统计信息"""
+        with self._lock:
+            summary = {
+                'window_ms': self.window * 1000,
+                'max_batch_size': self.max_batch_size,
+                'requests': self.requests,
+                'batches': self.batches,
+                'full_batches': self.full_batches,
+                'errors': self.errors,
+                'timeouts': self.timeouts,
+            }
+        summary['wait_ms'] = self.wait_ms.stats()
+        summary['batch_size'] = self.batch_sizes.stats()
+        return summary
@@ -0,0 +1,103 @@
+"""
+股票系统 - 拼音首字母工具
+
+GB2312一级汉字按拼音排序，通过编码区间即可确定首字母，无需引入完整的拼音字库。
+二级汉字按部首排序，股票名称中常见的二级汉字和多音字通过覆盖表处理。
+"""
+import unicodedata
+from bisect import bisect_right
+from typing import Dict
+
+# GB2312一级汉字各拼音首字母的起始编码（一级汉字范围0xB0A1-0xD7F9）
+_GB2312_BOUNDARIES = (
+    (0xB0A1, 'a'), (0xB0C5, 'b'), (0xB2C1, 'c'), (0xB4EE, 'd'), (0xB6EA, 'e'),
+    (0xB7A2, 'f'), (0xB8C1, 'g'), (0xB9FE, 'h'), (0xBBF7, 'j'), (0xBFA6, 'k'),
+    (0xC0AC, 'l'), (0xC2E8, 'm'), (0xC4C3, 'n'), (0xC5B6, 'o'), (0xC5BE, 'p'),
+    (0xC6DA, 'q'), (0xC8BB, 'r'), (0xC8F6, 's'), (0xCBFA, 't'), (0xCDDA, 'w'),
+    (0xCEF4, 'x'), (0xD1B9, 'y'), (0xD4D1, 'z'),
+)
+_GB2312_CODES = [code for code, _ in _GB2312_BOUNDARIES]
+_GB2312_LEVEL1_END = 0xD7F9
+
+# 单字覆盖：股票名称中多音字的常用读音，以及常见的二级汉字和非GB2312汉字
+_CHAR_OVERRIDES: Dict[str, str] = {
+    # 多音字
+    '行': 'h', '藏': 'z',
+    # 二级汉字及非GB2312汉字
+    '亳': 'b', '泸': 'l', '锂': 'l', '钼': 'm', '鑫': 'x', '晟': 's', '莞': 'g',
+    '甬': 'y', '璞': 'p', '昊': 'h', '炜': 'w', '琦': 'q', '珑': 'l', '骅': 'h',
+    '淼': 'm', '玺': 'x', '翊': 'y', '钛': 't', '钴': 'g', '锆': 'g', '昱': 'y',
+    '煜': 'y', '瀚': 'h', '珏': 'j', '骥': 'j', '晖': 'h', '赟': 'y', '沣': 'f',
+    '濮': 'p', '汭': 'r', '癀': 'h', '璟': 'j', '曦': 'x', '泗': 's', '婺': 'w',
+    '馨': 'x', '睿': 'r', '瀛': 'y', '铖': 'c', '钰': 'y', '旻': 'm', '琨': 'k',
+    '瑾': 'j', '嵘': 'r', '铠': 'k', '锶': 's', '铟': 'y', '镓': 'j', '钽': 't',
+    '铋': 'b', '奕': 'y', '翎': 'l', '骐': 'q', '麒': 'q', '珈': 'j', '珩': 'h',
+    '珺': 'j', '皓': 'h', '煦': 'x', '熠': 'y', '烨': 'y', '晔': 'y', '滘': 'j',
+    '垚': 'y', '犇': 'b', '旸': 'y', '暻': 'j', '喆': 'z', '祎': 'y', '岱': 'd',
+    '邕': 'y', '汶': 'w', '漯': 'l', '泾': 'j', '邳': 'p', '邗': 'h', '崂': 'l',
+    '綦': 'q', '醴': 'l', '钜': 'j', '铧': 'h', '锟': 'k', '腈': 'j', '酯': 'z',
+    '肽': 't', '胍': 'g', '嘧': 'm', '啶': 'd',
+}
+
+# 词组覆盖：单字覆盖无法区分的多音字词组
+_WORD_OVERRIDES: Dict[str, str] = {
+    '重庆': 'cq', '成长': 'cz', '增长': 'zz', '音乐': 'yy',
+}
+_WORD_LENGTH = max(len(word) for word in _WORD_OVERRIDES)
+
+
+def get_initial(char: str) -> str:
+    """
+    获取单个字符的拼音首字母
+
+    Args:
+        char: 单个字符
+
+    Returns:
+        str: 小写首字母；英文字母和数字返回其小写形式；无法识别时返回空字符串
+    """
+    if char.isascii():
+        return char.lower() if char.isalnum() else ''
+
+    override = _CHAR_OVERRIDES.get(char)
+    if override:
+        return override
+
+    try:
+        encoded = char.encode('gb2312')
+    except UnicodeEncodeError:
+        return ''
+    if len(encoded) != 2:
+        return ''
+    code = (encoded[0] << 8) | encoded[1]
+    if code < _GB2312_CODES[0] or code > _GB2312_LEVEL1_END:
+        return ''
+    return _GB2312_BOUNDARIES[bisect_right(_GB2312_CODES, code) - 1][1]
+
+
+def get_initials(text: str) -> str:
+    """
+    获取文本的拼音首字母串，如'贵州茅台' -> 'gzmt'，'TCL科技' -> 'tclkj'
+
+    全角字符先转换为半角，标点符号忽略。
+
+    Args:
+        text: 文本
+
+    Returns:
+        str: 小写拼音首字母串
+    """
+    text = unicodedata.normalize('NFKC', text or '')
+    result = []
+    i = 0
+    while i < len(text):
+        for length in range(min(_WORD_LENGTH, len(text) - i), 1, -1):
+            initials = _WORD_OVERRIDES.get(text[i:i + length])
+            if initials:
+                result.append(initials)
+                i += length
+                break
+        else:
+            result.append(get_initial(text[i]))
+            i += 1
+    return ''.join(result)
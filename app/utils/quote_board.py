@@ -0,0 +1,310 @@
+"""
+股票系统 - 共享内存行情板
+
+在multiprocessing.shared_memory中按固定布局保存每只股票的最新行情，同一台机器上的
+所有worker进程映射同一块内存，读取时不需要数据库、网络或任何锁。
+
+布局:
+    头部(64字节): 魔数、版本、槽位数、槽位大小
+    槽位(64字节) x 槽位数，按股票ID索引:
+        version(uint64) | price | change | change_percent (float64) | volume(int64)
+        | date(uint32，日期序数，0表示空) | updated_at(float64，UTC时间戳)
+
+每个槽位用seqlock保护：写入方先把version加1（奇数表示正在写入），写完数据后再加1；
+读取方在读数据前后各读一次version，两次相同且为偶数时数据有效，否则重试。
+seqlock要求同一槽位同一时刻只有一个写入方：写入前对锁文件中与槽位对应的字节区间加
+fcntl记录锁，任何进程都可以写入；没有锁文件或平台不支持fcntl时只读，写入被跳过。
+写入时保留(行情日期, 更新时间)较新的行情，较旧的写入不会覆盖较新的行情。
+
+共享内存名称应包含部署标识（见segment_name），避免同一台机器上的不同数据库互相读到对方的行情。
+"""
+import hashlib
+import logging
+import os
+import struct
+import threading
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Dict, NamedTuple, Optional
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # 不支持共享内存的平台
+    resource_tracker = shared_memory = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 日志配置
+logger = logging.getLogger(__name__)
+
+MAGIC = b'QBRD'
+LAYOUT_VERSION = 1
+HEADER = struct.Struct('<4sIII')
+HEADER_SIZE = 64
+SLOT_SIZE = 64
+VERSION = struct.Struct('<Q')
+PAYLOAD = struct.Struct('<dddqId')
+
+# 读取时遇到正在写入的槽位的最大重试次数
+MAX_READ_RETRIES = 100
+
+
+def segment_name(prefix: str, deployment: str) -> str:
+    """
+    生成包含部署标识的共享内存名称
+
+    Args:
+        prefix: 名称前缀
+        deployment: 部署标识（如数据库地址），只取其摘要
+
+    Returns:
+        str: 共享内存名称
+    """
+    digest = hashlib.sha1(deployment.encode('utf-8')).hexdigest()[:12]
+    return f'{prefix}_{digest}'
+
+
+class BoardEntry(NamedTuple):
+    """行情板中一只股票的行情"""
+    price: float
+    change: float
+    change_percent: float
+    volume: int
+    date: date
+    updated_at: datetime
+
+
+class QuoteBoard:
+    """
+    共享内存行情板
+
+    用法:
+        board = QuoteBoard()
+        board.open(segment_name('stock_quote_board', database_uri), capacity=65536,
+                   lock_file='data/quote_board.lock')
+        board.write(stock_id, price=10.5, quote_date=date.today(), updated_at=datetime.utcnow())
+        entry = board.read(stock_id)
+    """
+
+    def __init__(self):
+        """初始化，未映射共享内存时读取均返回None"""
+        self.name: Optional[str] = None
+        self.capacity = 0
+        self._shm = None
+        self._buf = None
+        self._lock_fd: Optional[int] = None
+        # fcntl记录锁属于进程，同一进程内的线程另用一把锁互斥
+        self._write_lock = threading.Lock()
+        self.writes = 0
+        self.skipped = 0
+        self.hits = 0
+        self.misses = 0
+        self.retries = 0
+
+    @property
+    def is_open(self) -> bool:
+        """是否已映射共享内存"""
+        return self._buf is not None
+
+    @property
+    def writable(self) -> bool:
+        """是否可以写入（已映射且持有写入锁文件）"""
+        return self._buf is not None and self._lock_fd is not None
+
+    def open(self, name: str, capacity: int = 65536, lock_file: Optional[str] = None) -> bool:
+        """
+        映射指定名称的共享内存，不存在时创建；已存在但布局不同时重新创建
+
+        Args:
+            name: 共享内存名称，同一台机器上的进程使用相同名称共享行情板
+            capacity: 槽位数，股票ID不小于该值的股票不进入行情板
+            lock_file: 写入锁文件，同一行情板的进程必须使用同一文件；为空时只读
+
+        Returns:
+            bool: 是否映射成功
+        """
+        if shared_memory is None:
+            logger.info("当前平台不支持共享内存，行情板未启用")
+            return False
+        self.close()
+
+        size = HEADER_SIZE + SLOT_SIZE * capacity
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            HEADER.pack_into(shm.buf, 0, MAGIC, LAYOUT_VERSION, capacity, SLOT_SIZE)
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name)
+            header = HEADER.unpack_from(shm.buf, 0)
+            for _ in range(50):
+                if header[0] != b'\0' * 4:
+                    break
+                # 其他进程刚创建，尚未写入头部
+                time.sleep(0.01)
+                header = HEADER.unpack_from(shm.buf, 0)
+            magic, version, existing_capacity, slot_size = header
+            if (magic, version, existing_capacity, slot_size) != (MAGIC, LAYOUT_VERSION, capacity, SLOT_SIZE):
+                # 旧版本或不同容量留下的共享内存，由当前进程重新创建
+                logger.warning(f"共享内存行情板 {name} 布局不一致，重新创建")
+                shm.close()
+                shm.unlink()
+                return self.open(name, capacity, lock_file)
+
+        # 行情板在进程退出后保留给其他worker和重启后的进程，不由resource_tracker清理
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+
+        self._shm = shm
+        self._buf = shm.buf
+        self.name = name
+        self.capacity = capacity
+
+        if lock_file and fcntl is not None:
+            os.makedirs(os.path.dirname(lock_file) or '.', exist_ok=True)
+            self._lock_fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        else:
+            logger.info(f"共享内存行情板 {name} 没有可用的写入锁，当前进程只读")
+        return True
+
+    def close(self) -> None:
+        """解除映射（不删除共享内存）"""
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        if self._shm is not None:
+            self._buf = None
+            try:
+                self._shm.close()
+            except BufferError:
+                pass
+            self._shm = None
+
+    def unlink(self) -> None:
+        """删除共享内存（其他进程已有的映射在解除前仍然有效）"""
+        if self._shm is not None:
+            # open()中已取消登记，先重新登记，使unlink中的取消登记成对
+            resource_tracker.register(self._shm._name, 'shared_memory')
+            self._shm.unlink()
+            self.close()
+
+    def _offset(self, stock_id: int) -> Optional[int]:
+        """槽位偏移量，超出容量时返回None"""
+        if self._buf is None or not 0 <= stock_id < self.capacity:
+            return None
+        return HEADER_SIZE + SLOT_SIZE * stock_id
+
+    def write(self, stock_id: int, price: float, quote_date: date, updated_at: datetime,
+              change: Optional[float] = None, change_percent: Optional[float] = None,
+              volume: Optional[int] = None) -> bool:
+        """
+        写入一只股票的行情，持有槽位的写入锁；已有行情较新时不写入
+
+        Args:
+            stock_id: 股票ID
+            price: 最新价
+            quote_date: 行情日期
+            updated_at: 行情更新时间(UTC)
+            change: 涨跌额
+            change_percent: 涨跌幅
+            volume: 成交量
+
+        Returns:
+            bool: 是否写入（未映射、只读、超出容量或已有较新行情时为False）
+        """
+        offset = self._offset(stock_id)
+        if offset is None or price is None or quote_date is None:
+            return False
+        if self._lock_fd is None:
+            self.skipped += 1
+            return False
+
+        ordinal = quote_date.toordinal()
+        updated_ts = updated_at.replace(tzinfo=timezone.utc).timestamp()
+        with self._write_lock:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, SLOT_SIZE, offset)
+            try:
+                buf = self._buf
+                version = VERSION.unpack_from(buf, offset)[0]
+                if version & 1:
+                    # 上一个写入方中途退出，恢复为偶数
+                    version += 1
+                current = PAYLOAD.unpack_from(buf, offset + VERSION.size)
+                if (current[4], current[5]) > (ordinal, updated_ts):
+                    self.skipped += 1
+                    return False
+                VERSION.pack_into(buf, offset, version + 1)
+                PAYLOAD.pack_into(
+                    buf, offset + VERSION.size,
+                    price,
+                    change if change is not None else float('nan'),
+                    change_percent if change_percent is not None else float('nan'),
+                    volume or 0,
+                    ordinal,
+                    updated_ts
+                )
+                VERSION.pack_into(buf, offset, version + 2)
+            finally:
+                fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, SLOT_SIZE, offset)
+        self.writes += 1
+        return True
+
+    def read(self, stock_id: int) -> Optional[BoardEntry]:
+        """
+        无锁读取一只股票的行情
+
+        Args:
+            stock_id: 股票ID
+
+        Returns:
+            BoardEntry: 行情，槽位为空、未映射或持续处于写入中时返回None
+        """
+        offset = self._offset(stock_id)
+        if offset is None:
+            self.misses += 1
+            return None
+
+        buf = self._buf
+        for _ in range(MAX_READ_RETRIES):
+            before = VERSION.unpack_from(buf, offset)[0]
+            if before & 1:
+                self.retries += 1
+                continue
+            payload = PAYLOAD.unpack_from(buf, offset + VERSION.size)
+            if VERSION.unpack_from(buf, offset)[0] == before:
+                break
+            self.retries += 1
+        else:
+            self.misses += 1
+            return None
+
+        price, change, change_percent, volume, ordinal, updated_ts = payload
+        if not ordinal:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return BoardEntry(
+            price=price,
+            change=None if change != change else change,
+            change_percent=None if change_percent != change_percent else change_percent,
+            volume=volume,
+            date=date.fromordinal(ordinal),
+            updated_at=datetime.fromtimestamp(updated_ts, timezone.utc).replace(tzinfo=None)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """获取行情板统计信息（计数为当前进程的）"""
+        return {
+            'name': self.name,
+            'capacity': self.capacity,
+            'open': self.is_open,
+            'writable': self.writable,
+            'writes': self.writes,
+            'skipped': self.skipped,
+            'hits': self.hits,
+            'misses': self.misses,
+            'retries': self.retries
+        }
@@ -0,0 +1,349 @@
+"""
+股票系统 - 股票搜索索引
+
+在内存中维护股票的搜索索引，用于输入联想等高频查询：
+- 代码前缀树：按代码前缀匹配
+- 拼音首字母前缀树：如'gzmt'匹配'贵州茅台'
+- 名称前缀树：按名称前缀匹配
+- 名称/代码n-gram倒排索引：按子串匹配
+
+结果按 代码完全匹配 > 代码前缀 > 拼音首字母前缀 > 名称前缀 > 名称包含 > 代码包含 排序，
+代码类同档内按代码排序，拼音首字母按长度和代码排序，名称类按名称长度和代码排序。
+各结构中的列表都预先按排序键排好，查询取够limit个即停止，耗时与命中数量基本无关。
+"""
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.utils.pinyin import get_initials
+
+
+def normalize_keyword(text: str) -> str:
+    """规范化搜索文本：全角转半角、去除首尾空白、转小写"""
+    return unicodedata.normalize('NFKC', text or '').strip().lower()
+
+
+def _grams(text: str) -> Set[str]:
+    """获取文本的单字和二元组"""
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class SearchEntry:
+    """索引中的一只股票"""
+
+    __slots__ = ('stock_id', 'code', 'name', 'market', 'name_key', 'initials')
+
+    def __init__(self, stock_id: int, code: str, name: str, market: str):
+        """初始化索引条目"""
+        self.stock_id = stock_id
+        self.code = code
+        self.name = name
+        self.market = market
+        self.name_key = normalize_keyword(name)
+        self.initials = get_initials(name)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        return {
+            'code': self.code,
+            'name': self.name,
+            'market': self.market
+        }
+
+    def __repr__(self) -> str:
+        """返回索引条目的字符串表示"""
+        return f"<SearchEntry {self.code} {self.name}>"
+
+
+class _TrieNode:
+    """前缀树节点，items为子树内所有条目的(排序键, 代码)有序列表"""
+
+    __slots__ = ('children', 'items')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.items: List[Tuple[Any, str]] = []
+
+
+class PrefixTrie:
+    """
+    前缀树
+
+    每个节点保存子树内所有条目的有序列表，前缀查询只需沿路径找到节点后截取前limit个，
+    耗时与条目总数无关。
+    """
+
+    def __init__(self):
+        """初始化前缀树"""
+        self.root = _TrieNode()
+
+    def insert(self, key: str, code: str, sort_key: Any, presorted: bool = False) -> None:
+        """
+        插入条目
+
+        Args:
+            key: 用于前缀匹配的键
+            code: 股票代码
+            sort_key: 排序键
+            presorted: 为True时直接追加，由调用方在批量插入后调用sort
+        """
+        item = (sort_key, code)
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            if presorted:
+                node.items.append(item)
+            else:
+                insort(node.items, item)
+
+    def remove(self, key: str, code: str, sort_key: Any) -> None:
+        """删除条目"""
+        item = (sort_key, code)
+        node = self.root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return
+            index = bisect_left(node.items, item)
+            if index < len(node.items) and node.items[index] == item:
+                del node.items[index]
+
+    def sort(self) -> None:
+        """批量插入后对所有节点排序"""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            node.items.sort()
+            stack.extend(node.children.values())
+
+    def search(self, prefix: str, limit: int) -> List[str]:
+        """
+        前缀查询
+
+        Args:
+            prefix: 前缀
+            limit: 最大返回数量
+
+        Returns:
+            List[str]: 按排序键排列的股票代码
+        """
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [code for _, code in node.items[:limit]]
+
+
+class _Postings:
+    """n-gram倒排索引，每个gram对应按排序键有序的(排序键, 代码)列表"""
+
+    __slots__ = ('lists',)
+
+    def __init__(self):
+        self.lists: Dict[str, List[Tuple[Any, str]]] = {}
+
+    def insert(self, text: str, code: str, sort_key: Any, presorted: bool = False) -> None:
+        """插入条目，presorted含义同PrefixTrie.insert"""
+        item = (sort_key, code)
+        for gram in _grams(text):
+            postings = self.lists.setdefault(gram, [])
+            if presorted:
+                postings.append(item)
+            else:
+                insort(postings, item)
+
+    def remove(self, text: str, code: str, sort_key: Any) -> None:
+        """删除条目"""
+        item = (sort_key, code)
+        for gram in _grams(text):
+            postings = self.lists.get(gram)
+            if postings is None:
+                continue
+            index = bisect_left(postings, item)
+            if index < len(postings) and postings[index] == item:
+                del postings[index]
+            if not postings:
+                del self.lists[gram]
+
+    def sort(self) -> None:
+        """批量插入后对所有列表排序"""
+        for postings in self.lists.values():
+            postings.sort()
+
+    def candidates(self, keyword: str) -> List[Tuple[Any, str]]:
+        """
+        获取可能包含keyword的条目（调用方需再校验）
+
+        keyword的每个二元组都必须出现在文本中，因此只需取其中最短的列表，
+        调用方按顺序校验并在取够后停止。
+        """
+        if len(keyword) == 1:
+            return self.lists.get(keyword, [])
+        shortest = None
+        for i in range(len(keyword) - 1):
+            postings = self.lists.get(keyword[i:i + 2])
+            if not postings:
+                return []
+            if shortest is None or len(postings) < len(shortest):
+                shortest = postings
+        return shortest
+
+
+class _IndexData:
+    """一份完整的索引数据，重建时整体替换"""
+
+    def __init__(self):
+        self.entries: Dict[str, SearchEntry] = {}
+        self.code_trie = PrefixTrie()
+        self.initials_trie = PrefixTrie()
+        self.name_trie = PrefixTrie()
+        self.name_grams = _Postings()
+        self.code_grams = _Postings()
+
+    def add(self, entry: SearchEntry, presorted: bool = False) -> None:
+        """加入条目"""
+        code_key = entry.code.lower()
+        name_sort_key = (len(entry.name_key), entry.code)
+        self.entries[entry.code] = entry
+        self.code_trie.insert(code_key, entry.code, entry.code, presorted)
+        if entry.initials:
+            self.initials_trie.insert(entry.initials, entry.code,
+                                      (len(entry.initials), entry.code), presorted)
+        self.name_trie.insert(entry.name_key, entry.code, name_sort_key, presorted)
+        self.name_grams.insert(entry.name_key, entry.code, name_sort_key, presorted)
+        self.code_grams.insert(code_key, entry.code, entry.code, presorted)
+
+    def remove(self, code: str) -> Optional[SearchEntry]:
+        """删除条目"""
+        entry = self.entries.pop(code, None)
+        if entry is None:
+            return None
+        code_key = entry.code.lower()
+        name_sort_key = (len(entry.name_key), entry.code)
+        self.code_trie.remove(code_key, entry.code, entry.code)
+        if entry.initials:
+            self.initials_trie.remove(entry.initials, entry.code, (len(entry.initials), entry.code))
+        self.name_trie.remove(entry.name_key, entry.code, name_sort_key)
+        self.name_grams.remove(entry.name_key, entry.code, name_sort_key)
+        self.code_grams.remove(code_key, entry.code, entry.code)
+        return entry
+
+    def sort(self) -> None:
+        """批量插入后排序"""
+        for structure in (self.code_trie, self.initials_trie, self.name_trie,
+                          self.name_grams, self.code_grams):
+            structure.sort()
+
+
+class StockSearchIndex:
+    """
+    股票搜索索引
+
+    查询不加锁，写操作在锁内进行；重建时生成新的索引数据后整体替换。
+    """
+
+    def __init__(self):
+        """初始化空索引"""
+        self._data = _IndexData()
+        self._lock = threading.Lock()
+
+    def build(self, stocks: Iterable[Tuple[int, str, str, str]]) -> int:
+        """
+        重建索引
+
+        Args:
+            stocks: (股票ID, 代码, 名称, 市场)序列
+
+        Returns:
+            int: 索引的股票数量
+        """
+        data = _IndexData()
+        for stock_id, code, name, market in stocks:
+            data.add(SearchEntry(stock_id, code, name, market), presorted=True)
+        data.sort()
+        with self._lock:
+            self._data = data
+        return len(data.entries)
+
+    def add(self, stock_id: int, code: str, name: str, market: str) -> None:
+        """加入或更新一只股票"""
+        entry = SearchEntry(stock_id, code, name, market)
+        with self._lock:
+            self._data.remove(code)
+            self._data.add(entry)
+
+    def remove(self, code: str) -> None:
+        """删除一只股票"""
+        with self._lock:
+            self._data.remove(code)
+
+    def get(self, code: str) -> Optional[SearchEntry]:
+        """按代码获取条目"""
+        return self._data.entries.get(code)
+
+    def search(self, keyword: str, limit: int = 10) -> List[SearchEntry]:
+        """
+        搜索股票
+
+        Args:
+            keyword: 搜索关键词（代码、名称或拼音首字母）
+            limit: 最大返回数量
+
+        Returns:
+            List[SearchEntry]: 按相关度排序的股票
+        """
+        keyword = normalize_keyword(keyword)
+        if not keyword or limit <= 0:
+            return []
+
+        data = self._data
+        entries = data.entries
+        ranked: List[str] = []
+        seen: Set[str] = set()
+
+        def result() -> List[SearchEntry]:
+            # 查询不加锁，跳过期间被删除的条目
+            return [entries[code] for code in ranked if code in entries]
+
+        def take(codes: Iterable[str]) -> bool:
+            for code in codes:
+                if code not in seen:
+                    seen.add(code)
+                    ranked.append(code)
+                    if len(ranked) >= limit:
+                        return True
+            return False
+
+        # 代码完全匹配、代码前缀
+        exact = [code for code in (keyword, keyword.upper()) if code in entries]
+        if take(exact) or take(data.code_trie.search(keyword, limit + len(seen))):
+            return result()
+
+        # 拼音首字母前缀
+        if keyword.isascii() and keyword.isalnum():
+            if take(data.initials_trie.search(keyword, limit + len(seen))):
+                return result()
+
+        # 名称前缀
+        if take(data.name_trie.search(keyword, limit + len(seen))):
+            return result()
+
+        # 名称包含：倒排列表已按排序键有序，取够即停止
+        def name_contains() -> Iterable[str]:
+            for _, code in data.name_grams.candidates(keyword):
+                entry = entries.get(code)
+                if entry is not None and keyword in entry.name_key:
+                    yield code
+
+        if take(name_contains()):
+            return result()
+
+        # 代码包含
+        take(code for _, code in data.code_grams.candidates(keyword) if keyword in code.lower())
+        return result()
+
+    def __len__(self) -> int:
+        """返回索引的股票数量"""
+        return len(self._data.entries)
@@ -0,0 +1,125 @@
+"""
+股票系统 - 并发请求合并工具
+
+同一个键同时只执行一次调用，其余并发调用者等待并共享其结果（或异常）。
+
+兼容eventlet：等待使用调用时从threading模块取得的Event，eventlet.monkey_patch()
+之后即为绿色线程的Event，等待时会让出而不会阻塞整个hub；保护内部字典的锁
+只在不做任何I/O的短临界区内持有，不会在持有期间发生绿色线程切换。
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """一次正在执行的调用"""
+
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    并发请求合并
+
+    用法:
+        flight = SingleFlight()
+        data = flight.do(('stock_data', code), load_stock_data, code)
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        """
+        初始化
+
+        Args:
+            timeout: 等待其他调用的默认最长时间(秒)，为空表示一直等待
+        """
+        self.timeout = timeout
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.max_waiters = 0
+
+    def configure(self, timeout: Optional[float] = None) -> None:
+        """调整默认等待时间"""
+        if timeout is not None:
+            self.timeout = timeout
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args: Any,
+           timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """
+        执行调用，同一键已有调用在执行时等待其结果
+
+        Args:
+            key: 合并键，如(操作, 股票代码)
+            func: 实际执行的函数
+            timeout: 等待其他调用的最长时间(秒)，为空时使用默认等待时间
+            *args, **kwargs: 传给func的参数
+
+        Returns:
+            func的返回值，多个调用者共享同一个对象，调用方不应修改
+
+        Raises:
+            func抛出的异常会传递给所有等待者；等待超时抛出TimeoutError
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            if not call.event.wait(self.timeout if timeout is None else timeout):
+                with self._lock:
+                    self.timeouts += 1
+                raise TimeoutError(f"等待合并请求超时: {key}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """返回正在执行的调用数"""
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取合并统计信息"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'coalesce_rate': self.coalesced / self.calls if self.calls else 0,
+                'errors': self.errors,
+                'timeouts': self.timeouts,
+                'max_waiters': self.max_waiters,
+                'in_flight': len(self._calls)
+            }
@@ -0,0 +1,74 @@
+"""
+股票系统 - 股票代码注册表
+
+进程内的 代码 -> 股票基本信息 映射，供交易、持仓、观察列表等路径校验股票代码和获取名称，
+查询为一次字典查找，不访问数据库。
+"""
+import threading
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional
+
+
+class SymbolInfo(NamedTuple):
+    """股票基本信息"""
+    id: int
+    code: str
+    name: str
+    market: str
+    industry: Optional[str]
+    is_active: bool
+
+
+class SymbolRegistry:
+    """
+    股票代码注册表
+
+    查询不加锁；重新加载时生成新字典后整体替换，单条更新在锁内进行。
+    """
+
+    def __init__(self):
+        """初始化空注册表"""
+        self._symbols: Dict[str, SymbolInfo] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, symbols: Iterable[SymbolInfo]) -> int:
+        """
+        整体替换注册表内容
+
+        Args:
+            symbols: 股票基本信息序列
+
+        Returns:
+            int: 注册的股票数量
+        """
+        data = {symbol.code: symbol for symbol in symbols}
+        with self._lock:
+            self._symbols = data
+            self.loaded = True
+        return len(data)
+
+    def put(self, symbol: SymbolInfo) -> None:
+        """加入或更新一只股票"""
+        with self._lock:
+            self._symbols[symbol.code] = symbol
+
+    def remove(self, code: str) -> None:
+        """删除一只股票"""
+        with self._lock:
+            self._symbols.pop(code, None)
+
+    def get(self, code: str) -> Optional[SymbolInfo]:
+        """按代码获取股票基本信息，不存在时返回None"""
+        return self._symbols.get(code)
+
+    def __contains__(self, code: str) -> bool:
+        """判断代码是否已注册"""
+        return code in self._symbols
+
+    def __iter__(self) -> Iterator[SymbolInfo]:
+        """遍历所有股票（遍历的是当前字典的快照）"""
+        return iter(list(self._symbols.values()))
+
+    def __len__(self) -> int:
+        """返回注册的股票数量"""
+        return len(self._symbols)
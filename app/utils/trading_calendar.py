@@ -0,0 +1,261 @@
+"""
+股票系统 - 交易日历
+
+按市场预先计算排序后的交易日数组，通过二分查找回答
+"向前N个交易日"、"区间内交易日"和"缺失交易日"等查询。
+
+休市安排只收录了A股2023-2026年、港股2024-2026年，其余年份只按周末休市计算，
+节假日会被当作交易日。缺失交易日的检测因此只在收录的年份内逐日进行，
+其他年份只把已有数据之前和之后的交易日视为缺失，不会反复请求节假日的数据。
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _expand(*items: str) -> Set[date]:
+    """展开节假日定义，支持'YYYY-MM-DD'和'YYYY-MM-DD~YYYY-MM-DD'两种格式"""
+    result = set()
+    for item in items:
+        start_str, _, end_str = item.partition('~')
+        start = date.fromisoformat(start_str)
+        end = date.fromisoformat(end_str) if end_str else start
+        while start <= end:
+            result.add(start)
+            start += timedelta(days=1)
+    return result
+
+
+# 沪深交易所休市安排（周末自动休市，此处只需列出工作日休市日），收录2023-2026年
+_A_SHARE_HOLIDAYS = _expand(
+    # 2023
+    '2023-01-02', '2023-01-23~2023-01-27', '2023-04-05', '2023-05-01~2023-05-03',
+    '2023-06-22~2023-06-23', '2023-09-29', '2023-10-02~2023-10-06',
+    # 2024
+    '2024-01-01', '2024-02-09~2024-02-16', '2024-04-04~2024-04-05', '2024-05-01~2024-05-03',
+    '2024-06-10', '2024-09-16~2024-09-17', '2024-10-01~2024-10-07',
+    # 2025
+    '2025-01-01', '2025-01-28~2025-02-04', '2025-04-04', '2025-05-01~2025-05-05',
+    '2025-06-02', '2025-10-01~2025-10-08',
+    # 2026
+    '2026-01-01~2026-01-02', '2026-02-16~2026-02-23', '2026-04-06', '2026-05-01~2026-05-05',
+    '2026-06-19', '2026-09-25', '2026-10-01~2026-10-07',
+)
+
+# 香港交易所休市安排，收录2024-2026年
+_HK_HOLIDAYS = _expand(
+    # 2024
+    '2024-01-01', '2024-02-12~2024-02-13', '2024-03-29', '2024-04-01', '2024-04-04',
+    '2024-05-01', '2024-05-15', '2024-06-10', '2024-07-01', '2024-09-18', '2024-10-01',
+    '2024-10-11', '2024-12-25~2024-12-26',
+    # 2025
+    '2025-01-01', '2025-01-29~2025-01-31', '2025-04-04', '2025-04-18', '2025-04-21',
+    '2025-05-01', '2025-05-05', '2025-07-01', '2025-10-01', '2025-10-07', '2025-10-29',
+    '2025-12-25~2025-12-26',
+    # 2026
+    '2026-01-01', '2026-02-17~2026-02-19', '2026-04-03', '2026-04-06~2026-04-07',
+    '2026-05-01', '2026-05-25', '2026-06-19', '2026-07-01', '2026-10-01', '2026-10-19',
+    '2026-12-25',
+)
+
+MARKET_HOLIDAYS: Dict[str, Set[date]] = {
+    'SH': _A_SHARE_HOLIDAYS,
+    'SZ': _A_SHARE_HOLIDAYS,
+    'HK': _HK_HOLIDAYS,
+}
+
+# 日历覆盖的起始日期，结束日期按需向后扩展
+CALENDAR_START = date(2000, 1, 1)
+
+
+class TradingCalendar:
+    """单个市场的交易日历"""
+
+    def __init__(self, market: str, holidays: Iterable[date],
+                 start: date = CALENDAR_START, end: Optional[date] = None):
+        """
+        初始化交易日历
+
+        Args:
+            market: 市场代码
+            holidays: 工作日休市日期集合
+            start: 日历起始日期
+            end: 日历结束日期，默认为次年年末
+        """
+        self.market = market
+        self.holidays = set(holidays)
+        self.start = start
+        self.holiday_years = self._holiday_years()
+        self._lock = threading.Lock()
+        self._sessions: List[date] = []
+        self._ordinals: List[int] = []
+        self._build(end or date(date.today().year + 1, 12, 31))
+
+    def _holiday_years(self) -> Optional[Tuple[int, int]]:
+        """休市安排收录的(起始年份, 结束年份)，没有休市日期时返回None"""
+        if not self.holidays:
+            return None
+        years = [day.year for day in self.holidays]
+        return min(years), max(years)
+
+    def has_holidays_for(self, day: date) -> bool:
+        """休市安排是否收录了指定日期所在的年份"""
+        return (self.holiday_years is not None
+                and self.holiday_years[0] <= day.year <= self.holiday_years[1])
+
+    def _build(self, end: date) -> None:
+        """重新计算交易日数组"""
+        sessions = []
+        current = self.start
+        while current <= end:
+            if current.weekday() < 5 and current not in self.holidays:
+                sessions.append(current)
+            current += timedelta(days=1)
+        self._sessions = sessions
+        self._ordinals = [d.toordinal() for d in sessions]
+        self.end = end
+
+    def _ensure_covers(self, day: date) -> None:
+        """确保日历覆盖指定日期"""
+        if day > self.end:
+            with self._lock:
+                if day > self.end:
+                    self._build(date(day.year + 1, 12, 31))
+
+    def add_holidays(self, holidays: Iterable[date]) -> None:
+        """追加休市日期并重新计算交易日"""
+        with self._lock:
+            self.holidays.update(holidays)
+            self.holiday_years = self._holiday_years()
+            self._build(self.end)
+
+    def is_session(self, day: date) -> bool:
+        """判断是否为交易日"""
+        self._ensure_covers(day)
+        index = bisect_left(self._ordinals, day.toordinal())
+        return index < len(self._ordinals) and self._ordinals[index] == day.toordinal()
+
+    def previous_session(self, day: date) -> Optional[date]:
+        """获取指定日期之前（不含）的最近交易日"""
+        self._ensure_covers(day)
+        index = bisect_left(self._ordinals, day.toordinal())
+        return self._sessions[index - 1] if index > 0 else None
+
+    def next_session(self, day: date) -> date:
+        """获取指定日期之后（不含）的最近交易日"""
+        self._ensure_covers(day + timedelta(days=30))
+        index = bisect_right(self._ordinals, day.toordinal())
+        return self._sessions[index]
+
+    def session_on_or_before(self, day: date) -> Optional[date]:
+        """获取指定日期当天或之前的最近交易日"""
+        self._ensure_covers(day)
+        index = bisect_right(self._ordinals, day.toordinal())
+        return self._sessions[index - 1] if index > 0 else None
+
+    def sessions_back(self, end: date, count: int) -> date:
+        """
+        获取截至end（含）的最近count个交易日中最早的一天
+
+        Args:
+            end: 截止日期
+            count: 交易日数量
+
+        Returns:
+            date: 起始交易日
+        """
+        self._ensure_covers(end)
+        index = bisect_right(self._ordinals, end.toordinal())
+        return self._sessions[max(index - max(count, 1), 0)]
+
+    def sessions_between(self, start: date, end: date) -> List[date]:
+        """获取[start, end]区间内的所有交易日"""
+        self._ensure_covers(end)
+        lo = bisect_left(self._ordinals, start.toordinal())
+        hi = bisect_right(self._ordinals, end.toordinal())
+        return self._sessions[lo:hi]
+
+    def count_sessions(self, start: date, end: date) -> int:
+        """统计[start, end]区间内的交易日数量"""
+        self._ensure_covers(end)
+        lo = bisect_left(self._ordinals, start.toordinal())
+        hi = bisect_right(self._ordinals, end.toordinal())
+        return max(hi - lo, 0)
+
+    def missing_sessions(self, start: date, end: date, existing: Iterable[date]) -> List[date]:
+        """
+        计算[start, end]区间内缺失数据的交易日
+
+        休市安排未收录的年份无法区分节假日和缺失的数据，这些年份只把早于最早
+        或晚于最晚已有数据的交易日视为缺失。
+
+        Args:
+            start: 开始日期
+            end: 结束日期
+            existing: 已有数据的日期
+
+        Returns:
+            List[date]: 缺失的交易日，按日期升序
+        """
+        existing_ordinals = sorted({d.toordinal() for d in existing})
+        missing = []
+        for session in self.sessions_between(start, end):
+            ordinal = session.toordinal()
+            if (not self.has_holidays_for(session) and existing_ordinals
+                    and existing_ordinals[0] < ordinal < existing_ordinals[-1]):
+                continue
+            index = bisect_left(existing_ordinals, ordinal)
+            if index == len(existing_ordinals) or existing_ordinals[index] != ordinal:
+                missing.append(session)
+        return missing
+
+    def to_ranges(self, sessions: List[date]) -> List[Tuple[date, date]]:
+        """
+        将升序排列的交易日合并为连续区间（相邻交易日之间无其他交易日即视为连续）
+
+        Args:
+            sessions: 升序排列的交易日列表
+
+        Returns:
+            List[Tuple[date, date]]: (开始日期, 结束日期)区间列表
+        """
+        ranges = []
+        for session in sessions:
+            index = bisect_left(self._ordinals, session.toordinal())
+            if ranges and index == ranges[-1][2] + 1:
+                ranges[-1][1] = session
+                ranges[-1][2] = index
+            else:
+                ranges.append([session, session, index])
+        return [(start, end) for start, end, _ in ranges]
+
+    def __repr__(self) -> str:
+        """返回交易日历的字符串表示"""
+        return f"<TradingCalendar {self.market} {self.start}~{self.end} ({len(self._sessions)} sessions)>"
+
+
+_calendars: Dict[str, TradingCalendar] = {}
+_calendars_lock = threading.Lock()
+
+
+def get_calendar(market: Optional[str]) -> TradingCalendar:
+    """
+    获取市场的交易日历，沪深两市共用一份日历，未知市场按A股处理
+
+    Args:
+        market: 市场代码，如'SH', 'SZ', 'HK'
+
+    Returns:
+        TradingCalendar: 交易日历
+    """
+    key = 'HK' if market == 'HK' else 'A'
+    calendar = _calendars.get(key)
+    if calendar is None:
+        with _calendars_lock:
+            calendar = _calendars.get(key)
+            if calendar is None:
+                holidays = MARKET_HOLIDAYS['HK'] if key == 'HK' else _A_SHARE_HOLIDAYS
+                calendar = TradingCalendar(key, holidays)
+                _calendars[key] = calendar
+    return calendar
@@ -0,0 +1,167 @@
+"""
+股票系统 - 批量写入工具
+
+按数据库方言生成原生的批量UPSERT语句，并通过executemany分块执行：
+- SQLite / PostgreSQL: INSERT ... ON CONFLICT (...) DO UPDATE / DO NOTHING
+- MySQL / MariaDB: INSERT ... ON DUPLICATE KEY UPDATE
+其他数据库回退为先查询已存在的键，再分别批量插入和批量更新。
+
+累加列(increment_columns)冲突时在原值上加上新值，用于维护汇总表。
+指定版本列(newer_column)时，只有新行该列不早于原值才更新，避免较旧的数据覆盖较新的数据。
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Table, and_, bindparam, case, func, select, tuple_
+from sqlalchemy.orm import Session
+
+# 每次executemany的默认行数
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _dialect_insert(dialect_name: str):
+    """获取方言专用的insert构造函数，不支持时返回None"""
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    if dialect_name in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        return insert
+    return None
+
+
+def build_upsert_statement(table: Table, dialect_name: str, index_elements: Sequence[str],
+                           update_columns: Optional[Sequence[str]] = None,
+                           keep_existing_on_null: bool = False,
+                           increment_columns: Optional[Sequence[str]] = None,
+                           newer_column: Optional[str] = None):
+    """
+    生成方言原生的UPSERT语句（不含参数，供executemany使用）
+
+    Args:
+        table: 目标表
+        dialect_name: 数据库方言名称
+        index_elements: 冲突判断使用的唯一键列
+        update_columns: 冲突时更新的列，为空表示冲突时忽略
+        keep_existing_on_null: 新值为NULL时是否保留原值
+        increment_columns: 冲突时在原值上累加新值的列
+        newer_column: 版本列，冲突时只有新值不早于原值才更新
+
+    Returns:
+        方言专用的Insert语句，不支持的方言返回None
+    """
+    insert = _dialect_insert(dialect_name)
+    if insert is None:
+        return None
+
+    stmt = insert(table)
+    is_mysql = dialect_name in ('mysql', 'mariadb')
+    new_values = stmt.inserted if is_mysql else stmt.excluded
+
+    set_ = {}
+    for column in update_columns or ():
+        value = new_values[column]
+        if keep_existing_on_null:
+            value = func.coalesce(value, table.c[column])
+        set_[column] = value
+    for column in increment_columns or ():
+        set_[column] = table.c[column] + new_values[column]
+
+    newer = table.c[newer_column] <= new_values[newer_column] if newer_column and set_ else None
+
+    if is_mysql:
+        if newer is not None:
+            # MySQL没有条件更新，逐列按条件取值；赋值按顺序生效，版本列必须最后赋值
+            set_ = {column: case((newer, value), else_=table.c[column])
+                    for column, value in set_.items() if column != newer_column}
+            set_[newer_column] = case((newer, new_values[newer_column]), else_=table.c[newer_column])
+        # MySQL没有DO NOTHING，用唯一键列赋值为自身实现忽略
+        return stmt.on_duplicate_key_update(set_ or {index_elements[0]: table.c[index_elements[0]]})
+    if set_:
+        return stmt.on_conflict_do_update(index_elements=list(index_elements), set_=set_, where=newer)
+    return stmt.on_conflict_do_nothing(index_elements=list(index_elements))
+
+
+def _fallback_upsert(session: Session, table: Table, rows: List[Dict[str, Any]],
+                     index_elements: Sequence[str], update_columns: Optional[Sequence[str]],
+                     keep_existing_on_null: bool,
+                     increment_columns: Optional[Sequence[str]] = None,
+                     newer_column: Optional[str] = None) -> None:
+    """不支持原生UPSERT的数据库：先查已存在的键，再分别批量插入和更新"""
+    key_columns = [table.c[name] for name in index_elements]
+    keys = [tuple(row[name] for name in index_elements) for row in rows]
+    existing = set(session.execute(
+        select(*key_columns).where(tuple_(*key_columns).in_(keys))
+    ).all())
+
+    new_rows = [row for row, key in zip(rows, keys) if key not in existing]
+    if new_rows:
+        session.execute(table.insert(), new_rows)
+
+    changed_columns = list(update_columns or ()) + list(increment_columns or ())
+    if changed_columns:
+        old_rows = [row for row, key in zip(rows, keys) if key in existing]
+        if old_rows:
+            values = {}
+            for column in update_columns or ():
+                value = bindparam(f'u_{column}')
+                if keep_existing_on_null:
+                    value = func.coalesce(value, table.c[column])
+                values[column] = value
+            for column in increment_columns or ():
+                values[column] = table.c[column] + bindparam(f'u_{column}')
+            conditions = [table.c[name] == bindparam(f'k_{name}') for name in index_elements]
+            if newer_column:
+                conditions.append(table.c[newer_column] <= bindparam('n_version'))
+            stmt = table.update().where(and_(*conditions)).values(values)
+            session.execute(stmt, [
+                {**{f'k_{name}': row[name] for name in index_elements},
+                 **{f'u_{column}': row.get(column) for column in changed_columns},
+                 **({'n_version': row[newer_column]} if newer_column else {})}
+                for row in old_rows
+            ])
+
+
+def bulk_upsert(session: Session, table: Table, rows: List[Dict[str, Any]],
+                index_elements: Sequence[str], update_columns: Optional[Sequence[str]] = None,
+                keep_existing_on_null: bool = False,
+                chunk_size: int = DEFAULT_CHUNK_SIZE,
+                increment_columns: Optional[Sequence[str]] = None,
+                newer_column: Optional[str] = None) -> int:
+    """
+    批量插入或更新数据，不提交事务
+
+    所有行必须包含相同的键。
+
+    Args:
+        session: 数据库会话
+        table: 目标表
+        rows: 行数据列表
+        index_elements: 冲突判断使用的唯一键列
+        update_columns: 冲突时更新的列，为空表示冲突时忽略
+        keep_existing_on_null: 新值为NULL时是否保留原值
+        chunk_size: 每次executemany的行数
+        increment_columns: 冲突时在原值上累加新值的列
+        newer_column: 版本列，冲突时只有新值不早于原值才更新
+
+    Returns:
+        int: 提交给数据库的行数
+    """
+    if not rows:
+        return 0
+
+    dialect_name = session.get_bind().dialect.name
+    stmt = build_upsert_statement(table, dialect_name, index_elements,
+                                  update_columns, keep_existing_on_null, increment_columns, newer_column)
+
+    for offset in range(0, len(rows), chunk_size):
+        chunk = rows[offset:offset + chunk_size]
+        if stmt is not None:
+            session.execute(stmt, chunk)
+        else:
+            _fallback_upsert(session, table, chunk, index_elements,
+                             update_columns, keep_existing_on_null, increment_columns, newer_column)
+
+    return len(rows)
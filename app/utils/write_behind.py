@@ -0,0 +1,163 @@
+"""
+股票系统 - 延迟批量写入缓冲
+
+按键缓存待写入的数据，同一键只保留最新的值，由后台任务按时间间隔或缓冲行数批量写入；
+没有后台任务时由调用方在due()返回True时调用flush()，效果相同，只是写入发生在调用方的线程中。
+写入失败时未被新值覆盖的数据放回缓冲，在下一次写入时重试。
+
+与SingleFlight一样，等待使用调用时从threading模块取得的Event，eventlet.monkey_patch()
+之后即为绿色线程的Event；内部锁只保护字典操作，批量写入期间不持有锁。
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+
+class WriteBehindBuffer:
+    """
+    延迟批量写入缓冲
+
+    用法:
+        buffer = WriteBehindBuffer(lambda rows: save(rows), interval=0.5, max_rows=500)
+        buffer.put('600000', row)
+        # 后台任务
+        while running:
+            buffer.wait()
+            buffer.flush()
+    """
+
+    def __init__(self, flush_batch: Callable[[Dict[Hashable, Any]], Any],
+                 interval: float = 0.5, max_rows: int = 500):
+        """
+        初始化
+
+        Args:
+            flush_batch: 批量写入，参数为键到值的映射，抛出异常表示写入失败
+            interval: 写入间隔(秒)
+            max_rows: 缓冲达到该行数时立即唤醒后台任务写入
+        """
+        self.flush_batch = flush_batch
+        self.interval = interval
+        self.max_rows = max_rows
+        self._pending: Dict[Hashable, Any] = {}
+        self._wakeup: Optional[threading.Event] = None
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        # 是否有后台任务负责写入
+        self.background = False
+        self.puts = 0
+        self.superseded = 0
+        self.flushes = 0
+        self.written = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+
+    def configure(self, interval: Optional[float] = None, max_rows: Optional[int] = None) -> None:
+        """调整写入间隔和触发写入的行数"""
+        if interval is not None:
+            self.interval = max(0.01, interval)
+        if max_rows is not None:
+            self.max_rows = max(1, max_rows)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        写入缓冲，覆盖同一键尚未写入的值
+
+        Args:
+            key: 键
+            value: 待写入的值
+        """
+        with self._lock:
+            self.puts += 1
+            if key in self._pending:
+                self.superseded += 1
+            self._pending[key] = value
+            if len(self._pending) >= self.max_rows and self._wakeup is not None:
+                self._wakeup.set()
+
+    def due(self) -> bool:
+        """缓冲达到max_rows，或有待写入的数据且距上次写入已超过写入间隔"""
+        with self._lock:
+            if not self._pending:
+                return False
+            return (len(self._pending) >= self.max_rows
+                    or time.monotonic() - self._flushed_at >= self.interval)
+
+    def get(self, key: Hashable) -> Any:
+        """获取尚未写入的值，不存在时返回None"""
+        with self._lock:
+            return self._pending.get(key)
+
+    def discard(self, keys: Iterable[Hashable]) -> None:
+        """丢弃尚未写入的值（如已由其他途径写入更新的数据）"""
+        with self._lock:
+            for key in keys:
+                self._pending.pop(key, None)
+
+    def wait(self) -> None:
+        """等待一个写入间隔，缓冲达到max_rows时提前返回"""
+        event = threading.Event()
+        with self._lock:
+            if len(self._pending) >= self.max_rows:
+                return
+            self._wakeup = event
+        try:
+            event.wait(self.interval)
+        finally:
+            with self._lock:
+                if self._wakeup is event:
+                    self._wakeup = None
+
+    def flush(self) -> int:
+        """
+        写入缓冲中的全部数据
+
+        Returns:
+            int: 写入的行数
+
+        Raises:
+            批量写入的异常；失败的数据已放回缓冲
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not batch:
+            return 0
+
+        start = time.perf_counter()
+        try:
+            self.flush_batch(batch)
+        except BaseException:
+            with self._lock:
+                self.errors += 1
+                # 写入失败期间已有新值的键保留新值
+                for key, value in batch.items():
+                    self._pending.setdefault(key, value)
+            raise
+        finally:
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self.flushes += 1
+            self.written += len(batch)
+        return len(batch)
+
+    def __len__(self) -> int:
+        """尚未写入的行数"""
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取写入统计信息"""
+        with self._lock:
+            return {
+                'interval_ms': self.interval * 1000,
+                'background': self.background,
+                'max_rows': self.max_rows,
+                'pending': len(self._pending),
+                'puts': self.puts,
+                'superseded': self.superseded,
+                'flushes': self.flushes,
+                'written': self.written,
+                'errors': self.errors,
+                'last_flush_ms': self.last_flush_ms
+            }
@@ -0,0 +1,5 @@
+"""
+性能基准测试包
+
+在项目根目录下通过 ``python -m benchmarks.<模块名>`` 运行。
+"""
@@ -0,0 +1,42 @@
+"""
+性能基准测试 - 公共工具
+"""
+import time
+from contextlib import contextmanager
+from typing import Iterator, Dict, Any
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import TestingConfig
+
+
+def make_app(config_class=TestingConfig):
+    """创建使用内存数据库的应用实例并建表"""
+    app = create_app(config_class)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@contextmanager
+def count_queries() -> Iterator[Dict[str, Any]]:
+    """
+    统计代码块内执行的SQL语句数量和耗时
+
+    Yields:
+        Dict: 结束后包含 'queries' 和 'elapsed_ms' 两个键
+    """
+    stats = {'queries': 0, 'elapsed_ms': 0.0}
+    engine = db.engine
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        stats['queries'] += 1
+
+    event.listen(engine, 'before_cursor_execute', _on_execute)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        event.remove(engine, 'before_cursor_execute', _on_execute)
@@ -0,0 +1,101 @@
+"""
+性能基准测试 - K线历史读取
+
+对比通过StockQuote ORM对象和to_dict()读取多年日K线的旧实现，
+与从列式内存映射存储读取切片的耗时。
+
+运行方式:
+    python -m benchmarks.history_store                 # 默认10年日K线，读取100次
+    python -m benchmarks.history_store --years 20 --repeat 500
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from datetime import date
+
+from app import db
+from app.models.stock import Stock, StockQuote
+from app.services.history_service import history_store, load_daily_arrays
+from app.services.resample_service import bars_to_dicts, resample_ohlcv
+from app.services.stock_service import build_quote_row, upsert_quote_rows
+from app.utils.trading_calendar import get_calendar
+from benchmarks.common import make_app
+
+
+def _timed(func, repeat: int) -> float:
+    """重复执行并返回平均耗时(毫秒)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main() -> None:
+    """运行基准测试并打印结果"""
+    parser = argparse.ArgumentParser(description='K线历史读取基准测试')
+    parser.add_argument('--years', type=int, default=10, help='历史年数')
+    parser.add_argument('--repeat', type=int, default=100, help='每种方式的读取次数')
+    args = parser.parse_args()
+
+    app = make_app()
+    store_dir = tempfile.mkdtemp(prefix='history_bench_')
+    history_store.configure(store_dir)
+    end = date(2026, 9, 30)
+    start = date(end.year - args.years, end.month, end.day)
+    sessions = get_calendar('SH').sessions_between(start, end)
+    random.seed(42)
+
+    try:
+        with app.app_context():
+            stock = Stock(code='600000', name='浦发银行', market='SH')
+            db.session.add(stock)
+            db.session.commit()
+
+            price = 10.0
+            rows = []
+            for session in sessions:
+                close = round(price * (1 + random.uniform(-0.02, 0.02)), 2)
+                rows.append(build_quote_row(stock.id, {
+                    'date': session, 'open': price, 'close': close,
+                    'high': max(price, close), 'low': min(price, close),
+                    'volume': random.randint(10000, 10000000), 'turnover': 0.0,
+                    'change': round(close - price, 2)
+                }))
+                price = close
+            upsert_quote_rows(rows)
+            db.session.commit()
+            print(f"每只股票 {len(sessions)} 个交易日，读取 {args.repeat} 次取平均")
+
+            def orm_read():
+                quotes = stock.quotes.filter(
+                    StockQuote.date >= start, StockQuote.date <= end
+                ).order_by(StockQuote.date).all()
+                result = [quote.to_dict() for quote in quotes]
+                db.session.expunge_all()
+                db.session.add(stock)
+                return result
+
+            # 首次读取从数据库构建存储文件
+            build_ms = _timed(lambda: load_daily_arrays(stock.id), 1)
+
+            results = [
+                ('ORM对象 + to_dict()', _timed(orm_read, args.repeat)),
+                ('内存映射切片', _timed(lambda: load_daily_arrays(stock.id, start, end), args.repeat)),
+                ('内存映射切片 + 转换为字典',
+                 _timed(lambda: bars_to_dicts(load_daily_arrays(stock.id, start, end)), args.repeat)),
+                ('内存映射切片 + 周K线聚合',
+                 _timed(lambda: resample_ohlcv(load_daily_arrays(stock.id, start, end), 'weekly'),
+                        args.repeat)),
+            ]
+            print(f"{'首次构建存储文件':<24}: {build_ms:8.3f}ms")
+            for label, elapsed in results:
+                print(f"{label:<24}: {elapsed:8.3f}ms")
+    finally:
+        history_store.configure(None)
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+性能基准测试 - 跨进程缓存失效总线
+
+模拟多个worker进程：一个进程连续广播失效消息，其余进程接收，
+统计全部消息送达每个接收进程的耗时和丢失的消息数。
+Redis后端使用本地替身服务。
+
+运行方式:
+    python -m benchmarks.invalidation_bus                       # 默认unix后端，4个接收进程
+    python -m benchmarks.invalidation_bus --backend redis --messages 5000
+"""
+import argparse
+import multiprocessing
+import tempfile
+import threading
+import time
+
+from app.bus import BUSES
+from app.bus.stub_redis import StubRedisServer
+
+
+def receiver(backend: str, options: dict, messages: int, ready, results) -> None:
+    """接收进程：收到全部消息或超时后报告"""
+    bus = BUSES[backend](**options)
+    state = {'count': 0, 'first': None, 'last': None}
+
+    def on_message(message: bytes) -> None:
+        now = time.perf_counter()
+        state['first'] = state['first'] or now
+        state['last'] = now
+        state['count'] += 1
+        if state['count'] >= messages:
+            bus.close()
+
+    timer = threading.Timer(10.0, bus.close)
+    timer.start()
+    ready.put(True)
+    bus.listen(on_message)
+    timer.cancel()
+    results.put((state['count'], (state['last'] or 0) - (state['first'] or 0)))
+
+
+def main() -> None:
+    """运行基准测试并打印结果"""
+    parser = argparse.ArgumentParser(description='缓存失效总线基准测试')
+    parser.add_argument('--backend', choices=('unix', 'redis'), default='unix', help='总线后端')
+    parser.add_argument('--receivers', type=int, default=4, help='接收进程数')
+    parser.add_argument('--messages', type=int, default=2000, help='广播的消息数')
+    args = parser.parse_args()
+
+    server = None
+    if args.backend == 'redis':
+        server = StubRedisServer().start()
+        options = {'url': server.url}
+    else:
+        options = {'directory': tempfile.mkdtemp(prefix='invalidation_bus_')}
+
+    ready = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=receiver,
+                                         args=(args.backend, options, args.messages, ready, results))
+                 for _ in range(args.receivers)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get()
+    # 等待接收方完成绑定或订阅
+    time.sleep(0.5)
+
+    publisher = BUSES[args.backend](**options)
+    message = b'{"origin":"benchmark","kind":"quote","items":[{"code":"600000","stock_id":1}]}'
+    start = time.perf_counter()
+    for _ in range(args.messages):
+        publisher.publish(message)
+    publish_ms = (time.perf_counter() - start) * 1000
+
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    publisher.close()
+    if server is not None:
+        server.stop()
+
+    received = sum(count for count, _ in totals)
+    print(f"{args.backend} 后端，{args.receivers} 个接收进程，广播 {args.messages} 条消息")
+    print(f"发送耗时 {publish_ms:.1f}ms（{publish_ms * 1000 / args.messages:.1f}us/条），"
+          f"丢弃 {publisher.dropped} 次")
+    print(f"送达 {received}/{args.messages * args.receivers}，"
+          f"最慢接收进程耗时 {max(elapsed for _, elapsed in totals) * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+性能基准测试 - 投资组合估值
+
+对比逐持仓查询价格的旧实现与批量估值引擎在不同持仓数量下的SQL语句数量。
+行情通过正式的写入路径写入（同时生成最新行情快照），每次计时前清空进程内行情缓存，
+两种实现都从数据库读取价格。
+
+运行方式:
+    python -m benchmarks.portfolio_valuation
+"""
+from datetime import datetime
+
+from app import db
+from app.models.user import User
+from app.models.portfolio import Portfolio, PortfolioHolding
+from app.models.stock import Stock
+from app.services.stock_service import bulk_update_stock_quotes, quote_cache
+from app.services.valuation_service import value_portfolio
+from benchmarks.common import make_app, count_queries
+
+HOLDING_COUNTS = (1, 10, 50, 200)
+
+
+def _seed_portfolio(holding_count: int) -> Portfolio:
+    """创建包含指定数量持仓的投资组合，每只股票带一条当日行情"""
+    user = User(username=f'bench{holding_count}', email=f'bench{holding_count}@example.com',
+                password='bench')
+    db.session.add(user)
+    db.session.flush()
+
+    portfolio = Portfolio(name=f'bench-{holding_count}', user_id=user.id)
+    db.session.add(portfolio)
+    db.session.flush()
+
+    today = datetime.now().date()
+    stocks = []
+    for i in range(holding_count):
+        code = f'{holding_count:03d}{i:03d}'
+        stock = Stock(code=code, name=f'股票{code}', market='SH')
+        db.session.add(stock)
+        db.session.add(PortfolioHolding(portfolio_id=portfolio.id, stock_code=code,
+                                        stock_name=stock.name, quantity=100, average_cost=10.0))
+        stocks.append(stock)
+    db.session.commit()
+
+    for i, stock in enumerate(stocks):
+        bulk_update_stock_quotes(stock.id, [{'date': today, 'price': 10.0 + i}])
+    return portfolio
+
+
+def _legacy_detail(portfolio: Portfolio) -> None:
+    """旧版get_portfolio_detail的调用方式：每个指标重新遍历持仓并逐只查价"""
+    for holding in portfolio.holdings:
+        holding.get_current_price()
+        holding.get_current_value()
+        holding.get_profit()
+        holding.get_profit_percentage()
+    sum(h.get_current_value() for h in portfolio.holdings)
+    sum(h.get_total_cost() for h in portfolio.holdings)
+    sum(h.get_current_value() for h in portfolio.holdings)
+
+
+def _engine_detail(portfolio: Portfolio) -> None:
+    """新版get_portfolio_detail的调用方式：一次估值，多处复用"""
+    valuation = value_portfolio(portfolio)
+    valuation.get_holdings_summary()
+
+
+def main() -> None:
+    """运行基准测试并打印结果"""
+    app = make_app()
+    print(f"{'持仓数':>8} {'旧实现SQL数':>12} {'旧实现耗时(ms)':>14} {'新实现SQL数':>12} {'新实现耗时(ms)':>14}")
+    with app.app_context():
+        for holding_count in HOLDING_COUNTS:
+            portfolio = _seed_portfolio(holding_count)
+
+            quote_cache.clear()
+            with count_queries() as legacy:
+                _legacy_detail(portfolio)
+            quote_cache.clear()
+            with count_queries() as engine:
+                _engine_detail(portfolio)
+
+            print(f"{holding_count:>8} {legacy['queries']:>12} {legacy['elapsed_ms']:>14.1f} "
+                  f"{engine['queries']:>12} {engine['elapsed_ms']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
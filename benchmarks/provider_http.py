@@ -0,0 +1,77 @@
+"""
+性能基准测试 - HTTP行情数据源
+
+启动本地桩行情服务，对比获取N只股票实时行情的几种方式的耗时：
+- 逐只请求，每次新建连接（requests.get）
+- 逐只请求，复用连接池（HttpProvider.get_quote）
+- 并发逐只请求，复用连接池
+- 一次批量请求（HttpProvider.get_quotes）
+
+运行方式:
+    python -m benchmarks.provider_http                     # 默认50只股票，服务端延迟5ms
+    python -m benchmarks.provider_http --symbols 200 --latency 0.02 --workers 16
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from app.providers import HttpProvider
+from app.providers.stub_server import StubServer
+
+
+def _timed(func) -> float:
+    """执行一次并返回耗时(毫秒)"""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    """运行基准测试并打印结果"""
+    parser = argparse.ArgumentParser(description='HTTP行情数据源基准测试')
+    parser.add_argument('--symbols', type=int, default=50, help='股票数量')
+    parser.add_argument('--latency', type=float, default=0.005, help='桩服务每个请求的延迟(秒)')
+    parser.add_argument('--workers', type=int, default=8, help='并发请求的线程数')
+    args = parser.parse_args()
+
+    codes = [f'{600000 + i:06d}' for i in range(args.symbols)]
+
+    with StubServer(latency=args.latency) as server:
+        provider = HttpProvider(server.url, pool_size=args.workers, retries=0)
+        # 预热连接
+        provider.get_quote(codes[0])
+
+        def new_connection_each():
+            for code in codes:
+                requests.get(f"{server.url}/quotes", params={'codes': code},
+                             headers={'Connection': 'close'}, timeout=10).json()
+
+        def pooled_sequential():
+            for code in codes:
+                provider.get_quote(code)
+
+        def pooled_concurrent():
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                list(executor.map(provider.get_quote, codes))
+
+        def batched():
+            provider.get_quotes(codes)
+
+        print(f"{args.symbols} 只股票，服务端延迟 {args.latency * 1000:.1f}ms，并发线程 {args.workers}")
+        for label, func in (
+            ('逐只请求(每次新建连接)', new_connection_each),
+            ('逐只请求(连接池)', pooled_sequential),
+            ('并发逐只请求(连接池)', pooled_concurrent),
+            ('批量请求', batched),
+        ):
+            before = server.request_count
+            elapsed = _timed(func)
+            print(f"{label:<20}: {elapsed:9.1f}ms  {server.request_count - before:4d} 次请求")
+
+        provider.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+性能基准测试 - 实时行情微批处理
+
+模拟一次仪表盘加载：多个线程同时请求不同股票的实时行情，
+对比不合并（窗口为0）和不同合并窗口下的行情接口请求数、总耗时与单次等待耗时分布。
+
+运行方式:
+    python -m benchmarks.quote_batching                    # 默认40只股票，桩服务延迟20ms
+    python -m benchmarks.quote_batching --symbols 200 --latency 0.05 --windows 0 2 5 10
+"""
+import argparse
+import threading
+import time
+
+from app.providers import configure_provider
+from app.providers.stub_server import StubServer
+from app.services.stock_service import fetch_realtime_stock_data, quote_batcher
+
+
+def main() -> None:
+    """运行基准测试并打印结果"""
+    parser = argparse.ArgumentParser(description='实时行情微批处理基准测试')
+    parser.add_argument('--symbols', type=int, default=40, help='并发请求的股票数')
+    parser.add_argument('--latency', type=float, default=0.02, help='桩服务每个请求的延迟(秒)')
+    parser.add_argument('--windows', type=float, nargs='+', default=[0, 5, 10], help='合并窗口(毫秒)')
+    args = parser.parse_args()
+
+    codes = [f'{600000 + i:06d}' for i in range(args.symbols)]
+    with StubServer(latency=args.latency) as server:
+        configure_provider('http', base_url=server.url, pool_size=args.symbols, retries=0)
+        try:
+            print(f"{args.symbols} 只股票并发请求，桩服务延迟 {args.latency * 1000:.1f}ms")
+            for window_ms in args.windows:
+                quote_batcher.configure(window=window_ms / 1000)
+                quote_batcher.wait_ms.reset()
+                quote_batcher.batch_sizes.reset()
+                barrier = threading.Barrier(len(codes))
+
+                def worker(code):
+                    barrier.wait()
+                    fetch_realtime_stock_data(code)
+
+                threads = [threading.Thread(target=worker, args=(code,)) for code in codes]
+                before = server.request_count
+                start = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = (time.perf_counter() - start) * 1000
+
+                stats = quote_batcher.stats()
+                print(f"窗口 {window_ms:4.1f}ms: 耗时 {elapsed:7.1f}ms，"
+                      f"接口请求 {server.request_count - before:3d} 次，"
+                      f"平均批次 {stats['batch_size']['mean']:5.1f}，"
+                      f"等待 p50/p99 {stats['wait_ms']['p50']:g}/{stats['wait_ms']['p99']:g}ms")
+        finally:
+            configure_provider('mock')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+性能基准测试 - 共享内存行情板
+
+多个写入进程（通过槽位写入锁互斥）持续更新一批股票的行情，多个读取进程同时无锁读取，
+统计每次读取的耗时、因写入而重试的次数，并校验没有读到写了一半的数据。
+
+运行方式:
+    python -m benchmarks.quote_board                        # 默认4个读取进程，1000只股票
+    python -m benchmarks.quote_board --readers 8 --writers 4 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import date, datetime
+
+from app.utils.quote_board import QuoteBoard
+
+BOARD_NAME = 'stock_quote_board_benchmark'
+
+
+def reader(symbols: int, seconds: float, results) -> None:
+    """读取进程：随机读取股票，校验价格与成交量的对应关系"""
+    board = QuoteBoard()
+    board.open(BOARD_NAME, symbols)
+    reads = torn = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for stock_id in range(symbols):
+            entry = board.read(stock_id)
+            reads += 1
+            # 写入方保证 volume == price * 100
+            if entry is not None and entry.volume != round(entry.price * 100):
+                torn += 1
+    elapsed = time.perf_counter() - start
+    results.put((reads, torn, board.retries, elapsed))
+    board.close()
+
+
+def writer(symbols: int, seconds: float, lock_file: str, results) -> None:
+    """写入进程：持续更新全部股票，价格与成交量保持 volume == price * 100"""
+    board = QuoteBoard()
+    board.open(BOARD_NAME, symbols, lock_file)
+    today = date.today()
+    tick = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        tick += 1
+        for stock_id in range(symbols):
+            price = 10.0 + (tick % 1000) / 100
+            board.write(stock_id, price, today, datetime.utcnow(), volume=round(price * 100))
+    results.put((board.writes, board.skipped))
+    board.close()
+
+
+def main() -> None:
+    """运行基准测试并打印结果"""
+    parser = argparse.ArgumentParser(description='共享内存行情板基准测试')
+    parser.add_argument('--symbols', type=int, default=1000, help='股票数')
+    parser.add_argument('--readers', type=int, default=4, help='读取进程数')
+    parser.add_argument('--writers', type=int, default=2, help='写入进程数')
+    parser.add_argument('--seconds', type=float, default=2.0, help='运行时间(秒)')
+    args = parser.parse_args()
+
+    lock_file = os.path.join(tempfile.mkdtemp(prefix='quote_board_'), 'quote_board.lock')
+    board = QuoteBoard()
+    board.open(BOARD_NAME, args.symbols, lock_file)
+    today = date.today()
+    for stock_id in range(args.symbols):
+        board.write(stock_id, 10.0, today, datetime.utcnow(), volume=1000)
+
+    results = multiprocessing.Queue()
+    written = multiprocessing.Queue()
+    readers = [multiprocessing.Process(target=reader, args=(args.symbols, args.seconds, results))
+               for _ in range(args.readers)]
+    writers = [multiprocessing.Process(target=writer, args=(args.symbols, args.seconds, lock_file, written))
+               for _ in range(args.writers)]
+    for process in readers + writers:
+        process.start()
+
+    totals = [results.get() for _ in readers]
+    writer_totals = [written.get() for _ in writers]
+    for process in readers + writers:
+        process.join()
+    board.unlink()
+
+    writes = sum(item[0] for item in writer_totals)
+    skipped = sum(item[1] for item in writer_totals)
+
+    reads = sum(item[0] for item in totals)
+    torn = sum(item[1] for item in totals)
+    retries = sum(item[2] for item in totals)
+    read_time = sum(item[3] for item in totals)
+    print(f"{args.symbols} 只股票，{args.writers} 个写入进程，{args.readers} 个读取进程，运行 {args.seconds:g}s")
+    print(f"写入 {writes} 次（{writes / args.seconds / 1000:.0f}k/s），因已有较新行情跳过 {skipped} 次")
+    print(f"读取 {reads} 次，平均 {read_time / reads * 1e6:.2f}us/次，重试 {retries} 次，读到不一致数据 {torn} 次")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+性能基准测试 - 行情查询并发合并
+
+多个线程同时对同一只行情已过期的股票调用get_stock_data，
+统计实际发往行情接口（本地桩服务）的请求数和合并的调用数。
+
+运行方式:
+    python -m benchmarks.quote_coalescing                  # 默认32个并发调用，桩服务延迟20ms
+    python -m benchmarks.quote_coalescing --threads 100 --latency 0.05
+"""
+import argparse
+import threading
+import time
+
+from app import db
+from app.models.stock import Stock
+from app.providers import configure_provider
+from app.providers.stub_server import StubServer
+from app.services.stock_service import get_stock_data, get_quote_flight_stats, quote_cache
+from benchmarks.common import make_app
+
+
+def main() -> None:
+    """运行基准测试并打印结果"""
+    parser = argparse.ArgumentParser(description='行情查询并发合并基准测试')
+    parser.add_argument('--threads', type=int, default=32, help='并发调用数')
+    parser.add_argument('--latency', type=float, default=0.02, help='桩服务每个请求的延迟(秒)')
+    args = parser.parse_args()
+
+    app = make_app()
+    with StubServer(latency=args.latency) as server:
+        configure_provider('http', base_url=server.url, pool_size=args.threads, retries=0)
+        try:
+            with app.app_context():
+                db.session.add(Stock(code='600519', name='贵州茅台', market='SH'))
+                db.session.commit()
+            quote_cache.clear()
+
+            barrier = threading.Barrier(args.threads)
+            errors = []
+
+            def worker():
+                with app.app_context():
+                    barrier.wait()
+                    data = get_stock_data('600519')
+                    if 'error' in data:
+                        errors.append(data['error'])
+
+            threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = (time.perf_counter() - start) * 1000
+
+            stats = get_quote_flight_stats()
+            print(f"{args.threads} 个并发调用，耗时 {elapsed:.1f}ms，失败 {len(errors)} 个")
+            print(f"行情接口请求数: {server.request_count}")
+            print(f"实际执行: {stats['executions']}，合并: {stats['coalesced']}，"
+                  f"最大等待者: {stats['max_waiters']}")
+        finally:
+            configure_provider('mock')
+
+
+if __name__ == '__main__':
+    main()
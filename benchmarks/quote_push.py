@@ -0,0 +1,88 @@
+"""
+性能基准测试 - 实时行情推送合并与背压
+
+模拟开盘时的行情高峰：大量连接各自订阅一批股票，行情以很高的频率更新。
+对比逐条推送（每次更新向每个订阅者发送一条消息）与按刷新间隔合并成帧后的发送次数和数据量，
+部分连接为慢客户端，只在若干个刷新间隔后才确认收到的帧。
+
+运行方式:
+    python -m benchmarks.quote_push                         # 默认200个连接，每个订阅200只股票
+    python -m benchmarks.quote_push --clients 500 --ticks 20000 --slow 0.2
+"""
+import argparse
+import json
+import random
+import time
+
+from app.services.push_service import QuotePublisher, QuoteSubscriptions
+
+
+def main() -> None:
+    """运行基准测试并打印结果"""
+    parser = argparse.ArgumentParser(description='实时行情推送合并基准测试')
+    parser.add_argument('--clients', type=int, default=200, help='连接数')
+    parser.add_argument('--symbols', type=int, default=1000, help='股票总数')
+    parser.add_argument('--per-client', type=int, default=200, help='每个连接订阅的股票数')
+    parser.add_argument('--ticks', type=int, default=5000, help='每个刷新间隔内的行情更新数')
+    parser.add_argument('--flushes', type=int, default=20, help='刷新次数')
+    parser.add_argument('--slow', type=float, default=0.1, help='慢客户端比例')
+    parser.add_argument('--slow-every', type=int, default=5, help='慢客户端每隔多少个刷新间隔确认一次')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    codes = [f'{600000 + i:06d}' for i in range(args.symbols)]
+    subscriptions = QuoteSubscriptions()
+    slow_clients = set()
+    for i in range(args.clients):
+        sid = f'client-{i}'
+        subscriptions.subscribe(sid, rng.sample(codes, min(args.per_client, len(codes))))
+        if rng.random() < args.slow:
+            slow_clients.add(sid)
+
+    sent = {'frames': 0, 'bytes': 0}
+    unacked = []
+
+    def emit(sid, frame, callback):
+        sent['frames'] += 1
+        sent['bytes'] += len(json.dumps(frame, separators=(',', ':')))
+        if sid in slow_clients:
+            unacked.append(callback)
+        else:
+            callback()
+
+    publisher = QuotePublisher(subscriptions, emit=emit)
+    prices = {code: 10.0 for code in codes}
+    naive_messages = 0
+    naive_bytes = 0
+    elapsed = 0.0
+
+    for flush in range(args.flushes):
+        for _ in range(args.ticks):
+            code = rng.choice(codes)
+            prices[code] = round(prices[code] * (1 + rng.uniform(-0.002, 0.002)), 2)
+            fields = {'price': prices[code], 'volume': rng.randint(1, 10 ** 6)}
+            # 逐条推送时每次更新向每个订阅者发送一条消息
+            subscribers = subscriptions.subscriber_count(code)
+            naive_messages += subscribers
+            naive_bytes += subscribers * len(json.dumps({'code': code, **fields}, separators=(',', ':')))
+            start = time.perf_counter()
+            publisher.publish({code: fields})
+            elapsed += time.perf_counter() - start
+        start = time.perf_counter()
+        publisher.flush()
+        elapsed += time.perf_counter() - start
+        if (flush + 1) % args.slow_every == 0:
+            for callback in unacked:
+                callback()
+            unacked.clear()
+    stats = publisher.stats()
+    print(f"{args.clients} 个连接（慢客户端 {len(slow_clients)} 个），每个订阅 {args.per_client} 只股票，"
+          f"{args.flushes} 个刷新间隔共 {args.ticks * args.flushes} 次行情更新")
+    print(f"逐条推送: {naive_messages:9d} 条消息，{naive_bytes / 1024:10.1f} KB")
+    print(f"合并成帧: {sent['frames']:9d} 帧，    {sent['bytes'] / 1024:10.1f} KB，"
+          f"覆盖的中间值 {stats['superseded']}，因背压推迟 {stats['deferred']} 次")
+    print(f"发布与刷新总耗时 {elapsed * 1000:.1f}ms（含帧的序列化）")
+
+
+if __name__ == '__main__':
+    main()
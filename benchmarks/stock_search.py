@@ -0,0 +1,88 @@
+"""
+性能基准测试 - 股票搜索
+
+对比 Stock.code/name LIKE '%kw%' 全表扫描的旧实现与内存搜索索引在不同股票数量下的查询耗时，
+并统计search_stocks（含附加最新行情）每次调用执行的SQL语句数量。
+行情通过正式的写入路径写入（同时生成最新行情快照），search_stocks从快照读取价格。
+
+运行方式:
+    python -m benchmarks.stock_search                  # 默认5000只股票，每个关键词查询200次
+    python -m benchmarks.stock_search --stocks 30000 --repeat 1000
+"""
+import argparse
+import random
+import time
+from datetime import date
+
+from app import db
+from app.models.stock import Stock
+from app.services.search_service import build_search_index, stock_search_index
+from app.services.stock_service import build_quote_row, quote_cache, search_stocks, upsert_quote_rows
+from benchmarks.common import make_app, count_queries
+
+# 生成股票名称用的常见字
+_NAME_CHARS = '中国平安招商银行贵州茅台五粮液格力电器伊利股份工商农业建设科技医药新能源汽车电子通信'
+KEYWORDS = ('6000', '银行', 'gzmt', '科技', '00', 'zgpa')
+
+
+def _timed(func, repeat: int) -> float:
+    """重复执行并返回平均耗时(微秒)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def main() -> None:
+    """运行基准测试并打印结果"""
+    parser = argparse.ArgumentParser(description='股票搜索基准测试')
+    parser.add_argument('--stocks', type=int, default=5000, help='股票数量')
+    parser.add_argument('--repeat', type=int, default=200, help='每个关键词的查询次数')
+    args = parser.parse_args()
+
+    app = make_app()
+    random.seed(42)
+
+    with app.app_context():
+        db.session.add_all(
+            Stock(code=f'{600000 + i:06d}',
+                  name=''.join(random.choice(_NAME_CHARS) for _ in range(random.randint(3, 6))),
+                  market='SH')
+            for i in range(args.stocks)
+        )
+        db.session.flush()
+        upsert_quote_rows([
+            build_quote_row(stock_id, {'date': date(2026, 9, 30), 'price': 10.0})
+            for stock_id, in db.session.query(Stock.id).all()
+        ])
+        db.session.commit()
+
+        start = time.perf_counter()
+        build_search_index()
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"{args.stocks} 只股票，构建索引 {build_ms:.1f}ms，每个关键词查询 {args.repeat} 次取平均")
+
+        def like_search(keyword):
+            return Stock.query.filter(
+                (Stock.code.like(f'%{keyword}%')) |
+                (Stock.name.like(f'%{keyword}%'))
+            ).limit(10).all()
+
+        print(f"{'关键词':<8}{'LIKE全表扫描(us)':>18}{'内存索引(us)':>14}")
+        for keyword in KEYWORDS:
+            like_us = _timed(lambda: like_search(keyword), args.repeat)
+            index_us = _timed(lambda: stock_search_index.search(keyword, 10), args.repeat)
+            print(f"{keyword:<8}{like_us:>18.1f}{index_us:>14.1f}")
+
+        print()
+        for keyword in KEYWORDS:
+            quote_cache.clear()
+            with count_queries() as stats:
+                results = search_stocks(keyword, 10)
+            priced = sum(1 for result in results if result.get('price') is not None)
+            print(f"search_stocks({keyword!r}): {len(results)} 条结果（{priced} 条带价格），"
+                  f"{stats['queries']} 条SQL，{stats['elapsed_ms']:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
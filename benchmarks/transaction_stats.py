@@ -0,0 +1,129 @@
+"""
+性能基准测试 - 交易统计
+
+对比取回全部交易记录后在Python中多次遍历的旧实现，与读取交易统计汇总表的
+新实现在不同交易笔数下的耗时和峰值内存，并给出从交易记录重建汇总表的耗时。
+
+运行方式:
+    python -m benchmarks.transaction_stats                         # 默认1万/10万/100万笔
+    python -m benchmarks.transaction_stats --counts 10000,100000 --stocks 500
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.user import User
+from app.models.portfolio import Portfolio
+from app.models.transaction import Transaction, TransactionType
+from app.services.trade_stats_service import rebuild_trade_stats
+from app.services.trading_service import get_transaction_stats
+from benchmarks.common import make_app
+
+INSERT_BATCH = 10000
+
+
+def _seed_transactions(count: int, stocks: int) -> int:
+    """为新用户生成指定笔数的交易记录，返回用户ID"""
+    user = User(username=f'bench{count}', email=f'bench{count}@example.com', password='bench')
+    db.session.add(user)
+    db.session.flush()
+    portfolio = Portfolio(name=f'bench-{count}', user_id=user.id)
+    db.session.add(portfolio)
+    db.session.flush()
+
+    random.seed(count)
+    start = datetime.now() - timedelta(days=730)
+    table = Transaction.__table__
+    batch = []
+    for i in range(count):
+        code = f'{random.randrange(stocks):06d}'
+        quantity = random.randrange(1, 10) * 100
+        price = round(random.uniform(5, 50), 2)
+        batch.append({
+            'user_id': user.id,
+            'portfolio_id': portfolio.id,
+            'stock_code': code,
+            'stock_name': f'股票{code}',
+            'transaction_type': TransactionType.BUY if i % 3 else TransactionType.SELL,
+            'quantity': quantity,
+            'price': price,
+            'total_amount': quantity * price,
+            'commission': 5.0,
+            'tax': 0.0 if i % 3 else quantity * price * 0.001,
+            'executed_at': start + timedelta(minutes=i * 730 * 1440 // count),
+        })
+        if len(batch) >= INSERT_BATCH:
+            db.session.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+    db.session.commit()
+    return user.id
+
+
+def _legacy_stats(user_id: int) -> dict:
+    """旧版get_transaction_stats：取回全部交易记录后多次遍历"""
+    transactions = Transaction.query.filter_by(user_id=user_id).all()
+    total_buy = sum(t.total_amount for t in transactions if t.transaction_type == TransactionType.BUY)
+    total_sell = sum(t.total_amount for t in transactions if t.transaction_type == TransactionType.SELL)
+    total_commission = sum(t.commission for t in transactions)
+    total_tax = sum(t.tax for t in transactions)
+    buy_count = sum(1 for t in transactions if t.transaction_type == TransactionType.BUY)
+    sell_count = sum(1 for t in transactions if t.transaction_type == TransactionType.SELL)
+    stock_count = len(set(t.stock_code for t in transactions))
+    most_active = [{'code': code, 'name': next((t.stock_name for t in transactions if t.stock_code == code), ''),
+                    'count': count}
+                   for code, count in Counter(t.stock_code for t in transactions).most_common(5)]
+    return {
+        'total_buy': total_buy, 'total_sell': total_sell,
+        'total_commission': total_commission, 'total_tax': total_tax,
+        'transaction_count': len(transactions), 'buy_count': buy_count, 'sell_count': sell_count,
+        'stock_count': stock_count, 'most_active_stocks': most_active,
+    }
+
+
+def _measure(func, *args) -> tuple:
+    """执行一次，返回结果、耗时(毫秒)和峰值内存(MB)"""
+    db.session.expunge_all()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main() -> None:
+    """运行基准测试并打印结果"""
+    parser = argparse.ArgumentParser(description='交易统计基准测试')
+    parser.add_argument('--counts', default='10000,100000,1000000', help='交易笔数，逗号分隔')
+    parser.add_argument('--stocks', type=int, default=300, help='交易涉及的股票数')
+    args = parser.parse_args()
+
+    app = make_app()
+    print(f"{'交易笔数':>10} {'旧实现(ms)':>12} {'旧实现内存(MB)':>14} {'新实现(ms)':>12} {'新实现内存(MB)':>14} "
+          f"{'重建汇总(ms)':>12} {'结果一致':>8}")
+    with app.app_context():
+        for count in (int(value) for value in args.counts.split(',')):
+            user_id = _seed_transactions(count, args.stocks)
+            start = time.perf_counter()
+            rebuild_trade_stats(user_id)
+            rebuild_ms = (time.perf_counter() - start) * 1000
+            legacy, legacy_ms, legacy_mb = _measure(_legacy_stats, user_id)
+            stats, stats_ms, stats_mb = _measure(get_transaction_stats, user_id)
+            same = (legacy['transaction_count'] == stats['transaction_count']
+                    and legacy['stock_count'] == stats['stock_count']
+                    and abs(legacy['total_buy'] - stats['total_buy']) < 1e-3 * max(1.0, legacy['total_buy'])
+                    and [s['count'] for s in legacy['most_active_stocks']]
+                    == [s['count'] for s in stats['most_active_stocks']])
+            print(f"{count:>10} {legacy_ms:>12.1f} {legacy_mb:>14.1f} {stats_ms:>12.1f} {stats_mb:>14.2f} "
+                  f"{rebuild_ms:>12.1f} {'是' if same else '否':>8}")
+
+
+if __name__ == '__main__':
+    main()